@@ -21,21 +21,71 @@ from google.adk.planners import PlanReActPlanner
 from google.adk.apps.app import App
 from google.adk.models import Gemini
 from google.adk.tools import google_search
-from google.adk.tools import McpToolset
-from mcp import StdioServerParameters
+from google.adk.tools.base_toolset import BaseToolset
 from google.genai import types
+import asyncio
+import logging
 import sys
 import os
-import google.auth
+import threading
 
 from app.lingxing_agent.manager import lingxing_manager
 
-_, project_id = google.auth.default()
-if project_id:
-    os.environ["GOOGLE_CLOUD_PROJECT"] = project_id
-    
 os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
 
+logger = logging.getLogger(__name__)
+
+# 导入本模块不做任何网络 I/O：GCP 项目探测、领星登录、MCP 子进程都推迟到首次使用，
+# 服务端可在绑定端口后调用 warm_up() 提前完成
+_google_project_lock = threading.Lock()
+_google_project_configured = False
+
+
+def configure_google_project():
+    """首次调用时通过 google.auth.default() 探测项目并写入 GOOGLE_CLOUD_PROJECT"""
+    global _google_project_configured
+    if _google_project_configured:
+        return
+    with _google_project_lock:
+        if _google_project_configured:
+            return
+        import google.auth
+
+        _, project_id = google.auth.default()
+        if project_id:
+            os.environ["GOOGLE_CLOUD_PROJECT"] = project_id
+        _google_project_configured = True
+
+
+def _before_root_agent(callback_context):
+    # 第一次请求进入时确保模型调用前已经配置好项目
+    configure_google_project()
+    return None
+
+
+class LazyMcpToolset(BaseToolset):
+    """首次 get_tools() 时才创建 McpToolset (以及 stdio 子进程)"""
+
+    def __init__(self, connection_params_factory):
+        super().__init__()
+        self._connection_params_factory = connection_params_factory
+        self._toolset = None
+
+    @property
+    def toolset(self):
+        if self._toolset is None:
+            from google.adk.tools import McpToolset
+
+            self._toolset = McpToolset(connection_params=self._connection_params_factory())
+        return self._toolset
+
+    async def get_tools(self, readonly_context=None):
+        return await self.toolset.get_tools(readonly_context)
+
+    async def close(self):
+        if self._toolset is not None:
+            await self._toolset.close()
+
 
 def get_weather(query: str) -> str:
     """Simulates a web search. Use it get information on weather.
@@ -98,15 +148,18 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 # 拼接 mcp_server/main.py 的路径
 mcp_script_path = os.path.join(current_dir, "mcp_server", "main.py")
 
-# 定义连接参数
-connection_params = StdioServerParameters(
-    command=sys.executable,
-    args=[mcp_script_path],
-    env={**os.environ, "DEPLOY_ENV": "development"}
-)
+# 定义连接参数 (首次使用时再读取环境变量)
+def _mcp_connection_params():
+    from mcp import StdioServerParameters
+
+    return StdioServerParameters(
+        command=sys.executable,
+        args=[mcp_script_path],
+        env={**os.environ, "DEPLOY_ENV": "development"}
+    )
 
-# 初始化 Toolset
-mongo_mcp_toolset = McpToolset(connection_params=connection_params)
+# 初始化 Toolset (延迟到首次 get_tools)
+mongo_mcp_toolset = LazyMcpToolset(_mcp_connection_params)
 
 database_agent = Agent(
     name="database_agent",
@@ -128,6 +181,9 @@ database_agent = Agent(
     instruction="""你是一个数据库专家，可以通过 MCP 工具集直接访问 MongoDB 数据库。
     你可以列出集合 (list_collections)、查询数据 (query_collection) 和查看统计信息 (get_collection_stats)。
     **新增能力**：你可以直接通过 MSKU 或 SKU 查询产品信息 (find_product_by_msku, find_product_by_sku)。
+    同时查询多个 MSKU/SKU/ASIN 时，使用 find_products_by_mskus 一次查完，不要逐个调用。
+    query_collection 是分页的：用 projection 只取需要的字段；结果里有 next_token 时，
+    用相同的 query 和 sort 加上 resume_token=next_token 获取下一页，不要加大 limit 一次取完。
     
     当用户提供 MSKU 或 SKU 时，优先使用专用的查找工具。
     请根据用户的需求，灵活使用这些工具来获取数据回答问题。
@@ -153,6 +209,7 @@ root_agent = Agent(
         ),
     ),
     planner=PlanReActPlanner(),
+    before_agent_callback=_before_root_agent,
     instruction="""你是一个全能助手。
     **核心规则：你必须全程使用中文进行交流。** 你的思考逻辑、步骤计划和最终回复都必须是简体中文。
     在执行任务或委派任务之前，请简要说明你的计划，让用户了解你的思考过程。
@@ -171,5 +228,23 @@ root_agent = Agent(
 )
 
 
+async def warm_up():
+    """
+    服务绑定端口后调用：探测 GCP 项目、登录领星、启动 MongoDB MCP 子进程。
+    每一步失败只记录日志，首次请求时会再按需重试。
+    """
+    from app.lingxing_agent.core.auth import token_manager
+
+    steps = [
+        ("google project", lambda: asyncio.to_thread(configure_google_project)),
+        ("lingxing token", lambda: asyncio.to_thread(token_manager.get_token)),
+        ("mongo mcp", mongo_mcp_toolset.get_tools),
+    ]
+    for name, step in steps:
+        try:
+            await step()
+        except Exception as e:
+            logger.warning(f"warm-up step '{name}' failed: {e}")
+
 
 app = App(root_agent=root_agent, name="app")
@@ -12,31 +12,61 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import logging
 import os
+import threading
+from contextlib import asynccontextmanager
 
-import google.auth
 from fastapi import FastAPI, Body
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from google.adk.cli.fast_api import get_fast_api_app
-from google.cloud import logging as google_cloud_logging
 
 from app.app_utils.telemetry import setup_telemetry
 from app.app_utils.typing import Feedback
 
 setup_telemetry()
-_, project_id = google.auth.default()
-try:
-    if project_id:
-        logging_client = google_cloud_logging.Client(project=project_id)
-    else:
-        logging_client = google_cloud_logging.Client()
-    logger = logging_client.logger(__name__)
-except Exception as e:
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.warning(f"Failed to initialize Google Cloud Logging: {e}")
+
+# google.cloud.logging 导入较重且需要探测凭据，只有 /feedback 用到，首次调用时再初始化
+_feedback_logger = None
+_feedback_logger_lock = threading.Lock()
+
+
+def get_feedback_logger():
+    global _feedback_logger
+    if _feedback_logger is not None:
+        return _feedback_logger
+    with _feedback_logger_lock:
+        if _feedback_logger is None:
+            try:
+                import google.auth
+                from google.cloud import logging as google_cloud_logging
+
+                _, project_id = google.auth.default()
+                if project_id:
+                    logging_client = google_cloud_logging.Client(project=project_id)
+                else:
+                    logging_client = google_cloud_logging.Client()
+                _feedback_logger = logging_client.logger(__name__)
+            except Exception as e:
+                fallback = logging.getLogger(__name__)
+                fallback.warning(f"Failed to initialize Google Cloud Logging: {e}")
+                _feedback_logger = _StdLoggerAdapter(fallback)
+    return _feedback_logger
+
+
+class _StdLoggerAdapter:
+    """Cloud Logging 不可用时，把 log_struct 转到标准 logging"""
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def log_struct(self, info, severity="INFO"):
+        self._logger.log(logging.getLevelName(severity), info)
+
+
 allow_origins = (
     os.getenv("ALLOW_ORIGINS", "").split(",") if os.getenv("ALLOW_ORIGINS") else None
 )
@@ -50,8 +80,21 @@ session_service_uri = None
 
 artifact_service_uri = f"gs://{logs_bucket_name}" if logs_bucket_name else None
 
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 预热放到后台任务：不阻塞端口绑定，首个请求前尽量完成登录与 MCP 启动
+    from app.agent import warm_up
+
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    warm_up_task.cancel()
+
+
 app: FastAPI = get_fast_api_app(
     agents_dir=AGENT_DIR,
+    lifespan=lifespan,
     web=True,
     artifact_service_uri=artifact_service_uri,
     allow_origins=allow_origins,
@@ -139,7 +182,7 @@ def collect_feedback(feedback: Feedback) -> dict[str, str]:
     Returns:
         Success message
     """
-    logger.log_struct(feedback.model_dump(), severity="INFO")
+    get_feedback_logger().log_struct(feedback.model_dump(), severity="INFO")
     return {"status": "success"}
 
 
@@ -0,0 +1,203 @@
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Callable, Iterable, List, Dict, Any, Optional
+
+import httpx
+
+from app.lingxing_agent.core.auth import token_manager
+from app.lingxing_agent.core.cache import ResponseCache, cache_key, get_response_cache, ttl_for_request
+from app.lingxing_agent.core.client import BaseLingXingClient
+from app.lingxing_agent.core.http import get_async_session
+from app.lingxing_agent.core.pagination import aiter_pages
+from app.lingxing_agent.core.scheduler import get_scheduler
+from app.lingxing_agent.core.singleflight import async_request_flight, request_key
+
+
+class AsyncLingXingClient(BaseLingXingClient):
+    """
+    LingXingClient 的异步版本，方法与同步客户端一一对应 (均为协程)。
+
+    基于 httpx.AsyncClient，网络等待期间不占用线程；构造时不做网络 I/O，
+    token 在首次请求时从共享的 token_manager 获取。
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        session: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self._managed_token = not token
+        self.token = token
+        self._session = session
+        self.cache = cache if cache is not None else get_response_cache()
+        self.headers = self._build_headers(self.token)
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        return self._session if self._session is not None else get_async_session()
+
+    async def _ensure_token(self):
+        if self.token is None:
+            # 登录是阻塞调用，放到线程中避免卡住事件循环
+            self._set_token(await asyncio.to_thread(token_manager.get_token))
+
+    async def _request(self, method: str, url: str, use_cache: bool = True, **kwargs) -> Dict[str, Any]:
+        """use_cache=False 时不读缓存、一定请求上游 (成功的响应仍会写回缓存)"""
+        payload = kwargs.get("json")
+        if self.cache is not None:
+            key = cache_key(method, url, payload)
+            cached = self.cache.get(key) if use_cache else None
+            if cached is not None:
+                return cached
+
+        await self._ensure_token()
+        # 并发的相同请求 (接口 + payload) 只发一次，结果共享
+        flight_key = request_key(method, url, self.token, payload)
+        data = await async_request_flight.do(
+            flight_key, lambda: self._send(method, url, **kwargs)
+        )
+
+        if self.cache is not None and self._is_cacheable(data):
+            ttl, closed_month = ttl_for_request(url, payload)
+            self.cache.set(key, data, ttl, persist=closed_month)
+        return data
+
+    async def _send(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        # 与同步客户端共用全局调度器的请求名额
+        async with get_scheduler().aslot(url):
+            response = await self.session.request(method, url, headers=self.headers, **kwargs)
+            if self._managed_token and self._is_auth_failure(response):
+                self._set_token(await asyncio.to_thread(token_manager.refresh, self.token))
+                response = await self.session.request(
+                    method, url, headers=self.headers, **kwargs
+                )
+        if response.status_code != 200:
+            raise Exception(f"Request failed: {response.status_code} - {response.text}")
+        return response.json()
+
+    async def _post(self, url: str, json_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        return await self._request("POST", url, use_cache=use_cache, json=json_data)
+
+    async def _get(self, url: str) -> Dict[str, Any]:
+        return await self._request("GET", url)
+
+    async def _iter_records(
+        self,
+        url: str,
+        json_data: Dict[str, Any],
+        extract: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+        use_cache: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出分页接口的记录：首页读 total 后并发预取其余页，按 offset 顺序产出"""
+        post = self._post if use_cache else partial(self._post, use_cache=False)
+        async for page in aiter_pages(post, url, json_data, extract, self.PAGE_LENGTH):
+            for record in page:
+                yield record
+
+    def iter_profit_records(
+        self,
+        start_date: str,
+        end_date: str,
+        sids: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出利润报表原始记录 (未按店铺聚合)"""
+        url, json_data = self._profit_request(start_date, end_date, sids)
+        return self._iter_records(url, json_data, self._extract_profit_records, use_cache)
+
+    def iter_purchase_plan(
+        self, start_date: str, end_date: str, sids: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出采购计划"""
+        url, json_data = self._purchase_plan_request(start_date, end_date, sids)
+        return self._iter_records(url, json_data, self._extract_purchase_plan)
+
+    def iter_delivery_plan(self, start_date: str, end_date: str) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出发货计划"""
+        url, json_data = self._delivery_plan_request(start_date, end_date)
+        return self._iter_records(url, json_data, self._extract_delivery_plan)
+
+    def iter_fba_out(self, start_date: str, end_date: str) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出FBA出库流水"""
+        url, json_data = self._fba_out_request(start_date, end_date)
+        return self._iter_records(url, json_data, self._extract_fba_out)
+
+    async def get_profit_data(
+        self,
+        start_date: str,
+        end_date: str,
+        sids: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        获取按店铺聚合的利润报表数据；传入 sids 时只拉取这些店铺。
+        use_cache=False 时跳过响应缓存直接请求领星 (写快照时使用)
+        """
+        records = [r async for r in self.iter_profit_records(start_date, end_date, sids, use_cache)]
+        return list(self._aggregate_profit_records(records).values())
+
+    async def get_purchase_plan(
+        self, start_date: str, end_date: str, sids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """获取采购计划；传入 sids 时只拉取这些店铺"""
+        return [r async for r in self.iter_purchase_plan(start_date, end_date, sids)]
+
+    async def get_delivery_plan(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """获取发货计划"""
+        return [r async for r in self.iter_delivery_plan(start_date, end_date)]
+
+    async def get_fba_out(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """获取FBA出库数据"""
+        return [r async for r in self.iter_fba_out(start_date, end_date)]
+
+    async def get_fba_inventory(
+        self, start_date: str, end_date: str, wid: str
+    ) -> Dict[str, Any]:
+        """获取FBA库存周转数据"""
+        return await self._post(*self._fba_inventory_request(start_date, end_date, wid))
+
+    async def get_local_inventory(
+        self, start_date: str, end_date: str, sid: str
+    ) -> Dict[str, Any]:
+        """获取本地库存周转数据"""
+        return await self._get(self._local_inventory_url(start_date, end_date, sid))
+
+    async def request_web_purchasedate(self, sku: str) -> Dict[str, Any]:
+        """获取采购信息:非加工"""
+        return await self._post(*self._web_purchasedate_request(sku))
+
+    async def request_web_processing_purchasedate(self, sku: str) -> Dict[str, Any]:
+        """获取采购信息:加工"""
+        return await self._post(*self._web_processing_purchasedate_request(sku))
+
+    async def request_oversea_plan(self, sku: str) -> Dict[str, Any]:
+        """获取发货/海外仓计划"""
+        return await self._post(*self._oversea_plan_request(sku))
+
+    async def request_deliver_page(self, msku: str) -> Dict[str, Any]:
+        """获取发货单查询"""
+        return await self._post(*self._deliver_page_request(msku))
+
+    async def get_product_performance(
+        self, start_date: str, end_date: str, msku: str = None
+    ) -> Dict[str, Any]:
+        """获取产品表现数据 (销量、销售额、广告等)"""
+        return await self._post(
+            *self._product_performance_request(start_date, end_date, msku)
+        )
+
+    async def iter_products_performance(
+        self, start_date: str, end_date: str, mskus: Iterable[str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """批量产品表现：MSKU 分组后每组一个查询，并翻页拉全"""
+        for batch in self._msku_batches(mskus):
+            url, json_data = self._product_performance_request(start_date, end_date, batch)
+            async for record in self._iter_records(url, json_data, self._extract_product_performance):
+                yield record
+
+    async def get_products_performance(
+        self, start_date: str, end_date: str, mskus: Iterable[str]
+    ) -> List[Dict[str, Any]]:
+        """获取多个 MSKU 的产品表现记录"""
+        return [r async for r in self.iter_products_performance(start_date, end_date, mskus)]
@@ -1,8 +1,9 @@
 import base64
-import requests
-from Cryptodome.Cipher import AES
-from Cryptodome.Util.number import long_to_bytes
-from app.lingxing_agent.core.config import ACCOUNT, PWD
+import threading
+import time
+from typing import Optional
+from app.lingxing_agent.core.config import ACCOUNT, PWD, TOKEN_TTL
+from app.lingxing_agent.core.http import get_session, get_timeout
 
 
 class LingXingAuth:
@@ -31,6 +32,9 @@ class LingXingAuth:
 
     @staticmethod
     def _encrypt_aes(plaintext, key):
+        # 只有登录时才用到加密库，推迟到这里导入
+        from Cryptodome.Cipher import AES
+
         cipher = AES.new(key.encode(), AES.MODE_ECB)
         # PKCS7 padding logic
         pad_len = AES.block_size - len(plaintext) % AES.block_size
@@ -40,7 +44,9 @@ class LingXingAuth:
 
     def get_login_secret_key(self):
         url = f"{self.BASE_URL}/newadmin/api/passport/getLoginSecretKey"
-        response = requests.post(url, headers=self.HEADERS, json={})
+        response = get_session().post(
+            url, headers=self.HEADERS, json={}, timeout=get_timeout()
+        )
         if response.status_code == 200:
             return response.json()["data"]
         raise Exception(f"Failed to get secret key: {response.text}")
@@ -62,7 +68,9 @@ class LingXingAuth:
         }
 
         url = f"{self.BASE_URL}/newadmin/api/passport/login"
-        response = requests.post(url, headers=self.HEADERS, json=login_payload)
+        response = get_session().post(
+            url, headers=self.HEADERS, json=login_payload, timeout=get_timeout()
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -76,6 +84,74 @@ class LingXingAuth:
         raise Exception(f"Login failed: {response.text}")
 
 
+class TokenManager:
+    """
+    进程内共享的 token 管理器 (线程安全)
+
+    - token 在 TTL 内直接复用，所有客户端/线程共享
+    - 过期或收到鉴权失败时刷新；刷新是 single-flight 的，
+      并发线程只会触发一次 login()，其余线程等待并复用新 token
+    """
+
+    def __init__(self, auth: Optional[LingXingAuth] = None, ttl: float = TOKEN_TTL):
+        self._auth = auth if auth is not None else LingXingAuth()
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self.hits = 0
+        self.refreshes = 0
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    def _login(self) -> str:
+        token = self._auth.login()
+        if not token:
+            raise Exception("Login failed: empty token")
+        self._token = token
+        self._expires_at = time.monotonic() + self._ttl
+        self.refreshes += 1
+        return token
+
+    def get_token(self) -> str:
+        """获取有效 token，必要时登录"""
+        with self._lock:
+            if self._is_valid():
+                self.hits += 1
+                return self._token
+            return self._login()
+
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """
+        鉴权失败后刷新 token。
+
+        传入失效的 token：如果其他线程已经换过新 token，直接返回新 token，
+        不会重复登录。
+        """
+        with self._lock:
+            if stale_token is not None and stale_token != self._token and self._is_valid():
+                self.hits += 1
+                return self._token
+            return self._login()
+
+    def invalidate(self):
+        """丢弃缓存的 token，下次 get_token() 重新登录"""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "refreshes": self.refreshes,
+                "expires_in": max(0.0, self._expires_at - time.monotonic()) if self._token else 0.0,
+            }
+
+
+token_manager = TokenManager()
+
+
 def get_token():
-    auth = LingXingAuth()
-    return auth.login()
+    return token_manager.get_token()
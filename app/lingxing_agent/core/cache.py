@@ -0,0 +1,213 @@
+"""
+领星响应缓存
+
+按 接口 + 规范化 payload 缓存响应：
+- 内存层：有容量上限的 LRU，每条记录带过期时间
+- 磁盘层 (可选)：SQLite，只保存查询区间全部落在已结算月份的结果
+
+TTL 由查询区间决定：已结算月份 (月末 + SNAPSHOT_SETTLEMENT_DAYS，见 snapshot.settled_at)
+长期缓存并写入磁盘层；仍在结算期内的月份和当前月份一样用短 TTL、只放内存，
+不带日期的实时查询使用默认 TTL。
+缓存命中返回的是共享对象，调用方不应原地修改。
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from app.lingxing_agent.core.config import (
+    CACHE_CLOSED_MONTH_TTL,
+    CACHE_DEFAULT_TTL,
+    CACHE_DIR,
+    CACHE_ENABLED,
+    CACHE_MAX_ENTRIES,
+    CACHE_OPEN_MONTH_TTL,
+)
+from app.lingxing_agent.core.snapshot import is_closed_month
+
+# payload / query string 中表示查询区间的字段
+_DATE_KEYS = ("startDate", "endDate", "start_date", "end_date")
+_DATE_RE = re.compile(r"^(\d{4})-(\d{2})(?:-\d{2})?$")
+
+
+def _parse_year_month(value: Any) -> Optional[Tuple[int, int]]:
+    if not isinstance(value, str):
+        return None
+    match = _DATE_RE.match(value.strip())
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def query_months(url: str, payload: Any = None) -> list:
+    """提取请求里的所有 (year, month)，来源为 JSON payload 或 GET 查询串"""
+    values = []
+    if isinstance(payload, dict):
+        values.extend(payload.get(key) for key in _DATE_KEYS)
+    query = parse_qs(urlparse(url).query)
+    for key in _DATE_KEYS:
+        values.extend(query.get(key, []))
+    months = [_parse_year_month(v) for v in values]
+    return [m for m in months if m is not None]
+
+
+def ttl_for_request(url: str, payload: Any = None, now: Optional[datetime] = None) -> Tuple[float, bool]:
+    """返回 (ttl 秒数, 是否为已结算月份)"""
+    months = query_months(url, payload)
+    if not months:
+        return CACHE_DEFAULT_TTL, False
+    # 月末之后的结算期内数据仍会调整，不能按已结束月份长期缓存
+    if is_closed_month(*max(months), now=now):
+        return CACHE_CLOSED_MONTH_TTL, True
+    return CACHE_OPEN_MONTH_TTL, False
+
+
+def cache_key(method: str, url: str, payload: Any = None) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"{method} {url} {body}"
+
+
+class DiskCache:
+    """SQLite 磁盘层 (线程安全)"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "lingxing_cache.sqlite3"), check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        expires_at, value = row
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return expires_at, json.loads(value)
+
+    def set(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    """内存 LRU + 可选磁盘层的 TTL 缓存"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, disk: Optional[DiskCache] = None):
+        self._max_entries = max_entries
+        self._disk = disk
+        self._lock = threading.Lock()
+        # key -> (wall-clock 过期时间, value)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        if self._disk is not None:
+            found = self._disk.get(key)
+            if found is not None:
+                expires_at, value = found
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, value, expires_at)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float, persist: bool = False):
+        """写入缓存；persist=True 时同时写入磁盘层"""
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        if persist and self._disk is not None:
+            self._disk.set(key, value, expires_at)
+
+    def _store(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """进程内共享的响应缓存；LINGXING_CACHE_ENABLED=0 时返回 None"""
+    global _response_cache
+    if not CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                disk = DiskCache(CACHE_DIR) if CACHE_DIR else None
+                _response_cache = ResponseCache(disk=disk)
+    return _response_cache
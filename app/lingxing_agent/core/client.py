@@ -1,19 +1,41 @@
+from functools import partial
+from itertools import chain
+from operator import itemgetter
+
 import requests
-from typing import List, Dict, Any, Optional
-from app.lingxing_agent.core.auth import get_token
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+from app.lingxing_agent.core.auth import token_manager
+from app.lingxing_agent.core.cache import ResponseCache, cache_key, get_response_cache, ttl_for_request
+from app.lingxing_agent.core.http import get_session, get_timeout
+from app.lingxing_agent.core.pagination import iter_pages
+from app.lingxing_agent.core.scheduler import get_scheduler
+from app.lingxing_agent.core.singleflight import request_flight, request_key
+
+
+# token 失效时领星返回的 HTTP 状态码 / 业务 code
+AUTH_FAILURE_CODES = {401, "401"}
+# 开放接口成功为 0，网页端 gw 接口成功为 1；没有 code 字段的接口只看数据
+SUCCESS_CODES = {None, 0, "0", 1, "1"}
+# 成功响应的数据所在字段 (采购计划等接口的 list 在顶层)
+PAYLOAD_KEYS = ("data", "list")
 
 
-class LingXingClient:
+class BaseLingXingClient:
+    """同步 / 异步客户端共享的请求构造与响应解析逻辑 (不做任何网络 I/O)"""
+
     BASE_URL = "https://erp.lingxing.com"
     GW_URL = "https://gw.lingxingerp.com"
+    PAGE_LENGTH = 200
+    # asinLists 单次请求的 search_value 最多携带的 MSKU 数
+    PERFORMANCE_MSKU_BATCH = 50
 
-    def __init__(self, token: Optional[str] = None):
-        self.token = token if token else get_token()
-        self.headers = {
+    @staticmethod
+    def _build_headers(token: Optional[str]) -> Dict[str, Any]:
+        return {
             "accept": "application/json, text/plain, */*",
             "accept-language": "zh-CN,zh;q=0.9",
             "ak-client-type": "web",
-            "auth-token": self.token,
+            "auth-token": token,
             "content-type": "application/json;charset=UTF-8",
             "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
             "x-ak-company-id": "901217529031491584",
@@ -25,20 +47,36 @@ class LingXingClient:
             "x-ak-zid": "10330128",
         }
 
-    def _post(self, url: str, json_data: Dict[str, Any]) -> Dict[str, Any]:
-        response = requests.post(url, headers=self.headers, json=json_data)
-        if response.status_code != 200:
-            raise Exception(f"Request failed: {response.status_code} - {response.text}")
-        return response.json()
+    def _set_token(self, token: str):
+        self.token = token
+        self.headers["auth-token"] = token
 
-    def _get(self, url: str) -> Dict[str, Any]:
-        response = requests.get(url, headers=self.headers)
+    @staticmethod
+    def _is_auth_failure(response) -> bool:
+        if response.status_code in AUTH_FAILURE_CODES:
+            return True
         if response.status_code != 200:
-            raise Exception(f"Request failed: {response.status_code} - {response.text}")
-        return response.json()
-
-    def get_profit_data(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        """获取按店铺聚合的利润报表数据"""
+            return False
+        try:
+            data = response.json()
+        except ValueError:
+            return False
+        return isinstance(data, dict) and data.get("code") in AUTH_FAILURE_CODES
+
+    @staticmethod
+    def _is_cacheable(data: Any) -> bool:
+        """只缓存成功且带数据的响应；业务错误、限流等响应不缓存，下次重新请求"""
+        return (
+            isinstance(data, dict)
+            and data.get("code") in SUCCESS_CODES
+            and any(data.get(key) is not None for key in PAYLOAD_KEYS)
+        )
+
+    # ---------- 请求构造 ----------
+
+    def _profit_request(
+        self, start_date: str, end_date: str, sids: Optional[List[str]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
         url = f"{self.GW_URL}/bd/profit/report/report/seller/list"
         json_data = {
             "startDate": start_date,
@@ -46,7 +84,7 @@ class LingXingClient:
             "offset": 0,
             "length": 200,
             "mids": [],
-            "sids": [],
+            "sids": list(sids or []),
             "currencyCode": "",
             "sellerPrincipalUids": [],
             "sortField": "totalSalesQuantity",
@@ -59,58 +97,11 @@ class LingXingClient:
             "transactionStatus": [],
             "req_time_sequence": "/bd/profit/report/report/seller/list$$13",
         }
+        return url, json_data
 
-        store_dict = {}
-        offset = 0
-        length = 200
-
-        while True:
-            json_data["offset"] = offset
-            json_data["length"] = length
-
-            data = self._post(url, json_data)
-            fetched_records = data.get("data", {}).get("records", [])
-
-            for order in fetched_records:
-                store_name = order.get("storeName")
-                if not store_name:
-                    continue
-
-                if store_name not in store_dict:
-                    store_dict[store_name] = {}
-                    for key, value in order.items():
-                        if isinstance(value, (int, float)):
-                            store_dict[store_name][key] = value
-                        elif isinstance(value, str):
-                            try:
-                                store_dict[store_name][key] = float(value)
-                            except (ValueError, TypeError):
-                                store_dict[store_name][key] = value
-                        else:
-                            store_dict[store_name][key] = value
-                else:
-                    for key, value in order.items():
-                        if isinstance(value, (int, float)):
-                            store_dict[store_name][key] = (
-                                store_dict[store_name].get(key, 0) + value
-                            )
-                        elif isinstance(value, str):
-                            try:
-                                num_value = float(value)
-                                store_dict[store_name][key] = (
-                                    store_dict[store_name].get(key, 0) + num_value
-                                )
-                            except (ValueError, TypeError):
-                                pass
-
-            if len(fetched_records) < length:
-                break
-            offset += length
-
-        return list(store_dict.values())
-
-    def get_purchase_plan(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        """获取采购计划"""
+    def _purchase_plan_request(
+        self, start_date: str, end_date: str, sids: Optional[List[str]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
         url = f"{self.BASE_URL}/api/purchase/planListsNew"
         json_data = {
             "offset": 0,
@@ -119,7 +110,7 @@ class LingXingClient:
             "sort_type": "desc",
             "status": "-2",
             "country_code": [],
-            "sids": [],
+            "sids": list(sids or []),
             "wids": [],
             "search_field_time": "creator_time",
             "search_field": "sku",
@@ -129,30 +120,9 @@ class LingXingClient:
             "end_date": end_date,
             "req_time_sequence": "/api/purchase/planListsNew$$4",
         }
+        return url, json_data
 
-        all_data = []
-        offset = 0
-        length = 200
-
-        while True:
-            json_data["offset"] = offset
-            json_data["length"] = length
-
-            data = self._post(url, json_data)
-            fetched_orders = data.get(
-                "list", []
-            )  # API response might be different, checking original code: data['list']
-            # Original code: data = response.json(); fetched_orders = data['list']
-
-            all_data.extend(fetched_orders)
-            if len(fetched_orders) < length:
-                break
-            offset += length
-
-        return all_data
-
-    def get_delivery_plan(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        """获取发货计划"""
+    def _delivery_plan_request(self, start_date: str, end_date: str) -> Tuple[str, Dict[str, Any]]:
         url = f"{self.BASE_URL}/api/fba_plan/planGroupList"
         json_data = {
             "receive_warehouse_type": "1",
@@ -163,28 +133,9 @@ class LingXingClient:
             "length": 200,
             "req_time_sequence": "/api/fba_plan/planGroupList$$2",
         }
+        return url, json_data
 
-        all_data = []
-        offset = 0
-        length = 200
-
-        while True:
-            json_data["offset"] = offset
-            json_data["length"] = length
-
-            data = self._post(url, json_data)
-            # Original: data['data']['plan_list']
-            fetched_orders = data.get("data", {}).get("plan_list", [])
-
-            all_data.extend(fetched_orders)
-            if len(fetched_orders) < length:
-                break
-            offset += length
-
-        return all_data
-
-    def get_fba_out(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        """获取FBA出库数据"""
+    def _fba_out_request(self, start_date: str, end_date: str) -> Tuple[str, Dict[str, Any]]:
         url = f"{self.BASE_URL}/api/storage/statement"
         json_data = {
             "start_date": start_date,
@@ -196,30 +147,11 @@ class LingXingClient:
             "sort_type": "desc",
             "req_time_sequence": "/api/storage/statement$$6",
         }
+        return url, json_data
 
-        all_data = []
-        offset = 0
-        length = 200
-
-        while True:
-            json_data["offset"] = offset
-            json_data["length"] = length
-
-            data = self._post(url, json_data)
-            # Original: data.get('data').get('list')
-            fetched_orders = data.get("data", {}).get("list", [])
-
-            all_data.extend(fetched_orders)
-            if len(fetched_orders) < length:
-                break
-            offset += length
-
-        return all_data
-
-    def get_fba_inventory(
+    def _fba_inventory_request(
         self, start_date: str, end_date: str, wid: str
-    ) -> Dict[str, Any]:
-        """获取FBA库存周转数据"""
+    ) -> Tuple[str, Dict[str, Any]]:
         url = f"{self.GW_URL}/cost/center/api/fba/gather/v2/query"
         json_data = {
             "dispositionType": "all",
@@ -230,19 +162,15 @@ class LingXingClient:
             "uid": "10431785",
             "req_time_sequence": "/cost/center/api/fba/gather/v2/query$$3",
         }
-        return self._post(url, json_data)
+        return url, json_data
 
-    def get_local_inventory(
-        self, start_date: str, end_date: str, sid: str
-    ) -> Dict[str, Any]:
-        """获取本地库存周转数据"""
+    def _local_inventory_url(self, start_date: str, end_date: str, sid: str) -> str:
         url = f"{self.BASE_URL}/api/inventory_report/localQuantityDetailList"
         # GET request with query params
         query = f"filter_zero_storage=0&offset=0&length=20&start_date={start_date}&end_date={end_date}&sort_type=desc&sid_list={sid}&req_time_sequence=%2Fapi%2Finventory_report%2FlocalQuantityDetailList$$6"
-        return self._get(f"{url}?{query}")
+        return f"{url}?{query}"
 
-    def request_web_purchasedate(self, sku: str) -> Dict[str, Any]:
-        """获取采购信息:非加工 (对应 request_web_purchasedate)"""
+    def _web_purchasedate_request(self, sku: str) -> Tuple[str, Dict[str, Any]]:
         # URL: https://erp.lingxing.com/api/purchase/orderListsV2
         json_data = {
             'offset': 0, 'length': 200, 
@@ -259,10 +187,19 @@ class LingXingClient:
             'is_associate_return': 0, 'is_associate_exchange': 0,
             'req_time_sequence': '/api/purchase/orderListsV2$$7',
         }
-        return self._post(f"{self.BASE_URL}/api/purchase/orderListsV2", json_data)
+        return f"{self.BASE_URL}/api/purchase/orderListsV2", json_data
 
-    def request_oversea_plan(self, sku: str) -> Dict[str, Any]:
-        """获取发货/海外仓计划 (对应 request_web_multi_sku_shiptitme)"""
+    def _web_processing_purchasedate_request(self, sku: str) -> Tuple[str, Dict[str, Any]]:
+        # URL: https://erp.lingxing.com/api/storage_process/lists
+        json_data = {
+            'offset': 0, 'length': 200,
+            'sort_field': 'create_time', 'sort_type': 'desc',
+            'search_field': 'sku', 'search_value': sku,
+            'req_time_sequence': '/api/storage_process/lists$$3',
+        }
+        return f"{self.BASE_URL}/api/storage_process/lists", json_data
+
+    def _oversea_plan_request(self, sku: str) -> Tuple[str, Dict[str, Any]]:
         # URL: https://erp.lingxing.com/api/oversea_plan/planGroupList
         json_data = {
             'receive_warehouse_type': '3',
@@ -277,26 +214,26 @@ class LingXingClient:
             'offset': 0, 'length': 200,
             'req_time_sequence': '/api/oversea_plan/planGroupList$$5',
         }
-        return self._post(f"{self.BASE_URL}/api/oversea_plan/planGroupList", json_data)
+        return f"{self.BASE_URL}/api/oversea_plan/planGroupList", json_data
 
-    def request_deliver_page(self, msku: str) -> Dict[str, Any]:
-        """获取发货单查询 (保留原有的, 对应 request_deliver_page)"""
+    def _deliver_page_request(self, msku: str) -> Tuple[str, Dict[str, Any]]:
         json_data = {
              'offset': 0, 'length': 20, 'sort_field': 'create_time', 'sort_type': 'desc',
              'search_field': 'msku', 'search_value': msku,
              'req_time_sequence': '/api/fba/shipment_plan/lists$$15'
         }
-        return self._post(f"{self.BASE_URL}/api/fba/shipment_plan/lists", json_data)
+        return f"{self.BASE_URL}/api/fba/shipment_plan/lists", json_data
 
-    def get_product_performance(self, start_date: str, end_date: str, msku: str = None) -> Dict[str, Any]:
-        """获取产品表现数据 (销量、销售额、广告等)"""
+    def _product_performance_request(
+        self, start_date: str, end_date: str, msku: Union[str, List[str], None] = None
+    ) -> Tuple[str, Dict[str, Any]]:
         json_data = {
             'sort_field': 'volume',
             'sort_type': 'desc',
             'offset': 0,
             'length': 200, # Limit for single query
             'search_field': 'msku',
-            'search_value': [msku] if msku else [],
+            'search_value': [msku] if isinstance(msku, str) else list(msku or []),
             'mids': '',
             'sids': '',
             'date_type': 'purchase',
@@ -326,6 +263,292 @@ class LingXingClient:
             'date_range_type': 0,
             'req_time_sequence': '/bd/productPerformance/asinLists$$19',
         }
-        return self._post(f"{self.GW_URL}/bd/productPerformance/asinLists", json_data)
+        return f"{self.GW_URL}/bd/productPerformance/asinLists", json_data
+
+    # ---------- 响应解析 ----------
+
+    @staticmethod
+    def _extract_profit_records(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return data.get("data", {}).get("records", [])
+
+    @staticmethod
+    def _extract_purchase_plan(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # API response might be different, checking original code: data['list']
+        # Original code: data = response.json(); fetched_orders = data['list']
+        return data.get("list", [])
+
+    @staticmethod
+    def _extract_delivery_plan(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Original: data['data']['plan_list']
+        return data.get("data", {}).get("plan_list", [])
+
+    @staticmethod
+    def _extract_fba_out(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Original: data.get('data').get('list')
+        return data.get("data", {}).get("list", [])
+
+    @staticmethod
+    def _extract_product_performance(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        block = data.get("data")
+        return block.get("list", []) if isinstance(block, dict) else []
+
+    def _msku_batches(self, mskus: Iterable[str]) -> List[List[str]]:
+        """去重 (保持顺序) 后按 PERFORMANCE_MSKU_BATCH 分组"""
+        unique = list(dict.fromkeys(m for m in mskus if m))
+        size = self.PERFORMANCE_MSKU_BATCH
+        return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+    @staticmethod
+    def _profit_numeric_columns(records: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        """
+        判定数值列 (数字或数字字符串)，返回 (数值列, 其中的整数列)。
+        每列以第一个非空值为准，首条记录为空或缺字段时继续往后找，不会漏掉该列。
+        """
+        numeric_columns, int_columns = [], []
+        for key in dict.fromkeys(chain.from_iterable(records)):
+            if key == "storeName":
+                continue
+            sample = next((r[key] for r in records if r.get(key) not in (None, "")), None)
+            if isinstance(sample, (int, float)):
+                numeric_columns.append(key)
+                if isinstance(sample, int):
+                    int_columns.append(key)
+            elif isinstance(sample, str):
+                try:
+                    float(sample)
+                except ValueError:
+                    continue
+                numeric_columns.append(key)
+        return numeric_columns, int_columns
+
+    @classmethod
+    def _aggregate_profit_records(cls, records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        按 storeName 汇总利润报表记录 (列式计算)
+
+        数值列按全部记录判定一次 (见 _profit_numeric_columns)，
+        整列批量转成 float 后 groupby(storeName).sum()，无法转换的值不参与求和；
+        非数值字段保留各店铺第一条记录的值。
+        """
+        import numpy as np
+        import pandas as pd
+
+        records = [r for r in records if r.get("storeName")]
+        if not records:
+            return {}
+
+        store_names = [r["storeName"] for r in records]
+        first_records: Dict[str, Dict[str, Any]] = {}
+        for name, record in zip(store_names, records, strict=True):
+            first_records.setdefault(name, record)
+
+        numeric_columns, int_columns = cls._profit_numeric_columns(records)
+        if not numeric_columns:
+            return {name: dict(record) for name, record in first_records.items()}
+
+        try:
+            rows = list(map(itemgetter(*numeric_columns), records))
+            matrix = np.array(rows, dtype=float).reshape(len(records), len(numeric_columns))
+            frame = pd.DataFrame(matrix, columns=numeric_columns)
+        except (KeyError, TypeError, ValueError):
+            # 个别记录缺字段、为空串或含非数字值：逐列宽松转换，无法转换的值不参与求和
+            frame = pd.DataFrame(
+                {
+                    column: pd.to_numeric(
+                        pd.Series([r.get(column) for r in records], dtype=object),
+                        errors="coerce",
+                    )
+                    for column in numeric_columns
+                }
+            )
+
+        sums = frame.groupby(store_names, sort=False).sum()
+        store_dict = {}
+        for name, totals in zip(sums.index, sums.to_dict(orient="records"), strict=True):
+            record = dict(first_records[name])
+            for column in int_columns:
+                if float(totals[column]).is_integer():
+                    totals[column] = int(totals[column])
+            record.update(totals)
+            store_dict[name] = record
+        return store_dict
+
+
+class LingXingClient(BaseLingXingClient):
+    """
+    领星 ERP 同步客户端
+
+    构造时不做网络 I/O；未显式传入 token 时，首次请求才从共享的 token_manager 获取。
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        # 未显式传入 token 时由共享的 token_manager 管理 (缓存 + 失效自动刷新)
+        self._managed_token = not token
+        self.token = token
+        self.session = session if session is not None else get_session()
+        self.cache = cache if cache is not None else get_response_cache()
+        self.headers = self._build_headers(self.token)
+
+    def _ensure_token(self):
+        if self.token is None:
+            self._set_token(token_manager.get_token())
+
+    def _request(self, method: str, url: str, use_cache: bool = True, **kwargs) -> Dict[str, Any]:
+        """use_cache=False 时不读缓存、一定请求上游 (成功的响应仍会写回缓存)"""
+        payload = kwargs.get("json")
+        if self.cache is not None:
+            key = cache_key(method, url, payload)
+            cached = self.cache.get(key) if use_cache else None
+            if cached is not None:
+                return cached
+
+        self._ensure_token()
+        # 并发的相同请求 (接口 + payload) 只发一次，结果共享
+        flight_key = request_key(method, url, self.token, payload)
+        data = request_flight.do(flight_key, lambda: self._send(method, url, **kwargs))
+
+        if self.cache is not None and self._is_cacheable(data):
+            ttl, closed_month = ttl_for_request(url, payload)
+            self.cache.set(key, data, ttl, persist=closed_month)
+        return data
+
+    def _send(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        # 全局调度器限制同时在途的领星请求数
+        with get_scheduler().slot(url):
+            response = self.session.request(
+                method, url, headers=self.headers, timeout=get_timeout(), **kwargs
+            )
+            if self._managed_token and self._is_auth_failure(response):
+                # token 失效：刷新一次后重试 (并发线程共享同一次刷新)
+                self._set_token(token_manager.refresh(self.token))
+                response = self.session.request(
+                    method, url, headers=self.headers, timeout=get_timeout(), **kwargs
+                )
+        if response.status_code != 200:
+            raise Exception(f"Request failed: {response.status_code} - {response.text}")
+        return response.json()
+
+    def _post(self, url: str, json_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        return self._request("POST", url, use_cache=use_cache, json=json_data)
+
+    def _get(self, url: str) -> Dict[str, Any]:
+        return self._request("GET", url)
+
+    def _iter_records(
+        self,
+        url: str,
+        json_data: Dict[str, Any],
+        extract: Callable[[Dict[str, Any]], List[Dict[str, Any]]],
+        use_cache: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """逐条产出分页接口的记录：首页读 total 后并发预取其余页，按 offset 顺序产出"""
+        post = self._post if use_cache else partial(self._post, use_cache=False)
+        for page in iter_pages(post, url, json_data, extract, self.PAGE_LENGTH):
+            yield from page
+
+    def iter_profit_records(
+        self,
+        start_date: str,
+        end_date: str,
+        sids: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """逐条产出利润报表原始记录 (未按店铺聚合)"""
+        url, json_data = self._profit_request(start_date, end_date, sids)
+        return self._iter_records(url, json_data, self._extract_profit_records, use_cache)
+
+    def iter_purchase_plan(
+        self, start_date: str, end_date: str, sids: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """逐条产出采购计划"""
+        url, json_data = self._purchase_plan_request(start_date, end_date, sids)
+        return self._iter_records(url, json_data, self._extract_purchase_plan)
+
+    def iter_delivery_plan(self, start_date: str, end_date: str) -> Iterator[Dict[str, Any]]:
+        """逐条产出发货计划"""
+        url, json_data = self._delivery_plan_request(start_date, end_date)
+        return self._iter_records(url, json_data, self._extract_delivery_plan)
+
+    def iter_fba_out(self, start_date: str, end_date: str) -> Iterator[Dict[str, Any]]:
+        """逐条产出FBA出库流水"""
+        url, json_data = self._fba_out_request(start_date, end_date)
+        return self._iter_records(url, json_data, self._extract_fba_out)
+
+    def get_profit_data(
+        self,
+        start_date: str,
+        end_date: str,
+        sids: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        获取按店铺聚合的利润报表数据；传入 sids 时只拉取这些店铺。
+        use_cache=False 时跳过响应缓存直接请求领星 (写快照时使用)
+        """
+        records = self.iter_profit_records(start_date, end_date, sids, use_cache)
+        return list(self._aggregate_profit_records(records).values())
+
+    def get_purchase_plan(
+        self, start_date: str, end_date: str, sids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """获取采购计划；传入 sids 时只拉取这些店铺"""
+        return list(self.iter_purchase_plan(start_date, end_date, sids))
 
+    def get_delivery_plan(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """获取发货计划"""
+        return list(self.iter_delivery_plan(start_date, end_date))
+
+    def get_fba_out(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """获取FBA出库数据"""
+        return list(self.iter_fba_out(start_date, end_date))
 
+    def get_fba_inventory(
+        self, start_date: str, end_date: str, wid: str
+    ) -> Dict[str, Any]:
+        """获取FBA库存周转数据"""
+        return self._post(*self._fba_inventory_request(start_date, end_date, wid))
+
+    def get_local_inventory(
+        self, start_date: str, end_date: str, sid: str
+    ) -> Dict[str, Any]:
+        """获取本地库存周转数据"""
+        return self._get(self._local_inventory_url(start_date, end_date, sid))
+
+    def request_web_purchasedate(self, sku: str) -> Dict[str, Any]:
+        """获取采购信息:非加工 (对应 request_web_purchasedate)"""
+        return self._post(*self._web_purchasedate_request(sku))
+
+    def request_web_processing_purchasedate(self, sku: str) -> Dict[str, Any]:
+        """获取采购信息:加工 (对应 request_web_processing_purchasedate)"""
+        return self._post(*self._web_processing_purchasedate_request(sku))
+
+    def request_oversea_plan(self, sku: str) -> Dict[str, Any]:
+        """获取发货/海外仓计划 (对应 request_web_multi_sku_shiptitme)"""
+        return self._post(*self._oversea_plan_request(sku))
+
+    def request_deliver_page(self, msku: str) -> Dict[str, Any]:
+        """获取发货单查询 (保留原有的, 对应 request_deliver_page)"""
+        return self._post(*self._deliver_page_request(msku))
+
+    def get_product_performance(self, start_date: str, end_date: str, msku: str = None) -> Dict[str, Any]:
+        """获取产品表现数据 (销量、销售额、广告等)"""
+        return self._post(*self._product_performance_request(start_date, end_date, msku))
+
+    def iter_products_performance(
+        self, start_date: str, end_date: str, mskus: Iterable[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """批量产品表现：MSKU 分组后每组一个查询，并翻页拉全"""
+        for batch in self._msku_batches(mskus):
+            url, json_data = self._product_performance_request(start_date, end_date, batch)
+            yield from self._iter_records(url, json_data, self._extract_product_performance)
+
+    def get_products_performance(
+        self, start_date: str, end_date: str, mskus: Iterable[str]
+    ) -> List[Dict[str, Any]]:
+        """获取多个 MSKU 的产品表现记录"""
+        return list(self.iter_products_performance(start_date, end_date, mskus))
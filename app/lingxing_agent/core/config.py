@@ -1,3 +1,5 @@
+import os
+
 # 店铺负责人映射
 PROJECT_MANNER = {
     "BT-US": "陈钰",
@@ -87,3 +89,70 @@ def get_store_id(store_name: str) -> str | None:
 # 账号信息
 ACCOUNT = "baitai-350000"
 PWD = "Lx159357"
+
+
+# token 缓存时长 (秒)，过期后由 TokenManager 重新登录
+TOKEN_TTL = float(os.getenv("LINGXING_TOKEN_TTL", str(4 * 3600)))
+
+# HTTP 连接池配置 (可通过环境变量覆盖)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("LINGXING_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("LINGXING_READ_TIMEOUT", "60"))
+HTTP_POOL_CONNECTIONS = int(os.getenv("LINGXING_POOL_CONNECTIONS", "4"))
+
+# 每个域名的连接池大小
+HTTP_POOL_MAXSIZE = {
+    "gw.lingxingerp.com": int(os.getenv("LINGXING_GW_POOL_MAXSIZE", "32")),
+    "erp.lingxing.com": int(os.getenv("LINGXING_ERP_POOL_MAXSIZE", "32")),
+}
+
+# 分页并发拉取时每个域名同时在途的请求上限
+PAGE_CONCURRENCY_PER_HOST = {
+    "gw.lingxingerp.com": int(os.getenv("LINGXING_GW_PAGE_CONCURRENCY", "8")),
+    "erp.lingxing.com": int(os.getenv("LINGXING_ERP_PAGE_CONCURRENCY", "8")),
+}
+DEFAULT_PAGE_CONCURRENCY = 4
+
+# 响应缓存配置
+CACHE_ENABLED = os.getenv("LINGXING_CACHE_ENABLED", "1") != "0"
+CACHE_MAX_ENTRIES = int(os.getenv("LINGXING_CACHE_MAX_ENTRIES", "512"))
+# 查询区间全部落在已结束月份：长期缓存
+CACHE_CLOSED_MONTH_TTL = float(os.getenv("LINGXING_CACHE_CLOSED_TTL", str(7 * 24 * 3600)))
+# 区间包含当前月份 (数据仍在变化)：短 TTL
+CACHE_OPEN_MONTH_TTL = float(os.getenv("LINGXING_CACHE_OPEN_TTL", "300"))
+# 不带日期的实时查询 (采购单、发货单等)
+CACHE_DEFAULT_TTL = float(os.getenv("LINGXING_CACHE_DEFAULT_TTL", "60"))
+# 磁盘缓存目录 (为空则只用内存)，只持久化已结束月份的结果
+CACHE_DIR = os.getenv("LINGXING_CACHE_DIR", "")
+
+# 已结算月份利润快照 (SQLite) 所在目录
+SNAPSHOT_ENABLED = os.getenv("LINGXING_SNAPSHOT_ENABLED", "1") != "0"
+SNAPSHOT_DIR = os.getenv(
+    "LINGXING_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".lingxing", "snapshots")
+)
+# 月末之后还要等多少天才视为已结算 (此前领星数据仍可能调整，不写入快照)
+SNAPSHOT_SETTLEMENT_DAYS = int(os.getenv("LINGXING_SNAPSHOT_SETTLEMENT_DAYS", "10"))
+
+# 批量产品状态查询的并发 MSKU 数
+PRODUCT_STATUS_WORKERS = int(os.getenv("LINGXING_PRODUCT_STATUS_WORKERS", "8"))
+
+# 查询计划执行时限 (秒)：整个计划的截止时间，以及单个工具调用的超时
+PLAN_DEADLINE = float(os.getenv("LINGXING_PLAN_DEADLINE", "120"))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("LINGXING_TOOL_TIMEOUT", "60"))
+TOOL_TIMEOUTS = {
+    "get_available_stores": 5,
+    "analyze_store": 90,
+    "analyze_stores": 100,
+    "check_product_status": 30,
+    "check_products_status": 90,
+    "get_product_performance": 30,
+    "get_products_performance": 60,
+}
+
+# 全局调度器：所有领星请求共享的并发上限、每个域名的上限，以及工具扇出的共享线程数
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv("LINGXING_MAX_CONCURRENCY", "16"))
+SCHEDULER_HOST_LIMITS = {
+    "gw.lingxingerp.com": int(os.getenv("LINGXING_GW_CONCURRENCY", "8")),
+    "erp.lingxing.com": int(os.getenv("LINGXING_ERP_CONCURRENCY", "8")),
+}
+SCHEDULER_DEFAULT_HOST_LIMIT = 4
+SCHEDULER_WORKERS = int(os.getenv("LINGXING_SCHEDULER_WORKERS", "16"))
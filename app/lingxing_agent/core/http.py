@@ -0,0 +1,95 @@
+"""
+领星 HTTP 传输层
+
+进程内共享一个 requests.Session，按域名挂载独立的连接池 (keep-alive)，
+所有 LingXingClient 实例和 LingXingAuth 复用同一批 TCP/TLS 连接。
+异步客户端使用 httpx.AsyncClient，每个事件循环一个实例。
+"""
+import asyncio
+import threading
+import weakref
+from typing import Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.lingxing_agent.core.config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_READ_TIMEOUT,
+)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# httpx.AsyncClient 绑定在创建它的事件循环上，因此按 loop 分别缓存
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    for host, maxsize in HTTP_POOL_MAXSIZE.items():
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=maxsize,
+            pool_block=False,
+        )
+        session.mount(f"https://{host}", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取进程内共享的 Session (首次调用时创建)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_async_session() -> httpx.AsyncClient:
+    """获取当前事件循环共享的 httpx.AsyncClient (首次调用时创建)"""
+    loop = asyncio.get_running_loop()
+    client = _async_sessions.get(loop)
+    if client is None or client.is_closed:
+        max_connections = sum(HTTP_POOL_MAXSIZE.values())
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=get_async_timeout(),
+        )
+        _async_sessions[loop] = client
+    return client
+
+
+def get_timeout() -> Tuple[float, float]:
+    """(连接超时, 读取超时)，单位秒"""
+    return HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+
+def get_async_timeout() -> httpx.Timeout:
+    connect, read = get_timeout()
+    return httpx.Timeout(read, connect=connect)
+
+
+async def close_async_session():
+    """关闭当前事件循环的 AsyncClient"""
+    client = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def close_session():
+    """关闭共享 Session，释放连接池 (主要用于进程退出和测试)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
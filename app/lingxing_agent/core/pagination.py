@@ -0,0 +1,221 @@
+"""
+分页拉取引擎
+
+领星的列表接口按 offset/length 分页。先取第一页并读出 total，
+再按域名限流并发拉取剩余页，按 offset 顺序逐页产出 (iter_pages)。
+预取窗口等于域名并发上限，内存占用与总页数无关。
+预取任务提交到调度器的共享线程池；在池内线程中调用时就地执行 (逐页拉取)。
+拿不到 total 的接口退化为逐页顺序拉取。
+"""
+import asyncio
+import threading
+import weakref
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from app.lingxing_agent.core.config import (
+    DEFAULT_PAGE_CONCURRENCY,
+    PAGE_CONCURRENCY_PER_HOST,
+)
+from app.lingxing_agent.core.scheduler import get_scheduler
+
+PostFn = Callable[[str, Dict[str, Any]], Dict[str, Any]]
+AsyncPostFn = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+ExtractFn = Callable[[Dict[str, Any]], List[Dict[str, Any]]]
+
+# 各接口 total 字段所在位置不统一，按顺序尝试
+_TOTAL_KEYS = ("total", "totalCount", "total_count")
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+_async_host_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _host_limit(host: str) -> int:
+    return PAGE_CONCURRENCY_PER_HOST.get(host, DEFAULT_PAGE_CONCURRENCY)
+
+
+def _host_of(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = _host_of(url)
+    with _host_semaphores_lock:
+        sem = _host_semaphores.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(_host_limit(host))
+            _host_semaphores[host] = sem
+        return sem
+
+
+def _async_host_semaphore(url: str) -> asyncio.Semaphore:
+    host = _host_of(url)
+    per_loop = _async_host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    sem = per_loop.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(_host_limit(host))
+        per_loop[host] = sem
+    return sem
+
+
+def extract_total(data: Dict[str, Any]) -> Optional[int]:
+    """从第一页响应中读取总记录数 (顶层或 data 下)，读不到返回 None"""
+    for block in (data, data.get("data")):
+        if not isinstance(block, dict):
+            continue
+        for key in _TOTAL_KEYS:
+            value = block.get(key)
+            if value is None:
+                continue
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                continue
+    return None
+
+
+def _page_payload(json_data: Dict[str, Any], offset: int, length: int) -> Dict[str, Any]:
+    payload = dict(json_data)
+    payload["offset"] = offset
+    payload["length"] = length
+    return payload
+
+
+def iter_pages(
+    post: PostFn,
+    url: str,
+    json_data: Dict[str, Any],
+    extract: ExtractFn,
+    length: int = 200,
+) -> Iterator[List[Dict[str, Any]]]:
+    """按 offset 顺序逐页产出记录列表，后续页在后台并发预取"""
+    sem = _host_semaphore(url)
+
+    def fetch(offset: int) -> List[Dict[str, Any]]:
+        with sem:
+            return extract(post(url, _page_payload(json_data, offset, length)))
+
+    with sem:
+        first = post(url, _page_payload(json_data, 0, length))
+    page = extract(first)
+    yield page
+    if len(page) < length:
+        return
+
+    offset = length
+    total = extract_total(first)
+    if total is not None and total > length:
+        offsets = list(range(length, total, length))
+        remaining = iter(offsets)
+        scheduler = get_scheduler()
+        pending = deque(
+            scheduler.submit(fetch, o)
+            for o in islice(remaining, _host_limit(_host_of(url)))
+        )
+        try:
+            while pending:
+                page = pending.popleft().result()
+                next_offset = next(remaining, None)
+                if next_offset is not None:
+                    pending.append(scheduler.submit(fetch, next_offset))
+                yield page
+        finally:
+            # 调用方提前结束迭代时取消尚未开始的预取
+            for future in pending:
+                future.cancel()
+        # total 在拉取期间可能增长：最后一页仍是满页时继续顺序拉取
+        if len(page) < length:
+            return
+        offset = offsets[-1] + length
+
+    while True:
+        page = fetch(offset)
+        yield page
+        if len(page) < length:
+            break
+        offset += length
+
+
+def paginate(
+    post: PostFn,
+    url: str,
+    json_data: Dict[str, Any],
+    extract: ExtractFn,
+    length: int = 200,
+) -> List[Dict[str, Any]]:
+    """拉取全部分页并按 offset 顺序合并"""
+    all_data = []
+    for page in iter_pages(post, url, json_data, extract, length):
+        all_data.extend(page)
+    return all_data
+
+
+async def aiter_pages(
+    post: AsyncPostFn,
+    url: str,
+    json_data: Dict[str, Any],
+    extract: ExtractFn,
+    length: int = 200,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """iter_pages 的异步版本"""
+    sem = _async_host_semaphore(url)
+
+    async def fetch(offset: int) -> List[Dict[str, Any]]:
+        async with sem:
+            return extract(await post(url, _page_payload(json_data, offset, length)))
+
+    async with sem:
+        first = await post(url, _page_payload(json_data, 0, length))
+    page = extract(first)
+    yield page
+    if len(page) < length:
+        return
+
+    offset = length
+    total = extract_total(first)
+    if total is not None and total > length:
+        offsets = list(range(length, total, length))
+        remaining = iter(offsets)
+        pending = deque(
+            asyncio.ensure_future(fetch(o))
+            for o in islice(remaining, _host_limit(_host_of(url)))
+        )
+        try:
+            while pending:
+                page = await pending.popleft()
+                next_offset = next(remaining, None)
+                if next_offset is not None:
+                    pending.append(asyncio.ensure_future(fetch(next_offset)))
+                yield page
+        finally:
+            for task in pending:
+                task.cancel()
+        if len(page) < length:
+            return
+        offset = offsets[-1] + length
+
+    while True:
+        page = await fetch(offset)
+        yield page
+        if len(page) < length:
+            break
+        offset += length
+
+
+async def paginate_async(
+    post: AsyncPostFn,
+    url: str,
+    json_data: Dict[str, Any],
+    extract: ExtractFn,
+    length: int = 200,
+) -> List[Dict[str, Any]]:
+    """paginate 的异步版本"""
+    all_data = []
+    async for page in aiter_pages(post, url, json_data, extract, length):
+        all_data.extend(page)
+    return all_data
@@ -0,0 +1,281 @@
+"""
+进程级工具调度器
+
+所有发往领星的 HTTP 请求 (同步线程与协程) 都先在这里领取一个执行名额：
+- 全局并发上限 + 每个域名的并发上限，不论上层开了多少线程/任务
+- 名额按优先级分配：交互式单店/单品查询优先于 ALL 批量扫描
+- 同一优先级内按会话公平分配：在途请求少的会话先拿到名额
+- 记录排队等待时间，stats() 供排查
+
+工具层的扇出 (多店铺、多数据集) 通过 submit() 使用共享线程池，
+不再每次调用各自创建线程池。
+
+会话与优先级通过 contextvars 传递：
+
+    with scheduling(session_id, PRIORITY_BATCH):
+        ...
+"""
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.lingxing_agent.core.config import (
+    SCHEDULER_DEFAULT_HOST_LIMIT,
+    SCHEDULER_HOST_LIMITS,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_WORKERS,
+)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+_session_var: contextvars.ContextVar[str] = contextvars.ContextVar("lingxing_session", default="")
+_priority_var: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "lingxing_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def scheduling(session: Optional[str] = None, priority: Optional[int] = None):
+    """设置当前上下文 (线程 / 任务) 的会话与优先级"""
+    tokens = []
+    if session is not None:
+        tokens.append((_session_var, _session_var.set(session)))
+    if priority is not None:
+        tokens.append((_priority_var, _priority_var.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_session() -> str:
+    return _session_var.get()
+
+
+def current_priority() -> int:
+    return _priority_var.get()
+
+
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    绑定当前 contextvars，提交到其他线程池时会话与优先级不丢失。
+    同一个 Context 不能被并发进入，每次提交都要重新包装。
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+class _Waiter:
+    __slots__ = ("enqueued", "granted", "host", "priority", "seq", "session", "wake")
+
+    def __init__(self, host, session, priority, seq, wake):
+        self.host = host
+        self.session = session
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.wake = wake
+        self.granted = False
+
+
+class Scheduler:
+    """全局 / 按域名限流的请求名额分配器 (线程安全，同时支持线程与协程)"""
+
+    def __init__(
+        self,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+        host_limits: Optional[Dict[str, int]] = None,
+        default_host_limit: int = SCHEDULER_DEFAULT_HOST_LIMIT,
+        workers: int = SCHEDULER_WORKERS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.host_limits = dict(SCHEDULER_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_host_limit = default_host_limit
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiters: List[_Waiter] = []
+        self._running = 0
+        self._running_by_host: Dict[str, int] = {}
+        self._running_by_session: Dict[str, int] = {}
+        self._wait_stats: Dict[int, Dict[str, float]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker_local = threading.local()
+
+    # ---------- 名额分配 ----------
+    def _host_limit(self, host: str) -> int:
+        return self.host_limits.get(host, self.default_host_limit)
+
+    def _has_capacity(self, host: str) -> bool:
+        return (
+            self._running < self.max_concurrency
+            and self._running_by_host.get(host, 0) < self._host_limit(host)
+        )
+
+    def _grant(self, waiter: _Waiter):
+        self._running += 1
+        self._running_by_host[waiter.host] = self._running_by_host.get(waiter.host, 0) + 1
+        self._running_by_session[waiter.session] = self._running_by_session.get(waiter.session, 0) + 1
+        waiter.granted = True
+
+        waited = time.monotonic() - waiter.enqueued
+        stats = self._wait_stats.setdefault(
+            waiter.priority, {"granted": 0, "total_wait": 0.0, "max_wait": 0.0}
+        )
+        stats["granted"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def _dispatch(self) -> List[_Waiter]:
+        """按 (优先级, 会话在途数, 先来后到) 给有空余名额的等待者分配，返回被唤醒的等待者"""
+        granted = []
+        while self._waiters and self._running < self.max_concurrency:
+            candidates = [w for w in self._waiters if self._has_capacity(w.host)]
+            if not candidates:
+                break
+            waiter = min(
+                candidates,
+                key=lambda w: (w.priority, self._running_by_session.get(w.session, 0), w.seq),
+            )
+            self._waiters.remove(waiter)
+            self._grant(waiter)
+            granted.append(waiter)
+        return granted
+
+    def _enqueue(self, host: str, wake: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(host, current_session(), current_priority(), next(self._seq), wake)
+        with self._lock:
+            self._waiters.append(waiter)
+            granted = self._dispatch()
+        for other in granted:
+            if other is not waiter:
+                other.wake()
+        return waiter
+
+    def _release(self, waiter: _Waiter):
+        with self._lock:
+            self._running -= 1
+            self._running_by_host[waiter.host] -= 1
+            self._running_by_session[waiter.session] -= 1
+            if not self._running_by_session[waiter.session]:
+                del self._running_by_session[waiter.session]
+            granted = self._dispatch()
+        for other in granted:
+            other.wake()
+
+    def _abandon(self, waiter: _Waiter):
+        """等待中被取消：还在队列里就移除，已经拿到名额就归还"""
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+                return
+        self._release(waiter)
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).hostname or url
+
+    @contextmanager
+    def slot(self, url: str):
+        """同步代码领取一个请求名额 (阻塞直到分配)"""
+        event = threading.Event()
+        waiter = self._enqueue(self.host_of(url), event.set)
+        if not waiter.granted:
+            try:
+                event.wait()
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    @asynccontextmanager
+    async def aslot(self, url: str):
+        """协程领取一个请求名额；等待期间被取消会正确归还"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(self.host_of(url), wake)
+        if not waiter.granted:
+            try:
+                await future
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    # ---------- 共享线程池 ----------
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="lingxing-tool",
+                        initializer=self._mark_worker,
+                    )
+        return self._executor
+
+    def _mark_worker(self):
+        self._worker_local.is_worker = True
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        在共享线程池中执行 fn (带上当前会话与优先级)。
+        已经在池内线程中时直接同步执行，避免嵌套提交把线程池占满而死锁。
+        """
+        if getattr(self._worker_local, "is_worker", False):
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        return self._get_executor().submit(in_context(fn), *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self._running,
+                "queued": len(self._waiters),
+                "in_flight_by_host": {h: n for h, n in self._running_by_host.items() if n},
+                "sessions": len(self._running_by_session),
+                "wait": {
+                    priority: {
+                        "granted": s["granted"],
+                        "avg_wait": s["total_wait"] / s["granted"] if s["granted"] else 0.0,
+                        "max_wait": s["max_wait"],
+                    }
+                    for priority, s in self._wait_stats.items()
+                },
+            }
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """进程内共享的调度器"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
@@ -0,0 +1,133 @@
+"""
+请求合并 (single-flight)
+
+同一时刻完全相同的请求 (接口 + 规范化后的参数) 只向领星发一次，
+其余调用方等待并共享同一份结果 (或同一个异常)。
+共享的结果是同一个对象，调用方不应原地修改。
+"""
+import asyncio
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+def request_key(method: str, url: str, token: Optional[str], payload: Any = None) -> str:
+    """接口 + 规范化 payload (键排序) 组成的合并键"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"{method} {url} {token} {body}"
+
+
+class _Call:
+    __slots__ = ("error", "event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """线程版 single-flight"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    协程版 single-flight (按事件循环隔离)
+
+    上游调用在独立的 Task 中执行，发起方与跟随方都通过 shield 等待：
+    任何一方被取消 (例如某个计划到了截止时间) 都不会把 CancelledError 传给其他等待方；
+    只有全部等待方都取消后才取消上游调用。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        task = self._calls.get(loop_key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[loop_key] = task
+            self._waiters[loop_key] = 0
+            self.executed += 1
+
+            def done(_, loop_key=loop_key, task=task):
+                if self._calls.get(loop_key) is task:
+                    del self._calls[loop_key]
+                    del self._waiters[loop_key]
+
+            task.add_done_callback(done)
+
+        self._waiters[loop_key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._calls.get(loop_key) is task:
+                self._waiters[loop_key] -= 1
+                if not self._waiters[loop_key]:
+                    # 没人再等这个结果：移除后再取消，之后的相同请求会重新发起
+                    del self._calls[loop_key]
+                    del self._waiters[loop_key]
+                    task.cancel()
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+# 进程内共享：所有客户端实例的请求在这里合并
+request_flight = SingleFlight()
+async_request_flight = AsyncSingleFlight()
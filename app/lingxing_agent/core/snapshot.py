@@ -0,0 +1,216 @@
+"""
+已结算月份的利润报表快照
+
+过去月份的 /bd/profit/report/report/seller/list 结算后基本不再变化，
+这里把 get_profit_data 产出的按店铺聚合结果按月存入本地 SQLite，
+同比/环比查询直接读取快照，不再请求领星。
+
+月末之后 SNAPSHOT_SETTLEMENT_DAYS 天内数据仍可能调整，这段时间不写快照；
+结算日之前写入的行 (fetched_at 早于结算日) 读取时视为不存在，会重新拉取覆盖。
+
+回填历史数据：
+    python -m app.lingxing_agent.core.snapshot backfill --years 2
+"""
+import argparse
+import calendar
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.lingxing_agent.core.config import SNAPSHOT_DIR, SNAPSHOT_ENABLED, SNAPSHOT_SETTLEMENT_DAYS
+
+
+def month_range(year: int, month: int) -> Tuple[str, str]:
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day:02d}"
+
+
+def settled_at(year: int, month: int, lag_days: Optional[int] = None) -> datetime:
+    """月末 + 结算天数：此后该月数据视为不再变化"""
+    lag_days = SNAPSHOT_SETTLEMENT_DAYS if lag_days is None else lag_days
+    next_month = datetime(year + month // 12, month % 12 + 1, 1)
+    return next_month + timedelta(days=lag_days)
+
+
+def is_closed_month(year: int, month: int, now: Optional[datetime] = None,
+                    lag_days: Optional[int] = None) -> bool:
+    """月末之后超过结算天数的月份视为已结算"""
+    now = now or datetime.now()
+    return now >= settled_at(year, month, lag_days)
+
+
+class ProfitSnapshotStore:
+    """按 (年, 月) 保存各店铺利润汇总的 SQLite 存储 (线程安全)"""
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "profit_snapshots.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS profit_months (
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (year, month)
+            );
+            CREATE TABLE IF NOT EXISTS profit_stores (
+                year INTEGER NOT NULL,
+                month INTEGER NOT NULL,
+                store_name TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (year, month, store_name)
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(profit_stores)")}
+        if "fetched_at" not in columns:
+            # 旧库的行没有写入时间，按未结算处理 (读取时重新拉取)
+            self._conn.execute("ALTER TABLE profit_stores ADD COLUMN fetched_at REAL NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    @staticmethod
+    def _settled_ts(year: int, month: int) -> float:
+        return settled_at(year, month).timestamp()
+
+    def has_month(self, year: int, month: int) -> bool:
+        """该月是否有结算后写入的完整快照"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM profit_months WHERE year = ? AND month = ? AND fetched_at >= ?",
+                (year, month, self._settled_ts(year, month)),
+            ).fetchone()
+        return row is not None
+
+    def get_month(self, year: int, month: int) -> Optional[List[Dict[str, Any]]]:
+        """读取某月所有店铺的汇总；该月没有结算后的快照时返回 None"""
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM profit_months WHERE year = ? AND month = ? AND fetched_at >= ?",
+                (year, month, self._settled_ts(year, month)),
+            ).fetchone()
+            if known is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT data FROM profit_stores WHERE year = ? AND month = ? ORDER BY store_name",
+                (year, month),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def save_month(self, year: int, month: int, records: List[Dict[str, Any]]):
+        """整月替换写入 (一个事务内完成)"""
+        fetched_at = time.time()
+        rows = [
+            (year, month, record["storeName"], json.dumps(record, ensure_ascii=False), fetched_at)
+            for record in records
+            if record.get("storeName")
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM profit_stores WHERE year = ? AND month = ?", (year, month)
+            )
+            self._conn.executemany(
+                "INSERT INTO profit_stores (year, month, store_name, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profit_months (year, month, fetched_at) VALUES (?, ?, ?)",
+                (year, month, fetched_at),
+            )
+
+    def get_store(self, year: int, month: int, store_name: str) -> Optional[Dict[str, Any]]:
+        """读取单个店铺某月的汇总 (按店铺拉取时写入的行同样可读，结算前写入的行不算)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM profit_stores"
+                " WHERE year = ? AND month = ? AND store_name = ? AND fetched_at >= ?",
+                (year, month, store_name, self._settled_ts(year, month)),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_store(self, year: int, month: int, record: Dict[str, Any]):
+        """写入单个店铺的汇总，不把该月标记为完整快照"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profit_stores (year, month, store_name, data, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (year, month, record["storeName"], json.dumps(record, ensure_ascii=False), time.time()),
+            )
+
+    def months(self) -> List[Tuple[int, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT year, month FROM profit_months ORDER BY year, month"
+            ).fetchall()
+        return [(y, m) for y, m in rows]
+
+
+_snapshot_store: Optional[ProfitSnapshotStore] = None
+_snapshot_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> Optional[ProfitSnapshotStore]:
+    """进程内共享的快照存储；LINGXING_SNAPSHOT_ENABLED=0 时返回 None"""
+    global _snapshot_store
+    if not SNAPSHOT_ENABLED:
+        return None
+    if _snapshot_store is None:
+        with _snapshot_store_lock:
+            if _snapshot_store is None:
+                _snapshot_store = ProfitSnapshotStore()
+    return _snapshot_store
+
+
+def closed_months(years: int, now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """当前月之前的最近 years 年中已结算的 (年, 月)，从旧到新"""
+    now = now or datetime.now()
+    result = []
+    year, month = now.year, now.month
+    for _ in range(years * 12):
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+        if is_closed_month(year, month, now):
+            result.append((year, month))
+    return list(reversed(result))
+
+
+def backfill(client, store: ProfitSnapshotStore, years: int, force: bool = False,
+             now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """把最近 years 年已结算月份的利润汇总写入快照，返回本次写入的月份"""
+    loaded = []
+    for year, month in closed_months(years, now):
+        if not force and store.has_month(year, month):
+            continue
+        start_date, end_date = month_range(year, month)
+        # 绕过响应缓存：结算期内缓存的响应不能当作结算后的数据写入
+        store.save_month(year, month, client.get_profit_data(start_date, end_date, use_cache=False))
+        loaded.append((year, month))
+        print(f"[snapshot] {year}-{month:02d} saved")
+    return loaded
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="领星利润报表快照")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fill = sub.add_parser("backfill", help="回填最近 N 年已结算月份")
+    fill.add_argument("--years", type=int, default=2)
+    fill.add_argument("--force", action="store_true", help="已有快照的月份也重新拉取")
+    fill.add_argument("--dir", default=SNAPSHOT_DIR, help="快照目录")
+    args = parser.parse_args(argv)
+
+    from app.lingxing_agent.core.client import LingXingClient
+
+    store = ProfitSnapshotStore(args.dir)
+    loaded = backfill(LingXingClient(), store, args.years, force=args.force)
+    print(f"[snapshot] {len(loaded)} month(s) loaded into {store.path}")
+
+
+if __name__ == "__main__":
+    main()
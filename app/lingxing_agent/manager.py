@@ -3,22 +3,45 @@
 
 架构：
 1. PlannerAgent - 解析用户请求，输出精确的工具调用计划
-2. Executor Tool - 纯代码执行器，根据计划调用对应工具
+2. QueryPlanExecutorAgent - 纯代码执行器 (不调用模型)，根据计划调用对应工具
 3. AnalystAgent - 分析整合数据
 4. ReporterAgent - 最终汇总
 """
+from typing import AsyncGenerator
+
 from google.genai import types
-from google.adk.agents import Agent, SequentialAgent
+from google.adk.agents import Agent, BaseAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
 from google.adk.models import Gemini
 from google.adk.planners import BuiltInPlanner
 from google.genai.types import ThinkingConfig
 from datetime import datetime, timedelta
 
+from app.lingxing_agent.core.config import DEFAULT_TOOL_TIMEOUT, PLAN_DEADLINE, TOOL_TIMEOUTS
+from app.lingxing_agent.core.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, scheduling
 from app.lingxing_agent.workers.analyst_worker import analyst_worker
-from app.lingxing_agent.tools.product_tools import check_product_status, get_product_performance
-from app.lingxing_agent.tools.shop_tools import analyze_store, get_available_stores
+from app.lingxing_agent.tools.product_tools import (
+    check_product_status_async,
+    check_products_status_async,
+    get_product_performance_async,
+    get_products_performance_async,
+)
+from app.lingxing_agent.tools.metrics import analyze_stores_async as _analyze_stores_async_impl
+from app.lingxing_agent.tools.shop_tools import (
+    _batch_summary,
+    _is_batch_query,
+    _match_batch_stores,
+    analyze_store_async,
+    get_available_stores,
+)
+import asyncio
 import json
-from concurrent.futures import ThreadPoolExecutor
+import re
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Optional
 
 
 def get_current_date_info():
@@ -44,41 +67,197 @@ def get_current_date_info():
 
 
 # ================= 工具注册表 =================
+# 有异步版本的工具直接用协程 (超时/截止时可真正取消上游请求)，其余在线程中执行
 TOOL_REGISTRY = {
-    "analyze_store": analyze_store,
+    "analyze_store": analyze_store_async,
     "get_available_stores": get_available_stores,
-    "check_product_status": check_product_status,
-    "get_product_performance": get_product_performance,
+    "check_product_status": check_product_status_async,
+    "check_products_status": check_products_status_async,
+    "get_product_performance": get_product_performance_async,
+    "get_products_performance": get_products_performance_async,
 }
 
 
-def _run_tool_safe(tool_name: str, params: dict) -> dict:
-    """辅助函数：安全执行工具并捕获异常"""
-    if not tool_name:
-        return {"error": "缺少 tool 字段"}
-    
-    if tool_name not in TOOL_REGISTRY:
-        return {"error": f"未知工具: {tool_name}"}
-        
+async def _invoke(func, params: dict):
+    if asyncio.iscoroutinefunction(func):
+        return await func(**params)
+    return await asyncio.to_thread(func, **params)
+
+
+# ================= 查询计划优化 =================
+class PlannedCall:
+    """优化后实际执行的一次调用，targets 记录结果要拆回原计划中的哪些查询"""
+
+    def __init__(self, tool_name: str, params: dict, func=None, priority: int = PRIORITY_INTERACTIVE):
+        self.tool_name = tool_name
+        self.params = params
+        self.func = func  # None 表示按 TOOL_REGISTRY 调用
+        self.priority = priority  # 全局调度器中的请求优先级
+        self.targets = []  # [(原查询序号, 拆分函数 或 None 表示原样返回)]
+
+
+def _query_key(tool_name, params) -> str:
+    return json.dumps([tool_name, params], sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _only_params(params: dict, required: str, allowed: set) -> bool:
+    return isinstance(params, dict) and required in params and set(params) <= allowed
+
+
+def _split_store(store_name, outcomes):
+    if _is_batch_query(store_name):
+        return _batch_summary(store_name, _match_batch_stores(store_name), outcomes)
+    return outcomes.get(store_name)
+
+
+def _split_performance(mskus, single, results):
+    if single:
+        return results.get(mskus[0])
+    return {msku: results.get(msku) for msku in mskus}
+
+
+def _query_priority(tool_name, params) -> int:
+    """ALL 批量店铺分析与批量产品状态属于批量扫描，其余为交互式查询"""
+    if tool_name == "check_products_status":
+        return PRIORITY_BATCH
+    if tool_name == "analyze_store" and isinstance(params, dict) and _is_batch_query(params.get("store_name", "")):
+        return PRIORITY_BATCH
+    return PRIORITY_INTERACTIVE
+
+
+def optimize_query_plan(queries: list) -> list:
+    """
+    把 Planner 的查询列表改写为尽量少的实际调用：
+    1. 完全相同的查询只执行一次
+    2. 同一 (year, month) 的多个 analyze_store 合并为一次 analyze_stores，共享整月数据
+    3. 同一日期范围的 get_product(s)_performance 合并为一次批量查询
+    """
+    calls, by_key = [], {}
+    store_groups = defaultdict(list)  # (year, month) -> [(序号, store_name)]
+    perf_groups = defaultdict(list)   # (start_date, end_date) -> [(序号, mskus, 是否单个)]
+
+    def add_call(index, tool_name, params):
+        key = _query_key(tool_name, params)
+        if key not in by_key:
+            by_key[key] = PlannedCall(tool_name, params, priority=_query_priority(tool_name, params))
+            calls.append(by_key[key])
+        by_key[key].targets.append((index, None))
+
+    for index, query in enumerate(queries):
+        tool_name = query.get("tool")
+        params = query.get("params", {})
+        if tool_name == "analyze_store" and _only_params(params, "store_name", {"store_name", "year", "month"}):
+            store_groups[(params.get("year"), params.get("month"))].append((index, params["store_name"]))
+        elif tool_name == "get_product_performance" and _only_params(params, "msku", {"msku", "start_date", "end_date"}):
+            perf_groups[(params.get("start_date"), params.get("end_date"))].append((index, [params["msku"]], True))
+        elif tool_name == "get_products_performance" and _only_params(params, "mskus", {"mskus", "start_date", "end_date"}):
+            perf_groups[(params.get("start_date"), params.get("end_date"))].append((index, list(params["mskus"]), False))
+        else:
+            add_call(index, tool_name, params)
+
+    for (year, month), members in store_groups.items():
+        if len({name for _, name in members}) < 2:
+            for index, _ in members:
+                add_call(index, "analyze_store", queries[index].get("params", {}))
+            continue
+        stores = []
+        for _, name in members:
+            for store in (_match_batch_stores(name) if _is_batch_query(name) else [name]):
+                if store not in stores:
+                    stores.append(store)
+        sweep = any(_is_batch_query(name) for _, name in members)
+        call = PlannedCall(
+            "analyze_stores",
+            {"store_names": stores, "year": year, "month": month},
+            _analyze_stores_async_impl,
+            PRIORITY_BATCH if sweep else PRIORITY_INTERACTIVE,
+        )
+        call.targets = [(index, partial(_split_store, name)) for index, name in members]
+        calls.append(call)
+
+    for (start_date, end_date), members in perf_groups.items():
+        if len({_query_key(None, mskus) for _, mskus, _ in members}) < 2:
+            for index, _, _ in members:
+                add_call(index, queries[index].get("tool"), queries[index].get("params", {}))
+            continue
+        mskus = list(dict.fromkeys(msku for _, batch, _ in members for msku in batch))
+        call = PlannedCall(
+            "get_products_performance",
+            {"mskus": mskus, "start_date": start_date, "end_date": end_date},
+            get_products_performance_async,
+        )
+        call.targets = [(index, partial(_split_performance, batch, single)) for index, batch, single in members]
+        calls.append(call)
+
+    return calls
+
+
+def _tool_timeout(tool_name) -> float:
+    return TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+
+
+_CANCELLED_OUTCOME = {"error": "工具调用被取消", "timed_out": True}
+
+# 能在时间预算内返回部分结果的工具：预算 (留出余量) 作为 timeout 参数传入，
+# 工具先于外层超时返回已完成的部分，而不是整体被替换为超时错误
+PARTIAL_RESULT_TOOLS = {"check_products_status"}
+_PARTIAL_MARGIN = 2.0
+
+
+def _call_params(call: PlannedCall, timeout: float, deadline_at: Optional[float]) -> dict:
+    if call.tool_name not in PARTIAL_RESULT_TOOLS:
+        return call.params
+    budget = timeout if deadline_at is None else min(timeout, deadline_at - time.monotonic())
+    return {**call.params, "timeout": max(budget - _PARTIAL_MARGIN, budget / 2, 0.01)}
+
+
+async def _run_planned_call(call: PlannedCall, deadline_at: Optional[float] = None) -> dict:
+    """执行一次调用，返回 {"result": ...} 或 {"error": ..., 可能带 "timed_out"}"""
+    func = call.func
+    if func is None:
+        if not call.tool_name:
+            return {"error": "缺少 tool 字段"}
+        if call.tool_name not in TOOL_REGISTRY:
+            return {"error": f"未知工具: {call.tool_name}"}
+        func = TOOL_REGISTRY[call.tool_name]
+
+    timeout = _tool_timeout(call.tool_name)
     try:
-        tool_func = TOOL_REGISTRY[tool_name]
-        result = tool_func(**params)
-        return {
-            "tool": tool_name,
-            "params": params,
-            "result": result
-        }
+        with scheduling(priority=call.priority):
+            params = _call_params(call, timeout, deadline_at)
+            return {"result": await asyncio.wait_for(_invoke(func, params), timeout)}
+    except asyncio.TimeoutError:
+        return {"error": f"工具执行超时 ({timeout:g}s)", "timed_out": True}
+    except asyncio.CancelledError:
+        # 本任务被取消 (计划截止) 时照常传播；工具内部抛出的取消只影响这一条查询
+        task = asyncio.current_task()
+        if task is not None and getattr(task, "cancelling", lambda: 0)():
+            raise
+        return _CANCELLED_OUTCOME
     except Exception as e:
-        return {
-            "tool": tool_name,
-            "params": params,
-            "error": str(e)
-        }
+        return {"error": str(e)}
+
 
+def _fan_out(queries: list, call: PlannedCall, outcome: dict, results: list):
+    """把一次调用的结果按原查询的 tool / params 拆回各自位置"""
+    for index, split in call.targets:
+        query = queries[index]
+        entry = {"tool": query.get("tool"), "params": query.get("params", {})}
+        if "error" in outcome:
+            entry.update(outcome)
+        else:
+            entry["result"] = outcome["result"] if split is None else split(outcome["result"])
+        results[index] = entry
 
-def execute_query_plan(query_plan_json: str) -> dict:
+
+async def execute_query_plan_async(query_plan_json: str, deadline: Optional[float] = None) -> dict:
     """
-    通用执行器：解析 PlannerAgent 生成的 JSON 计划，并发调用所有工具。
+    通用执行器：解析 PlannerAgent 生成的 JSON 计划，合并/去重后并发调用所有工具，
+    结果按原计划顺序返回。
+
+    每个工具有各自的超时 (TOOL_TIMEOUTS)，整个计划有总截止时间 (deadline 秒，
+    默认 PLAN_DEADLINE)。到期未完成的调用会被取消，对应结果标记 timed_out，
+    已完成的部分照常返回。
     """
     try:
         # 1. 解析 JSON
@@ -88,29 +267,48 @@ def execute_query_plan(query_plan_json: str) -> dict:
         if not queries:
             return {"error": "查询计划为空", "raw_plan": query_plan_json}
         
-        # 2. 并发执行所有查询
-        results = []
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = []
-            for query in queries:
-                tool_name = query.get("tool")
-                params = query.get("params", {})
-                futures.append(executor.submit(_run_tool_safe, tool_name, params))
-            
-            # 按顺序获取结果
-            for f in futures:
-                results.append(f.result())
+        # 2. 合并可共享数据的查询，再并发执行
+        deadline = PLAN_DEADLINE if deadline is None else deadline
+        started = time.monotonic()
+        calls = optimize_query_plan(queries)
+        deadline_at = started + deadline
+        tasks = [asyncio.create_task(_run_planned_call(call, deadline_at)) for call in calls]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        # 3. 截止时间到：取消仍在进行的调用 (连带取消其上游 HTTP 请求)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # 4. 按原查询顺序拆回结果
+        results = [None] * len(queries)
+        for call, task in zip(calls, tasks, strict=True):
+            if task in done and task.cancelled():
+                outcome = _CANCELLED_OUTCOME
+            elif task in done:
+                outcome = task.result()
+            else:
+                outcome = {"error": f"超过查询计划截止时间 ({deadline:g}s)，已取消", "timed_out": True}
+            _fan_out(queries, call, outcome, results)
         
         return {
             "task_type": plan.get("task_type", "unknown"),
             "analysis_needed": plan.get("analysis_needed", False),
-            "results": results
+            "results": results,
+            "elapsed": round(time.monotonic() - started, 3),
+            "timed_out": sum(1 for r in results if r.get("timed_out")),
         }
         
     except json.JSONDecodeError as e:
         return {"error": f"JSON 解析失败: {str(e)}", "raw_input": query_plan_json}
 
 
+def execute_query_plan(query_plan_json: str, deadline: Optional[float] = None) -> dict:
+    """execute_query_plan_async 的同步入口 (不能在运行中的事件循环里调用)"""
+    return asyncio.run(execute_query_plan_async(query_plan_json, deadline))
+
+
 # ================= 1. 任务规划器（详细提示词）=================
 PLANNER_INSTRUCTION = """你是领星 ERP 智能任务规划器。
 
@@ -172,6 +370,33 @@ PLANNER_INSTRUCTION = """你是领星 ERP 智能任务规划器。
 
 ---
 
+### 4. `get_products_performance` - 多产品销售表现 (批量)
+**用途**：一次查询多个 MSKU 在同一时间段的销售表现
+**适用场景**：
+- "对比 A、B、C 三个产品上月销量"
+- 需要查询 2 个及以上 MSKU、且时间段相同时，**必须**用这个工具合并成一个查询
+**参数**：
+- `mskus` (必填): MSKU 列表，如 ["YW19-VS059-Brown-fba", "YW19-VS059-Black-fba"]
+- `start_date` (必填): 开始日期，格式 "YYYY-MM-DD"
+- `end_date` (必填): 结束日期，格式 "YYYY-MM-DD"
+
+**返回数据**：以 MSKU 为键的字典，每个值同 get_product_performance
+
+---
+
+### 5. `check_products_status` - 多产品状态查询 (批量)
+**用途**：一次查询多个 MSKU 的采购、到货、首发/借调状态
+**适用场景**：
+- "这批新品 (列出多个 MSKU) 都到货了吗"
+- 需要查询 2 个及以上 MSKU 的状态时，**必须**用这个工具合并成一个查询
+**参数**：
+- `mskus` (必填): MSKU 列表
+- `store_name` (可选): 店铺名，不确定可以留空 ""
+
+**返回数据**：表格 (columns / rows) 与各状态数量 summary
+
+---
+
 ## 实体识别规则
 
 **店铺名格式**：`品牌-站点`
@@ -259,8 +484,7 @@ PLANNER_INSTRUCTION = """你是领星 ERP 智能任务规划器。
 {
   "task_type": "comparison",
   "queries": [
-    {"tool": "get_product_performance", "params": {"msku": "YW19-VS059-Brown-fba", "start_date": "2024-12-01", "end_date": "2024-12-31"}},
-    {"tool": "get_product_performance", "params": {"msku": "YW19-VS059-Black-fba", "start_date": "2024-12-01", "end_date": "2024-12-31"}}
+    {"tool": "get_products_performance", "params": {"mskus": ["YW19-VS059-Brown-fba", "YW19-VS059-Black-fba"], "start_date": "2024-12-01", "end_date": "2024-12-31"}}
   ],
   "analysis_needed": true
 }
@@ -282,7 +506,7 @@ PLANNER_INSTRUCTION = """你是领星 ERP 智能任务规划器。
 
 ## 注意事项
 1. **只输出 JSON**，不要有任何前缀或后缀文字
-2. **参数名必须精确**：store_name、year、month、msku、start_date、end_date
+2. **参数名必须精确**：store_name、year、month、msku、mskus、start_date、end_date
 3. **日期比较任务**必须设置 analysis_needed=true
 4. **如果信息不足**，尽量推断合理默认值
 """
@@ -331,24 +555,46 @@ planner_agent = Agent(
 
 
 # ================= 2. 数据执行器 Agent =================
-executor_agent = Agent(
-    name="executor_agent",
-    model=Gemini(
-        model="gemini-2.0-flash",
-        generate_content_config=types.GenerateContentConfig(
-            temperature=0.0,
-            http_options=types.HttpOptions(timeout=120)
+_JSON_FENCE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+def _plan_text(query_plan) -> str:
+    """Planner 的输出可能带 ```json 代码块，也可能已经是 dict"""
+    if isinstance(query_plan, (dict, list)):
+        return json.dumps(query_plan, ensure_ascii=False)
+    text = str(query_plan or "")
+    match = _JSON_FENCE.match(text)
+    return match.group(1) if match else text.strip()
+
+
+class QueryPlanExecutorAgent(BaseAgent):
+    """
+    从 session.state["query_plan"] 读取计划，直接调用 execute_query_plan_async，
+    结果写入 state["execution_results"]，并作为本步的消息供后续分析 Agent 读取。
+    不经过模型，省去一次 LLM 往返。
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        plan_text = _plan_text(ctx.session.state.get("query_plan"))
+        # 同一会话的请求在全局调度器中按会话公平分配
+        with scheduling(session=ctx.session.id):
+            results = await execute_query_plan_async(plan_text)
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(
+                role="model",
+                parts=[types.Part(text=json.dumps(results, ensure_ascii=False, default=str))],
+            ),
+            actions=EventActions(state_delta={"execution_results": results}),
         )
-    ),
-    instruction="""你是数据执行器。
 
-你会看到之前 planner_agent 生成的 query_plan（JSON 格式）。
-调用 execute_query_plan 工具，将 query_plan 作为参数传入。
 
-直接调用工具，不要做任何额外解释。
-""",
-    tools=[execute_query_plan],
-    output_key="execution_results",
+executor_agent = QueryPlanExecutorAgent(
+    name="executor_agent",
+    description="按 query_plan 执行工具调用 (无 LLM)",
 )
 
 
@@ -1,13 +1,60 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from collections import defaultdict
+from concurrent.futures import as_completed
+from app.lingxing_agent.core.async_client import AsyncLingXingClient
 from app.lingxing_agent.core.client import LingXingClient
-from app.lingxing_agent.core.config import get_store_id, PROJECT_SID, PROJECT_WID
+from app.lingxing_agent.core.config import PROJECT_SID, PROJECT_WID
+from app.lingxing_agent.core.scheduler import get_scheduler
+from app.lingxing_agent.core.snapshot import (
+    ProfitSnapshotStore,
+    get_snapshot_store,
+    is_closed_month,
+)
+
+
+class MonthDataContext:
+    """
+    某个月份的全公司数据集 (批量分析共享)
+
+    利润报表、采购计划、发货计划、FBA出库各拉取一次，
+    按店铺字段 (storeName / seller_name / sname / store_name) 建立索引，
+    之后每个店铺的指标都只是字典查找。
+    """
+
+    def __init__(
+        self,
+        year: int,
+        month: int,
+        profit_by_store: Dict[str, Dict[str, Any]],
+        purchase_qty: Dict[str, int],
+        delivery_qty: Dict[str, int],
+        fba_out_qty: Dict[str, int],
+    ):
+        self.year = year
+        self.month = month
+        self.profit_by_store = profit_by_store
+        self.purchase_qty = purchase_qty
+        self.delivery_qty = delivery_qty
+        self.fba_out_qty = fba_out_qty
+
+    @classmethod
+    def from_datasets(cls, year, month, profit_data_list, purchase_data, delivery_data, fba_out_data):
+        return cls(
+            year,
+            month,
+            {item.get("storeName"): item for item in profit_data_list},
+            LingXingMetricsService._index_purchase_qty(purchase_data),
+            LingXingMetricsService._index_delivery_qty(delivery_data),
+            LingXingMetricsService._index_fba_out_qty(fba_out_data),
+        )
 
 
 class LingXingMetricsService:
-    def __init__(self, client: LingXingClient):
+    def __init__(self, client: LingXingClient, snapshot: Optional[ProfitSnapshotStore] = None):
         self.client = client
+        self.snapshot = snapshot or get_snapshot_store()
 
     def _get_month_range(self, year: int, month: int):
         start_date = f"{year}-{month:02d}-01"
@@ -23,49 +70,87 @@ class LingXingMetricsService:
         end_date = (next_month_first - timedelta(days=1)).strftime("%Y-%m-%d")
         return start_date, end_date
 
-    def get_store_cost_structure(
-        self, store_name: str, year: int, month: int
-    ) -> Dict[str, Any]:
-        """获取指定店铺、月份的成本结构分析"""
-        start_date, end_date = self._get_month_range(year, month)
+    def _snapshot_writable(self, year: int, month: int) -> bool:
+        """
+        该月拉取的数据是否会写入快照。
+        写快照的数据必须绕过响应缓存：结算期内缓存的旧响应会被当成结算后的数据永久保存
+        """
+        return self.snapshot is not None and is_closed_month(year, month)
 
-        # 1. 统一店名匹配 (Handle fuzzy matching once at the start)
-        canonical_store_name = None
+    def _snapshot_month(self, year: int, month: int):
+        """已结算月份优先读本地快照，未命中返回 None"""
+        if not self._snapshot_writable(year, month):
+            return None
+        return self.snapshot.get_month(year, month)
+
+    def _save_snapshot_month(self, year: int, month: int, profit_data_list):
+        if self._snapshot_writable(year, month):
+            self.snapshot.save_month(year, month, profit_data_list)
+
+    def _load_profit_data(self, year: int, month: int, start_date: str, end_date: str):
+        profit_data_list = self._snapshot_month(year, month)
+        if profit_data_list is None:
+            profit_data_list = self.client.get_profit_data(
+                start_date, end_date, use_cache=not self._snapshot_writable(year, month)
+            )
+            self._save_snapshot_month(year, month, profit_data_list)
+        return profit_data_list
+
+    def _snapshot_store_profit(self, year: int, month: int, canonical_store_name: str):
+        if not self._snapshot_writable(year, month):
+            return None
+        store_data = self.snapshot.get_store(year, month, canonical_store_name)
+        if store_data is None and self.snapshot.has_month(year, month):
+            # 完整快照里没有该店铺：该月确实无数据
+            return {}
+        return store_data
+
+    def _save_snapshot_store(self, year: int, month: int, store_data):
+        if store_data and self._snapshot_writable(year, month):
+            self.snapshot.save_store(year, month, store_data)
+
+    def _load_store_profit(
+        self, year: int, month: int, start_date: str, end_date: str, canonical_store_name: str
+    ):
+        """单店利润：快照优先，否则只拉取该店铺 (sids 过滤) 的报表行"""
+        store_data = self._snapshot_store_profit(year, month, canonical_store_name)
+        if store_data is not None:
+            return store_data
+        sid = PROJECT_SID.get(canonical_store_name)
+        if not sid:
+            return self._find_store_profit(
+                self._load_profit_data(year, month, start_date, end_date), canonical_store_name
+            )
+        profit_data_list = self.client.get_profit_data(
+            start_date, end_date, sids=[sid], use_cache=not self._snapshot_writable(year, month)
+        )
+        store_data = self._find_store_profit(profit_data_list, canonical_store_name)
+        self._save_snapshot_store(year, month, store_data)
+        return store_data
+
+    @staticmethod
+    def _resolve_store_name(store_name: str) -> Optional[str]:
+        """统一店名匹配：先精确匹配，再模糊匹配"""
         for name in PROJECT_SID:
             if store_name == name:
-                canonical_store_name = name
-                break
-        if not canonical_store_name:
-            for name in PROJECT_SID:
-                if store_name.upper() in name.upper():
-                    canonical_store_name = name
-                    break
-        
-        if not canonical_store_name:
-            return {"error": f"Store {store_name} not found in configuration"}
+                return name
+        for name in PROJECT_SID:
+            if store_name.upper() in name.upper():
+                return name
+        return None
 
-        sid = PROJECT_SID[canonical_store_name]
-        
-        # 1. 获取利润报表数据 (Aggregation is done in client for all stores, we filter here)
-        # Note: Optimization possible by filtering in client if API supported it, but API takes list of SIDs.
-        # We can pass specific SID to client if we want.
-        # Client method fetches for ALL stores currently because I didn't expose SID filter in `get_profit_data` properly?
-        # Let's check client.py. I passed `sids=[]` in get_profit_data.
-        # Ideally I should allow passing SID to get_profit_data to reduce data load.
-        # But for now, let's assume we fetch all and filter, or I update client.py later.
-        # Actually, let's update client.py to accept sids later if needed.
-        # For now, fetching all is fine for the scale (20 stores).
-
-        profit_data_list = self.client.get_profit_data(start_date, end_date)
-        store_data = next(
+    @staticmethod
+    def _find_store_profit(profit_data_list: List[Dict[str, Any]], canonical_store_name: str):
+        return next(
             (item for item in profit_data_list if item.get("storeName") == canonical_store_name),
             None,
         )
 
-        if not store_data:
-            return {"error": f"No profit data found for {canonical_store_name} in {year}-{month}"}
-
-        # Calculate Metrics
+    @staticmethod
+    def _build_profit_metrics(
+        store_data: Dict[str, Any], store_name: str, year: int, month: int
+    ) -> Dict[str, Any]:
+        """根据利润报表计算 GMV 与各项成本率 (百分比字符串)"""
         total_amount_origin = (
             store_data.get("totalFbaAndFbmAmount", 0)
             + store_data.get("shippingCredits", 0)
@@ -128,60 +213,64 @@ class LingXingMetricsService:
             )
 
         # Format as percentages for readability
-        formatted_metrics = {
+        return {
             k: f"{v * 100:.2f}%" if "rate" in k else v for k, v in metrics.items()
         }
 
-        # 2. Get Logistics Data (Simplified for single store)
-        # Purchase Plan
-        purchase_data = self.client.get_purchase_plan(start_date, end_date)
-        purchase_qty = 0
+    @staticmethod
+    def _index_purchase_qty(purchase_data) -> Dict[str, int]:
+        """按 seller_name 汇总采购计划数量"""
+        index = defaultdict(int)
         for order in purchase_data:
             for item in order.get("items", []):
-                if item.get("seller_name") == store_name:
-                    purchase_qty += item.get("quantity_plan", 0)
-        formatted_metrics["purchase_plan_qty"] = purchase_qty
+                index[item.get("seller_name")] += item.get("quantity_plan", 0)
+        return index
 
-        # Delivery Plan
-        delivery_data = self.client.get_delivery_plan(start_date, end_date)
-        delivery_qty = 0
+    @staticmethod
+    def _index_delivery_qty(delivery_data) -> Dict[str, int]:
+        """按 sname 汇总发货计划数量"""
+        index = defaultdict(int)
         for record in delivery_data:
             for item in record.get("list", []):
-                if item.get("sname") == canonical_store_name:
-                    try:
-                        delivery_qty += int(item.get("shipment_plan_quantity", 0))
-                    except:
-                        pass
-        formatted_metrics["delivery_plan_qty"] = delivery_qty
+                try:
+                    index[item.get("sname")] += int(item.get("shipment_plan_quantity", 0))
+                except:
+                    pass
+        return index
 
-        # FBA Out
-        fba_out_data = self.client.get_fba_out(start_date, end_date)
-        fba_out_qty = 0
+    @staticmethod
+    def _index_fba_out_qty(fba_out_data) -> Dict[str, int]:
+        """按 store_name 汇总 FBA 实际出库数量"""
+        index = defaultdict(int)
         for record in fba_out_data:
-            if (
-                record.get("type_name") in ["FBA出库", "FBAM出库"]
-                and record.get("store_name") == canonical_store_name
-            ):
-                fba_out_qty += abs(record.get("good_lock_num", 0))
-        formatted_metrics["fba_actual_out_qty"] = fba_out_qty
+            if record.get("type_name") in ["FBA出库", "FBAM出库"]:
+                index[record.get("store_name")] += abs(record.get("good_lock_num", 0))
+        return index
 
-        # 3. Inventory Turnover
-        # FBA
+    @classmethod
+    def _sum_purchase_qty(cls, purchase_data, store_name: str) -> int:
+        return cls._index_purchase_qty(purchase_data).get(store_name, 0)
+
+    @classmethod
+    def _sum_delivery_qty(cls, delivery_data, canonical_store_name: str) -> int:
+        return cls._index_delivery_qty(delivery_data).get(canonical_store_name, 0)
+
+    @classmethod
+    def _sum_fba_out_qty(cls, fba_out_data, canonical_store_name: str) -> int:
+        return cls._index_fba_out_qty(fba_out_data).get(canonical_store_name, 0)
+
+    @staticmethod
+    def _apply_inventory_metrics(formatted_metrics, fba_inv, local_inv):
+        """写入 FBA / 本地库存周转天数"""
         # FBA
-        wid = PROJECT_WID.get(canonical_store_name)
-        if wid:
-            fba_inv = self.client.get_fba_inventory(
-                f"{year}-{month:02d}", f"{year}-{month:02d}", wid
-            )
+        if fba_inv is not None:
             # Safe travel into nested dict
             summary = fba_inv.get("data", {}).get("summaryInfo")
             if isinstance(summary, dict):
                 formatted_metrics["fba_turnover_days"] = summary.get("inventoryTurnoverDays", 0)
 
         # Local
-        sid_id = PROJECT_SID.get(canonical_store_name)
-        if sid_id:
-            local_inv = self.client.get_local_inventory(start_date, end_date, sid_id)
+        if local_inv is not None:
             # Safe travel into nested dict and ensure data is not None
             data = local_inv.get("data")
             if isinstance(data, dict):
@@ -189,16 +278,300 @@ class LingXingMetricsService:
                 if isinstance(total_info, dict):
                     formatted_metrics["local_turnover_days"] = total_info.get("rotation_day", 0)
 
+    def get_store_cost_structure(
+        self, store_name: str, year: int, month: int
+    ) -> Dict[str, Any]:
+        """获取指定店铺、月份的成本结构分析"""
+        start_date, end_date = self._get_month_range(year, month)
+
+        # 1. 统一店名匹配 (Handle fuzzy matching once at the start)
+        canonical_store_name = self._resolve_store_name(store_name)
+        if not canonical_store_name:
+            return {"error": f"Store {store_name} not found in configuration"}
+
+        # 1. 利润报表：只请求该店铺的行
+        store_data = self._load_store_profit(year, month, start_date, end_date, canonical_store_name)
+
+        if not store_data:
+            return {"error": f"No profit data found for {canonical_store_name} in {year}-{month}"}
+
+        formatted_metrics = self._build_profit_metrics(store_data, store_name, year, month)
+
+        # 2. Get Logistics Data (Simplified for single store)
+        # 流式累加：边拉取边统计，不在内存中保留整月明细
+        # Purchase Plan
+        sid_id = PROJECT_SID.get(canonical_store_name)
+        store_sids = [sid_id] if sid_id else None
+        purchase_data = self.client.iter_purchase_plan(start_date, end_date, store_sids)
+        formatted_metrics["purchase_plan_qty"] = self._sum_purchase_qty(purchase_data, store_name)
+
+        # Delivery Plan
+        delivery_data = self.client.iter_delivery_plan(start_date, end_date)
+        formatted_metrics["delivery_plan_qty"] = self._sum_delivery_qty(
+            delivery_data, canonical_store_name
+        )
+
+        # FBA Out
+        fba_out_data = self.client.iter_fba_out(start_date, end_date)
+        formatted_metrics["fba_actual_out_qty"] = self._sum_fba_out_qty(
+            fba_out_data, canonical_store_name
+        )
+
+        # 3. Inventory Turnover
+        wid = PROJECT_WID.get(canonical_store_name)
+        fba_inv = None
+        if wid:
+            fba_inv = self.client.get_fba_inventory(
+                f"{year}-{month:02d}", f"{year}-{month:02d}", wid
+            )
+
+        local_inv = None
+        if sid_id:
+            local_inv = self.client.get_local_inventory(start_date, end_date, sid_id)
+
+        self._apply_inventory_metrics(formatted_metrics, fba_inv, local_inv)
         return formatted_metrics
 
+    def build_month_context(self, year: int, month: int) -> MonthDataContext:
+        """一次性拉取整月的全公司数据集并建立店铺索引"""
+        start_date, end_date = self._get_month_range(year, month)
+        scheduler = get_scheduler()
+        profit = scheduler.submit(self._load_profit_data, year, month, start_date, end_date)
+        purchase = scheduler.submit(
+            lambda: self._index_purchase_qty(self.client.iter_purchase_plan(start_date, end_date))
+        )
+        delivery = scheduler.submit(
+            lambda: self._index_delivery_qty(self.client.iter_delivery_plan(start_date, end_date))
+        )
+        fba_out = scheduler.submit(
+            lambda: self._index_fba_out_qty(self.client.iter_fba_out(start_date, end_date))
+        )
+        return MonthDataContext(
+            year,
+            month,
+            {item.get("storeName"): item for item in profit.result()},
+            purchase.result(),
+            delivery.result(),
+            fba_out.result(),
+        )
 
-def analyze_store(store_name: str, year: int = None, month: int = None):
+    def _context_metrics(self, context: MonthDataContext, store_name: str):
+        """基于月份上下文计算除库存外的指标，返回 (canonical_store_name, metrics)"""
+        canonical_store_name = self._resolve_store_name(store_name)
+        if not canonical_store_name:
+            return None, {"error": f"Store {store_name} not found in configuration"}
+
+        year, month = context.year, context.month
+        store_data = context.profit_by_store.get(canonical_store_name)
+        if not store_data:
+            return None, {"error": f"No profit data found for {canonical_store_name} in {year}-{month}"}
+
+        formatted_metrics = self._build_profit_metrics(store_data, store_name, year, month)
+        formatted_metrics["purchase_plan_qty"] = context.purchase_qty.get(store_name, 0)
+        formatted_metrics["delivery_plan_qty"] = context.delivery_qty.get(canonical_store_name, 0)
+        formatted_metrics["fba_actual_out_qty"] = context.fba_out_qty.get(canonical_store_name, 0)
+        return canonical_store_name, formatted_metrics
+
+    def get_store_cost_structure_from_context(
+        self, context: MonthDataContext, store_name: str
+    ) -> Dict[str, Any]:
+        """使用已拉取的月份上下文分析单个店铺，只额外请求该店铺的库存周转"""
+        canonical_store_name, formatted_metrics = self._context_metrics(context, store_name)
+        if not canonical_store_name:
+            return formatted_metrics
+
+        start_date, end_date = self._get_month_range(context.year, context.month)
+        period = f"{context.year}-{context.month:02d}"
+        wid = PROJECT_WID.get(canonical_store_name)
+        sid_id = PROJECT_SID.get(canonical_store_name)
+        fba_inv = self.client.get_fba_inventory(period, period, wid) if wid else None
+        local_inv = self.client.get_local_inventory(start_date, end_date, sid_id) if sid_id else None
+        self._apply_inventory_metrics(formatted_metrics, fba_inv, local_inv)
+        return formatted_metrics
+
+
+class AsyncLingXingMetricsService(LingXingMetricsService):
+    """基于 AsyncLingXingClient 的异步版本，各数据集并发拉取"""
+
+    def __init__(self, client: AsyncLingXingClient, snapshot: Optional[ProfitSnapshotStore] = None):
+        self.client = client
+        self.snapshot = snapshot or get_snapshot_store()
+
+    async def _none(self):
+        return None
+
+    async def _load_profit_data(self, year: int, month: int, start_date: str, end_date: str):
+        profit_data_list = self._snapshot_month(year, month)
+        if profit_data_list is None:
+            profit_data_list = await self.client.get_profit_data(
+                start_date, end_date, use_cache=not self._snapshot_writable(year, month)
+            )
+            self._save_snapshot_month(year, month, profit_data_list)
+        return profit_data_list
+
+    async def _load_store_profit(
+        self, year: int, month: int, start_date: str, end_date: str, canonical_store_name: str
+    ):
+        store_data = self._snapshot_store_profit(year, month, canonical_store_name)
+        if store_data is not None:
+            return store_data
+        sid = PROJECT_SID.get(canonical_store_name)
+        if not sid:
+            return self._find_store_profit(
+                await self._load_profit_data(year, month, start_date, end_date),
+                canonical_store_name,
+            )
+        profit_data_list = await self.client.get_profit_data(
+            start_date, end_date, sids=[sid], use_cache=not self._snapshot_writable(year, month)
+        )
+        store_data = self._find_store_profit(profit_data_list, canonical_store_name)
+        self._save_snapshot_store(year, month, store_data)
+        return store_data
+
+    async def get_store_cost_structure(
+        self, store_name: str, year: int, month: int
+    ) -> Dict[str, Any]:
+        """获取指定店铺、月份的成本结构分析"""
+        start_date, end_date = self._get_month_range(year, month)
+
+        canonical_store_name = self._resolve_store_name(store_name)
+        if not canonical_store_name:
+            return {"error": f"Store {store_name} not found in configuration"}
+
+        wid = PROJECT_WID.get(canonical_store_name)
+        sid_id = PROJECT_SID.get(canonical_store_name)
+        store_sids = [sid_id] if sid_id else None
+        (
+            store_data,
+            purchase_data,
+            delivery_data,
+            fba_out_data,
+            fba_inv,
+            local_inv,
+        ) = await asyncio.gather(
+            self._load_store_profit(year, month, start_date, end_date, canonical_store_name),
+            self.client.get_purchase_plan(start_date, end_date, store_sids),
+            self.client.get_delivery_plan(start_date, end_date),
+            self.client.get_fba_out(start_date, end_date),
+            self.client.get_fba_inventory(f"{year}-{month:02d}", f"{year}-{month:02d}", wid)
+            if wid
+            else self._none(),
+            self.client.get_local_inventory(start_date, end_date, sid_id)
+            if sid_id
+            else self._none(),
+        )
+
+        if not store_data:
+            return {"error": f"No profit data found for {canonical_store_name} in {year}-{month}"}
+
+        formatted_metrics = self._build_profit_metrics(store_data, store_name, year, month)
+        formatted_metrics["purchase_plan_qty"] = self._sum_purchase_qty(purchase_data, store_name)
+        formatted_metrics["delivery_plan_qty"] = self._sum_delivery_qty(
+            delivery_data, canonical_store_name
+        )
+        formatted_metrics["fba_actual_out_qty"] = self._sum_fba_out_qty(
+            fba_out_data, canonical_store_name
+        )
+        self._apply_inventory_metrics(formatted_metrics, fba_inv, local_inv)
+        return formatted_metrics
+
+    async def build_month_context(self, year: int, month: int) -> MonthDataContext:
+        """一次性并发拉取整月的全公司数据集并建立店铺索引"""
+        start_date, end_date = self._get_month_range(year, month)
+        profit_data_list, purchase_data, delivery_data, fba_out_data = await asyncio.gather(
+            self._load_profit_data(year, month, start_date, end_date),
+            self.client.get_purchase_plan(start_date, end_date),
+            self.client.get_delivery_plan(start_date, end_date),
+            self.client.get_fba_out(start_date, end_date),
+        )
+        return MonthDataContext.from_datasets(
+            year, month, profit_data_list, purchase_data, delivery_data, fba_out_data
+        )
+
+    async def get_store_cost_structure_from_context(
+        self, context: MonthDataContext, store_name: str
+    ) -> Dict[str, Any]:
+        canonical_store_name, formatted_metrics = self._context_metrics(context, store_name)
+        if not canonical_store_name:
+            return formatted_metrics
+
+        start_date, end_date = self._get_month_range(context.year, context.month)
+        period = f"{context.year}-{context.month:02d}"
+        wid = PROJECT_WID.get(canonical_store_name)
+        sid_id = PROJECT_SID.get(canonical_store_name)
+        fba_inv, local_inv = await asyncio.gather(
+            self.client.get_fba_inventory(period, period, wid) if wid else self._none(),
+            self.client.get_local_inventory(start_date, end_date, sid_id)
+            if sid_id
+            else self._none(),
+        )
+        self._apply_inventory_metrics(formatted_metrics, fba_inv, local_inv)
+        return formatted_metrics
+
+
+def _default_year_month(year: int = None, month: int = None):
     # 如果没传时间，默认查当前月份
     if year is None or month is None:
         now = datetime.now()
         year = now.year
         month = now.month
+    return year, month
+
+
+def analyze_store(store_name: str, year: int = None, month: int = None):
+    year, month = _default_year_month(year, month)
 
     client = LingXingClient()
     service = LingXingMetricsService(client)
     return service.get_store_cost_structure(store_name, year, month)
+
+
+async def analyze_store_async(store_name: str, year: int = None, month: int = None):
+    year, month = _default_year_month(year, month)
+
+    service = AsyncLingXingMetricsService(AsyncLingXingClient())
+    return await service.get_store_cost_structure(store_name, year, month)
+
+
+def analyze_stores(store_names: List[str], year: int = None, month: int = None) -> Dict[str, Any]:
+    """
+    批量分析多个店铺：整月数据集只拉取一次，
+    返回 {店铺名: 指标或 error}
+    """
+    year, month = _default_year_month(year, month)
+
+    service = LingXingMetricsService(LingXingClient())
+    context = service.build_month_context(year, month)
+
+    results = {}
+    # 每个店铺只剩库存周转两个请求，在共享线程池中并发执行 (请求数受全局调度器限制)
+    scheduler = get_scheduler()
+    future_to_store = {
+        scheduler.submit(service.get_store_cost_structure_from_context, context, name): name
+        for name in store_names
+    }
+    for future in as_completed(future_to_store):
+        name = future_to_store[future]
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return results
+
+
+async def analyze_stores_async(
+    store_names: List[str], year: int = None, month: int = None
+) -> Dict[str, Any]:
+    """analyze_stores 的异步版本"""
+    year, month = _default_year_month(year, month)
+
+    service = AsyncLingXingMetricsService(AsyncLingXingClient())
+    context = await service.build_month_context(year, month)
+    outcomes = await asyncio.gather(
+        *(service.get_store_cost_structure_from_context(context, name) for name in store_names),
+        return_exceptions=True,
+    )
+    return {
+        name: {"error": str(res)} if isinstance(res, Exception) else res
+        for name, res in zip(store_names, outcomes, strict=True)
+    }
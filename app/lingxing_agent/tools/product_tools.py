@@ -1,7 +1,15 @@
-from datetime import datetime, timedelta
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Callable, List, Optional
+from app.lingxing_agent.core.async_client import AsyncLingXingClient
 from app.lingxing_agent.core.client import LingXingClient
+from app.lingxing_agent.core.config import PRODUCT_STATUS_WORKERS
+from app.lingxing_agent.core.scheduler import PRIORITY_BATCH, get_scheduler, scheduling
 
+# 客户端构造不做网络 I/O，首次请求时才登录 (导入本模块没有副作用)
 api_client = LingXingClient()
+async_api_client = AsyncLingXingClient()
 
 def _process_purchase_date(data, store):
     """Logic to check purchase status for standard products."""
@@ -116,94 +124,133 @@ def _process_purchase_data_processing(data, store):
         return earliest_create_time, '缺失', "采购未到达"
     return '采购未下单', '缺失', "采购未下单"
 
-def get_initial_outbound(token, msku, shop):
-    """
-    Check initial shipment info (FBA or Oversea Plan).
-    Returns (total_quantity, earliest_shipment_time).
-    """
-    print(f"[DEBUG] get_initial_outbound: Checking for MSKU: {msku}, Shop: {shop}")
+def _parse_oversea_plan(plan_response):
+    """从海外仓计划响应中取最早的计划，返回 (quantity, ship_time)；没有可用计划时返回 None"""
+    # response structure: data -> plan_list
+    plans = []
+    if plan_response.get('data') and plan_response['data'].get('plan_list'):
+        plans = plan_response['data']['plan_list']
+    elif plan_response.get('plan_list'):
+         plans = plan_response['plan_list']
     
-    # 1. Try Oversea Plan (request_web_multi_sku_shiptitme equivalent)
-    # This seems to be the primary source for "shipment time" in original code
-    try:
-        plan_response = api_client.request_oversea_plan(msku)
-        # response structure: data -> plan_list
-        plans = []
-        if plan_response.get('data') and plan_response['data'].get('plan_list'):
-            plans = plan_response['data']['plan_list']
-        elif plan_response.get('plan_list'):
-             plans = plan_response['plan_list']
-        
-        print(f"[DEBUG] get_initial_outbound (Oversea Plan): Found {len(plans)} plans.")
-        
-        filtered_plans = []
-        if plans:
-            # Filter by shop/store if needed, but the original code didn't seem to filter strictly by shop in the request loop
-            # But we should probably check if it relates to the store
-            for plan in plans:
-                 # Check 'store_name' or similar if available? 
-                 # The response structure from original code inspection didn't show exact store key in the small snippet
-                 # But usually these lists have store info. Let's assume valid for now or check fields.
-                 filtered_plans.append(plan)
-
-        if filtered_plans:
-             # Find earliest plan
-             # Time field: 'gmt_create' or 'created_at'? Original code used 'gmt_create' for search but didn't show sort key clearly in snippet.
-             # Request used 'sort_field': 'create_time' or 'gmt_create'
-             # Let's try 'gmt_create' or 'create_time'
-             earliest_plan = min(filtered_plans, key=lambda x: x.get('gmt_create') or x.get('create_time') or '9999-99-99')
-             ship_time = earliest_plan.get('gmt_create') or earliest_plan.get('create_time')
-             # Quantity? 'plan_quantity'? 'quantity'?
-             qty = earliest_plan.get('plan_quantity', 0)
-             if ship_time:
-                 print(f"[DEBUG] get_initial_outbound (Oversea Plan): Found plan. Time: {ship_time}, Qty: {qty}")
-                 return qty, ship_time
-    except Exception as e:
-        print(f"Error fetching oversea plan: {e}")
+    print(f"[DEBUG] get_initial_outbound (Oversea Plan): Found {len(plans)} plans.")
+    
+    filtered_plans = []
+    if plans:
+        # Filter by shop/store if needed, but the original code didn't seem to filter strictly by shop in the request loop
+        # But we should probably check if it relates to the store
+        for plan in plans:
+             # Check 'store_name' or similar if available? 
+             # The response structure from original code inspection didn't show exact store key in the small snippet
+             # But usually these lists have store info. Let's assume valid for now or check fields.
+             filtered_plans.append(plan)
+
+    if filtered_plans:
+         # Find earliest plan
+         # Time field: 'gmt_create' or 'created_at'? Original code used 'gmt_create' for search but didn't show sort key clearly in snippet.
+         # Request used 'sort_field': 'create_time' or 'gmt_create'
+         # Let's try 'gmt_create' or 'create_time'
+         earliest_plan = min(filtered_plans, key=lambda x: x.get('gmt_create') or x.get('create_time') or '9999-99-99')
+         ship_time = earliest_plan.get('gmt_create') or earliest_plan.get('create_time')
+         # Quantity? 'plan_quantity'? 'quantity'?
+         qty = earliest_plan.get('plan_quantity', 0)
+         if ship_time:
+             print(f"[DEBUG] get_initial_outbound (Oversea Plan): Found plan. Time: {ship_time}, Qty: {qty}")
+             return qty, ship_time
+    return None
+
+def _parse_deliver_page(response_data, shop):
+    """从发货单响应中取该店铺最早的一批发货，返回 (quantity, shipment_time)"""
+    batches = response_data.get('data', {}).get('list', [])
+    print(f"[DEBUG] get_initial_outbound (Shipment Plan): Found {len(batches)} batches.")
+    
+    if not batches:
+        return 0, None
 
-    # 2. Fallback to Shipment Plan (request_deliver_page)
-    try:
-        response_data = api_client.request_deliver_page(msku)
-        
-        batches = response_data.get('data', {}).get('list', [])
-        print(f"[DEBUG] get_initial_outbound (Shipment Plan): Found {len(batches)} batches.")
-        
-        if not batches:
-            return 0, None
+    batches = [x for x in batches if x.get('total_quantity_shipped') != 0]
 
-        batches = [x for x in batches if x.get('total_quantity_shipped') != 0]
+    filtered_data = [
+        x for x in batches
+        if any(s.get('sname') == shop for s in x.get('relate_list', []))
+    ]
 
-        filtered_data = [
-            x for x in batches
-            if any(s.get('sname') == shop for s in x.get('relate_list', []))
-        ]
+    if filtered_data:
+        earliest_shipment = min(filtered_data, key=lambda x: datetime.strptime(x['shipment_time'], '%Y-%m-%d %H:%M:%S'))
+        
+        # Simple logic: return total count of this earliest batch
+        total_good_num = abs(earliest_shipment.get('total_quantity_shipped', 0))
+        print(f"[DEBUG] get_initial_outbound (Shipment Plan): Found match. Time: {earliest_shipment['shipment_time']}, Qty: {total_good_num}")
+        return total_good_num, earliest_shipment['shipment_time']
 
-        if filtered_data:
-            earliest_shipment = min(filtered_data, key=lambda x: datetime.strptime(x['shipment_time'], '%Y-%m-%d %H:%M:%S'))
-            earliest_date = datetime.strptime(earliest_shipment['shipment_time'], '%Y-%m-%d %H:%M:%S')
-            
-            # Simple logic: return total count of this earliest batch
-            total_good_num = abs(earliest_shipment.get('total_quantity_shipped', 0))
-            print(f"[DEBUG] get_initial_outbound (Shipment Plan): Found match. Time: {earliest_shipment['shipment_time']}, Qty: {total_good_num}")
-            return total_good_num, earliest_shipment['shipment_time']
-        else:
-            print(f"[DEBUG] get_initial_outbound (Shipment Plan): No batches matched shop '{shop}'.")
-            
-    except Exception as e:
-        print(f"Error fetching shipment plan: {e}")
+    print(f"[DEBUG] get_initial_outbound (Shipment Plan): No batches matched shop '{shop}'.")
+    return 0, None
+
+def _resolve_outbound(oversea_plan, deliver_page, shop):
+    """
+    按原有优先级合并首发结果：海外仓计划优先，其次发货单。
+    oversea_plan / deliver_page 是已经拿到的响应，请求失败时为异常对象。
+    """
+    if isinstance(oversea_plan, Exception):
+        print(f"Error fetching oversea plan: {oversea_plan}")
+    else:
+        try:
+            found = _parse_oversea_plan(oversea_plan)
+            if found:
+                return found
+        except Exception as e:
+            print(f"Error fetching oversea plan: {e}")
+
+    if isinstance(deliver_page, Exception):
+        print(f"Error fetching shipment plan: {deliver_page}")
+    else:
+        try:
+            return _parse_deliver_page(deliver_page, shop)
+        except Exception as e:
+            print(f"Error fetching shipment plan: {e}")
 
     return 0, None
 
-def check_product_status(msku: str, store_name: str, is_processing: bool = False):
+def _outcome(future):
+    """取 future 的结果，异常作为返回值"""
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+def get_initial_outbound(token, msku, shop):
     """
-    Check the full status of a product: purchasing, arrival, and initial outbound.
-    
-    Args:
-        msku: The Merchant SKU.
-        store_name: The name of the store (e.g., 'Amazon US').
-        is_processing: Whether it is a processing product (jiagong).
+    Check initial shipment info (FBA or Oversea Plan).
+    Returns (total_quantity, earliest_shipment_time).
     """
-    sku = msku 
+    print(f"[DEBUG] get_initial_outbound: Checking for MSKU: {msku}, Shop: {shop}")
+    # 海外仓计划与发货单同时请求，再按优先级取结果
+    scheduler = get_scheduler()
+    oversea = scheduler.submit(api_client.request_oversea_plan, msku)
+    deliver = scheduler.submit(api_client.request_deliver_page, msku)
+    return _resolve_outbound(_outcome(oversea), _outcome(deliver), shop)
+
+async def _async_outcome(coro):
+    try:
+        return await coro
+    except Exception as e:
+        return e
+
+async def get_initial_outbound_async(msku, shop):
+    """get_initial_outbound 的异步版本"""
+    print(f"[DEBUG] get_initial_outbound: Checking for MSKU: {msku}, Shop: {shop}")
+    oversea, deliver = await asyncio.gather(
+        _async_outcome(async_api_client.request_oversea_plan(msku)),
+        _async_outcome(async_api_client.request_deliver_page(msku)),
+    )
+    return _resolve_outbound(oversea, deliver, shop)
+
+def _has_order_list(data):
+    """采购接口有的返回 data.list，有的直接返回 list"""
+    return bool(data.get('list') or (data.get('data') and data['data'].get('list')))
+
+def _build_status_result(msku, store_name, purchase, outbound):
+    """根据采购结果 (purchase_status, finish_time, rank_status) 与首发结果 (num, time) 汇总产品状态"""
+    purchase_status, finish_time, rank_status = purchase
     result = {
         "msku": msku,
         "store": store_name,
@@ -216,35 +263,6 @@ def check_product_status(msku: str, store_name: str, is_processing: bool = False
         "is_borrowed": False
     }
 
-    # 1. Purchase Status
-    if is_processing:
-        data_json = api_client.request_web_processing_purchasedate(sku)
-        purchase_status, finish_time, rank_status = _process_purchase_data_processing(data_json, store_name)
-    else:
-        # First try standard
-        data_json = api_client.request_web_purchasedate(sku)
-        
-        # Check if list is empty
-        has_list = False
-        if data_json.get('data') and data_json['data'].get('list'):
-             has_list = True
-        elif data_json.get('list'): # Some endpoints flat
-             has_list = True
-
-        if not has_list:
-             # Try processing API just in case
-             proc_data = api_client.request_web_processing_purchasedate(sku)
-             proc_has_list = bool(proc_data.get('list') or proc_data.get('data', {}).get('list'))
-             
-             if proc_has_list:
-                 # It IS a processing product
-                 data_json = proc_data
-                 purchase_status, finish_time, rank_status = _process_purchase_data_processing(data_json, store_name)
-             else:
-                 purchase_status, finish_time, rank_status = _process_purchase_date(data_json, store_name)
-        else:
-            purchase_status, finish_time, rank_status = _process_purchase_date(data_json, store_name)
-
     result['purchase_status'] = rank_status
     if purchase_status != "采购未下单":
         result['purchase_time'] = purchase_status
@@ -261,7 +279,7 @@ def check_product_status(msku: str, store_name: str, is_processing: bool = False
         result['status'] = "采购已完成"
 
     # 2. Initial Outbound (Stock)
-    stock_num, stock_date = get_initial_outbound(None, msku, store_name)
+    stock_num, stock_date = outbound
     result['initial_stock_num'] = stock_num
     result['initial_stock_time'] = stock_date
 
@@ -277,36 +295,263 @@ def check_product_status(msku: str, store_name: str, is_processing: bool = False
 
     return result
 
+def _resolve_purchase(data_json, processing_data, store_name):
+    """
+    标准采购单有记录时用标准采购单，否则看加工采购单 (processing_data 只在需要时取值)
+    """
+    if _has_order_list(data_json):
+        return _process_purchase_date(data_json, store_name)
+    # Try processing API just in case
+    proc_data = processing_data()
+    if _has_order_list(proc_data):
+        # It IS a processing product
+        return _process_purchase_data_processing(proc_data, store_name)
+    return _process_purchase_date(data_json, store_name)
 
-def get_product_performance(msku: str, start_date: str = None, end_date: str = None):
+def check_product_status(msku: str, store_name: str, is_processing: bool = False):
     """
-    获取产品的销售表现数据，包括销量、销售额、广告花费等。
+    Check the full status of a product: purchasing, arrival, and initial outbound.
     
     Args:
-        msku: 产品的 MSKU。
-        start_date: 查询开始日期 (YYYY-MM-DD)。如果不提供，默认为本月1号。
-        end_date: 查询结束日期 (YYYY-MM-DD)。如果不提供，默认为今天。
+        msku: The Merchant SKU.
+        store_name: The name of the store (e.g., 'Amazon US').
+        is_processing: Whether it is a processing product (jiagong).
+    """
+    sku = msku 
+
+    # 四个查询彼此独立：同时发出 (加工产品只需要加工采购单)，
+    # 再按原有优先级取结果，总延迟约为一次往返。
+    # 批量查询时本函数已在调度器线程中运行，submit 会就地执行，线程数不会叠加
+    scheduler = get_scheduler()
+    if is_processing:
+        purchase_future = None
+    else:
+        purchase_future = scheduler.submit(api_client.request_web_purchasedate, sku)
+    processing_future = scheduler.submit(api_client.request_web_processing_purchasedate, sku)
+    oversea_future = scheduler.submit(api_client.request_oversea_plan, msku)
+    deliver_future = scheduler.submit(api_client.request_deliver_page, msku)
+
+    print(f"[DEBUG] get_initial_outbound: Checking for MSKU: {msku}, Shop: {store_name}")
+    outbound = _resolve_outbound(_outcome(oversea_future), _outcome(deliver_future), store_name)
+
+    # 1. Purchase Status
+    if is_processing:
+        purchase = _process_purchase_data_processing(processing_future.result(), store_name)
+    else:
+        data_json = purchase_future.result()
+        purchase = _resolve_purchase(data_json, lambda: processing_future.result(), store_name)
+
+    return _build_status_result(msku, store_name, purchase, outbound)
+
+async def check_product_status_async(msku: str, store_name: str, is_processing: bool = False):
+    """
+    查询产品的完整状态 (采购、到货、首次发货)，check_product_status 的异步版本。
     
-    Returns:
-        包含销量、销售额、广告花费等指标的字典。
+    Args:
+        msku: The Merchant SKU.
+        store_name: The name of the store (e.g., 'Amazon US').
+        is_processing: Whether it is a processing product (jiagong).
+    """
+    sku = msku
+
+    lookups = [
+        async_api_client.request_web_processing_purchasedate(sku),
+        async_api_client.request_oversea_plan(msku),
+        async_api_client.request_deliver_page(msku),
+    ]
+    if not is_processing:
+        lookups.append(async_api_client.request_web_purchasedate(sku))
+    outcomes = await asyncio.gather(*(_async_outcome(c) for c in lookups))
+    proc_data, oversea, deliver = outcomes[:3]
+
+    print(f"[DEBUG] get_initial_outbound: Checking for MSKU: {msku}, Shop: {store_name}")
+    outbound = _resolve_outbound(oversea, deliver, store_name)
+
+    def processing_data():
+        if isinstance(proc_data, Exception):
+            raise proc_data
+        return proc_data
+
+    if is_processing:
+        purchase = _process_purchase_data_processing(processing_data(), store_name)
+    else:
+        data_json = outcomes[3]
+        if isinstance(data_json, Exception):
+            raise data_json
+        purchase = _resolve_purchase(data_json, processing_data, store_name)
+
+    return _build_status_result(msku, store_name, purchase, outbound)
+
+# 批量状态表的列
+STATUS_TABLE_COLUMNS = [
+    "msku", "status", "purchase_status", "purchase_time", "arrival_time",
+    "initial_stock_num", "initial_stock_time", "is_borrowed",
+]
+
+
+def _status_table(mskus, results):
+    """按输入顺序整理成紧凑表格 (columns + rows)，并按状态计数"""
+    rows = []
+    summary = {}
+    for msku in mskus:
+        result = results[msku]
+        if "error" in result:
+            status = "查询超时" if result.get("timed_out") else "查询失败"
+            row = [msku, status, result["error"], "", "", 0, "", False]
+        else:
+            row = [result.get(column) for column in STATUS_TABLE_COLUMNS]
+        summary[row[1]] = summary.get(row[1], 0) + 1
+        rows.append(row)
+    return {"columns": STATUS_TABLE_COLUMNS, "rows": rows, "summary": summary}
+
+
+def _report_progress(done, total, msku, result, on_progress):
+    status = result.get("status") or result.get("error")
+    print(f"[check_products_status] {done}/{total} {msku}: {status}")
+    if on_progress:
+        on_progress(done, total, msku, result)
+
+
+def run_products_status(
+    mskus: List[str],
+    store_name: str = "",
+    is_processing: bool = False,
+    max_workers: int = PRODUCT_STATUS_WORKERS,
+    on_progress: Optional[Callable] = None,
+):
+    """
+    批量查询产品状态：MSKU 之间并发 (同时在途最多 max_workers 个)，
+    任务提交到调度器的共享线程池，共享同一个连接池客户端。
+    on_progress(done, total, msku, result) 在每个 MSKU 完成时回调。
+    """
+    mskus = list(dict.fromkeys(m for m in mskus if m))
+    results = {}
+    scheduler = get_scheduler()
+    remaining = iter(mskus)
+    pending = {}
+
+    def submit_next():
+        msku = next(remaining, None)
+        if msku is not None:
+            pending[scheduler.submit(check_product_status, msku, store_name, is_processing)] = msku
+
+    # 批量扫描：请求名额让位于交互式查询
+    with scheduling(priority=PRIORITY_BATCH):
+        for _ in range(max(1, max_workers)):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                msku = pending.pop(future)
+                try:
+                    results[msku] = future.result()
+                except Exception as e:
+                    results[msku] = {"msku": msku, "error": str(e)}
+                _report_progress(len(results), len(mskus), msku, results[msku], on_progress)
+                submit_next()
+    return _status_table(mskus, results)
+
+
+async def run_products_status_async(
+    mskus: List[str],
+    store_name: str = "",
+    is_processing: bool = False,
+    max_workers: int = PRODUCT_STATUS_WORKERS,
+    on_progress: Optional[Callable] = None,
+    timeout: Optional[float] = None,
+):
+    """
+    run_products_status 的异步版本 (信号量限制并发)。
+    传入 timeout 时，到期仍未完成的 MSKU 被取消并在表中标记为查询超时，已完成的行照常返回。
+    """
+    mskus = list(dict.fromkeys(m for m in mskus if m))
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+    results = {}
+
+    async def run_one(msku):
+        async with semaphore:
+            try:
+                result = await check_product_status_async(msku, store_name, is_processing)
+            except Exception as e:
+                result = {"msku": msku, "error": str(e)}
+        results[msku] = result
+        _report_progress(len(results), len(mskus), msku, result, on_progress)
+
+    with scheduling(priority=PRIORITY_BATCH):
+        tasks = [asyncio.ensure_future(run_one(msku)) for msku in mskus]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    for msku in mskus:
+        if msku not in results:
+            results[msku] = {"msku": msku, "error": f"查询超时 ({timeout:g}s)", "timed_out": True}
+    return _status_table(mskus, results)
+
+
+def check_products_status(mskus: List[str], store_name: str = "", is_processing: bool = False):
     """
-    from datetime import datetime as dt
+    批量查询多个产品的采购、到货、首次发货状态 (新品周报等上百个 MSKU 的场景)。
     
+    Args:
+        mskus: 产品 MSKU 列表。
+        store_name: 店铺名，不确定可以留空 ""。
+        is_processing: 是否为加工产品。
+    
+    Returns:
+        紧凑表格：columns (列名)、rows (每个 MSKU 一行)、summary (各状态数量)。
+    """
+    return run_products_status(mskus, store_name, is_processing)
+
+
+async def check_products_status_async(
+    mskus: List[str], store_name: str = "", is_processing: bool = False, timeout: Optional[float] = None
+):
+    """check_products_status 的异步版本；timeout 为时间预算，超时的 MSKU 在表中单独标记"""
+    return await run_products_status_async(mskus, store_name, is_processing, timeout=timeout)
+
+
+def _default_date_range(start_date, end_date):
     # Default date range: current month
     if not end_date:
-        end_date = dt.now().strftime("%Y-%m-%d")
+        end_date = datetime.now().strftime("%Y-%m-%d")
     if not start_date:
-        start_date = dt.now().strftime("%Y-%m-01")
-    
-    response = api_client.get_product_performance(start_date, end_date, msku)
-    
-    # 尝试多种可能的数据路径
-    # 依据提供的 JSON 结构: data -> list
-    records = []
+        start_date = datetime.now().strftime("%Y-%m-01")
+    return start_date, end_date
+
+
+def _performance_records(response):
+    """asinLists 响应中的记录列表 (data -> list)"""
     if isinstance(response, dict):
         data_block = response.get('data', {})
         if isinstance(data_block, dict):
-            records = data_block.get('list', [])
+            return data_block.get('list', [])
+    return []
+
+
+def _index_performance_records(records):
+    """
+    按 MSKU 建立索引：先用记录自身的 msku，
+    再用 price_list 里的 seller_sku 补充 (并带上对应店铺名)
+    """
+    index = {}
+    for record in records:
+        msku = record.get('msku')
+        if msku and msku not in index:
+            index[msku] = record
+    for record in records:
+        for price_item in record.get('price_list') or []:
+            seller_sku = price_item.get('seller_sku')
+            if seller_sku and seller_sku not in index:
+                index[seller_sku] = dict(record, storeName=price_item.get('seller_name', ''))
+    return index
+
+
+def _format_product_performance(response, msku, start_date, end_date):
+    """把 asinLists 接口响应整理成工具返回的指标字典"""
+    records = _performance_records(response)
     
     if not records:
         # 返回调试信息以便排查
@@ -319,19 +564,7 @@ def get_product_performance(msku: str, start_date: str = None, end_date: str = N
             "debug_data_keys": list(response.get('data', {}).keys()) if isinstance(response.get('data'), dict) else None
         }
     
-    # Find the specific MSKU record
-    product_data = next((r for r in records if r.get('msku') == msku), None)
-    # 如果找不到精确匹配，检查 price_list
-    if not product_data:
-        for record in records:
-            price_list = record.get('price_list', [])
-            for price_item in price_list:
-                if price_item.get('seller_sku') == msku:
-                    product_data = record
-                    product_data['storeName'] = price_item.get('seller_name', '')
-                    break
-            if product_data:
-                break
+    product_data = _index_performance_records(records).get(msku)
     
     if not product_data:
         return {
@@ -342,6 +575,11 @@ def get_product_performance(msku: str, start_date: str = None, end_date: str = N
             "available_mskus": [r.get('msku', 'N/A') for r in records[:5]]  # 显示前5个可用的 MSKU
         }
     
+    return _performance_metrics(product_data, msku, start_date, end_date)
+
+
+def _performance_metrics(product_data, msku, start_date, end_date):
+    """单个产品记录 -> 指标字典"""
     # 使用原始代码中的字段名映射
     result = {
         "msku": product_data.get('msku', msku),
@@ -390,3 +628,79 @@ def get_product_performance(msku: str, start_date: str = None, end_date: str = N
         "amount_yoy_ratio": product_data.get('amount_yoy_ratio', 0),
     }
     return result
+
+
+def get_product_performance(msku: str, start_date: str = None, end_date: str = None):
+    """
+    获取产品的销售表现数据，包括销量、销售额、广告花费等。
+    
+    Args:
+        msku: 产品的 MSKU。
+        start_date: 查询开始日期 (YYYY-MM-DD)。如果不提供，默认为本月1号。
+        end_date: 查询结束日期 (YYYY-MM-DD)。如果不提供，默认为今天。
+    
+    Returns:
+        包含销量、销售额、广告花费等指标的字典。
+    """
+    start_date, end_date = _default_date_range(start_date, end_date)
+    response = api_client.get_product_performance(start_date, end_date, msku)
+    return _format_product_performance(response, msku, start_date, end_date)
+
+
+def _format_products_performance(records, mskus, start_date, end_date):
+    """批量结果：{msku: 指标字典}，没有数据的 MSKU 返回 error"""
+    index = _index_performance_records(records)
+    results = {}
+    for msku in mskus:
+        product_data = index.get(msku)
+        if product_data:
+            results[msku] = _performance_metrics(product_data, msku, start_date, end_date)
+        else:
+            results[msku] = {
+                "msku": msku,
+                "error": "未找到该产品的表现数据",
+                "start_date": start_date,
+                "end_date": end_date,
+            }
+    return results
+
+
+def get_products_performance(mskus: List[str], start_date: str = None, end_date: str = None):
+    """
+    批量获取多个产品的销售表现数据 (对比多个 MSKU 时使用，一次查询代替多次)。
+    
+    Args:
+        mskus: 产品 MSKU 列表。
+        start_date: 查询开始日期 (YYYY-MM-DD)。如果不提供，默认为本月1号。
+        end_date: 查询结束日期 (YYYY-MM-DD)。如果不提供，默认为今天。
+    
+    Returns:
+        以 MSKU 为键的字典，值为该产品的指标 (同 get_product_performance)。
+    """
+    start_date, end_date = _default_date_range(start_date, end_date)
+    records = api_client.get_products_performance(start_date, end_date, mskus)
+    return _format_products_performance(records, mskus, start_date, end_date)
+
+
+async def get_products_performance_async(mskus: List[str], start_date: str = None, end_date: str = None):
+    """get_products_performance 的异步版本"""
+    start_date, end_date = _default_date_range(start_date, end_date)
+    records = await async_api_client.get_products_performance(start_date, end_date, mskus)
+    return _format_products_performance(records, mskus, start_date, end_date)
+
+
+async def get_product_performance_async(msku: str, start_date: str = None, end_date: str = None):
+    """
+    获取产品的销售表现数据 (get_product_performance 的异步版本)。
+    
+    Args:
+        msku: 产品的 MSKU。
+        start_date: 查询开始日期 (YYYY-MM-DD)。如果不提供，默认为本月1号。
+        end_date: 查询结束日期 (YYYY-MM-DD)。如果不提供，默认为今天。
+    
+    Returns:
+        包含销量、销售额、广告花费等指标的字典。
+    """
+    start_date, end_date = _default_date_range(start_date, end_date)
+    response = await async_api_client.get_product_performance(start_date, end_date, msku)
+    return _format_product_performance(response, msku, start_date, end_date)
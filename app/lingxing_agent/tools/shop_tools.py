@@ -1,6 +1,10 @@
 from typing import List, Dict, Any
 from app.lingxing_agent.core.config import PROJECT_SID
+from app.lingxing_agent.core.scheduler import PRIORITY_BATCH, scheduling
 from app.lingxing_agent.tools.metrics import analyze_store as _analyze_store_impl
+from app.lingxing_agent.tools.metrics import analyze_store_async as _analyze_store_async_impl
+from app.lingxing_agent.tools.metrics import analyze_stores as _analyze_stores_impl
+from app.lingxing_agent.tools.metrics import analyze_stores_async as _analyze_stores_async_impl
 
 def get_available_stores() -> List[str]:
     """
@@ -9,7 +13,37 @@ def get_available_stores() -> List[str]:
     """
     return list(PROJECT_SID.keys())
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def _is_batch_query(store_name: str) -> bool:
+    return str(store_name).upper().startswith("ALL")
+
+
+def _match_batch_stores(store_name: str) -> List[str]:
+    """"ALL" / "ALL-US" 等批量店名展开为具体店铺列表"""
+    all_stores = list(PROJECT_SID.keys())
+    target_stores = []
+    suffix = str(store_name).upper().replace("ALL", "") # e.g. "-US"
+    
+    for name in all_stores:
+        if suffix == "" or name.endswith(suffix):
+            target_stores.append(name)
+    return target_stores
+
+def _collect_batch_results(target_stores: List[str], outcomes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """按店铺顺序收集成功结果，跳过出错的店铺"""
+    results = []
+    for name in target_stores:
+        res = outcomes.get(name)
+        if res and "error" not in res:
+            results.append(res)
+        elif res:
+            print(f"Error fetching {name}: {res['error']}")
+    return results
+
+def _batch_summary(store_name: str, target_stores: List[str], outcomes: Dict[str, Any]) -> Dict[str, Any]:
+    """批量查询的返回格式：汇总说明 + 各店铺明细"""
+    results = _collect_batch_results(target_stores, outcomes)
+    return {"summary": f"Analyzed {len(results)} stores matching '{store_name}'", "details": results}
 
 def analyze_store(store_name: str, year: int = None, month: int = None) -> Any:
     """
@@ -26,34 +60,35 @@ def analyze_store(store_name: str, year: int = None, month: int = None) -> Any:
     Returns:
         Dict (单店) 或 List[Dict] (多店)
     """
-    if str(store_name).upper().startswith("ALL"):
-        # Batch Mode
-        all_stores = list(PROJECT_SID.keys())
-        target_stores = []
-        suffix = str(store_name).upper().replace("ALL", "") # e.g. "-US"
-        
-        for name in all_stores:
-            if suffix == "" or name.endswith(suffix):
-                target_stores.append(name)
-        
-        results = []
-        # 使用并发加速批量查询
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_store = {
-                executor.submit(_analyze_store_impl, name, year, month): name
-                for name in target_stores
-            }
-            
-            for future in as_completed(future_to_store):
-                name = future_to_store[future]
-                try:
-                    res = future.result()
-                    if res and "error" not in res:
-                        results.append(res)
-                except Exception as e:
-                    print(f"Error fetching {name}: {e}")
-                    pass
-                    
-        return {"summary": f"Analyzed {len(results)} stores matching '{store_name}'", "details": results}
+    if _is_batch_query(store_name):
+        # Batch Mode: 整月数据集只拉取一次，所有店铺共享
+        target_stores = _match_batch_stores(store_name)
+        with scheduling(priority=PRIORITY_BATCH):
+            outcomes = _analyze_stores_impl(target_stores, year, month)
+        return _batch_summary(store_name, target_stores, outcomes)
 
     return _analyze_store_impl(store_name, year, month)
+
+
+async def analyze_store_async(store_name: str, year: int = None, month: int = None) -> Any:
+    """
+    分析店铺的利润、成本结构和库存周转数据 (异步版本)。支持单店或批量分析。
+    
+    Args:
+        store_name: 
+            - 单店: "HB-US"
+            - 全店: "ALL"
+            - 按站点: "ALL-US", "ALL-DE", "ALL-JP" 等
+        year: 年份 (如 2025)
+        month: 月份 (1-12)
+        
+    Returns:
+        Dict (单店) 或 List[Dict] (多店)
+    """
+    if _is_batch_query(store_name):
+        target_stores = _match_batch_stores(store_name)
+        with scheduling(priority=PRIORITY_BATCH):
+            outcomes = await _analyze_stores_async_impl(target_stores, year, month)
+        return _batch_summary(store_name, target_stores, outcomes)
+
+    return await _analyze_store_async_impl(store_name, year, month)
@@ -0,0 +1,114 @@
+"""
+BSON 文档 -> JSON 的单遍转换
+
+输出与 bson.json_util 的 relaxed 扩展 JSON 一致 ({"$oid": ...}、{"$date": ...} 等)，
+但不再先 dumps 成字符串再 loads 回来：
+- to_jsonable(data)  遍历一次，返回可直接交给 MCP 的 dict / list
+- dumps(data)        直接编码成 JSON 字符串；装了 orjson 时用 orjson，否则用标准库 json
+
+我们实际存储的类型 (ObjectId / datetime / Decimal128 / 二进制) 走快速路径，
+其他少见类型交给 json_util.default 兜底。bson 按需导入，保持 MCP server 启动轻量。
+"""
+import base64
+import datetime
+import functools
+import json
+import math
+from typing import Any, Callable, Dict
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _encode_datetime(value: datetime.datetime) -> Dict[str, Any]:
+    # pymongo 默认返回 naive 的 UTC 时间；bson 只保存到毫秒
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    value = value.astimezone(datetime.timezone.utc)
+    if value < _EPOCH:
+        millis = (value - _EPOCH) // datetime.timedelta(milliseconds=1)
+        return {"$date": {"$numberLong": str(millis)}}
+    text = value.strftime("%Y-%m-%dT%H:%M:%S")
+    millis = value.microsecond // 1000
+    if millis:
+        text += f".{millis:03d}"
+    return {"$date": text + "Z"}
+
+
+def _encode_binary(value: bytes, subtype: int = 0) -> Dict[str, Any]:
+    return {"$binary": {"base64": base64.b64encode(value).decode(), "subType": f"{subtype:02x}"}}
+
+
+def _encode_float(value: float) -> Any:
+    if math.isfinite(value):
+        return value
+    return {"$numberDouble": "NaN" if math.isnan(value) else ("Infinity" if value > 0 else "-Infinity")}
+
+
+@functools.lru_cache(maxsize=None)
+def _bson_encoders() -> Dict[type, Callable[[Any], Any]]:
+    """类型 -> 编码函数 (首次使用时导入 bson)"""
+    from bson import Binary, Decimal128, ObjectId
+
+    return {
+        ObjectId: lambda v: {"$oid": str(v)},
+        datetime.datetime: _encode_datetime,
+        Decimal128: lambda v: {"$numberDecimal": str(v)},
+        Binary: lambda v: _encode_binary(bytes(v), v.subtype),
+        bytes: _encode_binary,
+    }
+
+
+def _default(value: Any) -> Any:
+    """单个非 JSON 原生值 -> 扩展 JSON (给编码器的 default 钩子)"""
+    encode = _bson_encoders().get(type(value))
+    if encode is not None:
+        return encode(value)
+    from bson import json_util
+
+    return to_jsonable(json_util.default(value))
+
+
+_PLAIN = (str, int, bool, type(None))
+
+
+def to_jsonable(data: Any) -> Any:
+    """把 find() 结果转换为只含 JSON 原生类型的 dict / list (单次遍历)"""
+    encoders = _bson_encoders()
+
+    def convert(value):
+        kind = type(value)
+        if kind in _PLAIN:
+            return value
+        if kind is dict:
+            return {key: convert(item) for key, item in value.items()}
+        if kind is list or kind is tuple:
+            return [convert(item) for item in value]
+        if kind is float:
+            return _encode_float(value)
+        encode = encoders.get(kind)
+        if encode is not None:
+            return encode(value)
+        if isinstance(value, dict):  # SON / RawBSONDocument 等
+            return {key: convert(item) for key, item in value.items()}
+        return _default(value)
+
+    return convert(data)
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 没装 orjson 时用标准库
+    orjson = None
+
+
+def dumps(data: Any, indent: bool = False) -> str:
+    """直接把 BSON 文档编码为 JSON 字符串"""
+    if orjson is not None:
+        # datetime 交给 default，与 json_util 的 {"$date": ...} 格式一致
+        option = orjson.OPT_PASSTHROUGH_DATETIME | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, default=_default, option=option).decode()
+        except TypeError:
+            # 超出 64 位的整数、非字符串键等 orjson 不支持的情况
+            pass
+    return json.dumps(to_jsonable(data), indent=2 if indent else None, ensure_ascii=False)
@@ -52,6 +52,26 @@ MONGO_CONFIG = {
 }
 
 
+# MongoClient 连接池配置（每个 MCP server 进程共享一个客户端）
+MONGO_POOL_CONFIG = {
+    'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', '20')),
+    'minPoolSize': int(os.getenv('MONGO_MIN_POOL_SIZE', '1')),
+    'maxIdleTimeMS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000')),
+    'serverSelectionTimeoutMS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    'connectTimeoutMS': int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    'retryReads': True,
+}
+
+# 共享连接的健康检查间隔（秒）：距上次成功检查超过该时间才会 ping
+HEALTH_CHECK_INTERVAL = float(os.getenv('MONGO_HEALTH_CHECK_INTERVAL', '30'))
+
+# MSKU/SKU 子串查找（无法走索引）的最长执行时间（毫秒）
+LOOKUP_SCAN_MAX_TIME_MS = int(os.getenv('MONGO_LOOKUP_SCAN_MAX_TIME_MS', '2000'))
+
+# query_collection 单页返回的最大字节数（JSON 编码后），超出时截断并返回 next_token
+QUERY_MAX_BYTES = int(os.getenv('MONGO_QUERY_MAX_BYTES', str(64 * 1024)))
+
+
 # 获取当前环境的MongoDB配置
 def get_mongo_config():
     return MONGO_CONFIG[DEPLOY_ENV]
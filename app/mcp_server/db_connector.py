@@ -2,43 +2,97 @@
 数据库连接工具类
 支持本地开发和服务器部署两种环境
 """
-from sshtunnel import SSHTunnelForwarder
-from pymongo import MongoClient
-from db_config import SSH_CONFIG, MONGO_CONFIG, DEPLOY_ENV, get_mongo_config
+from db_config import (
+    SSH_CONFIG, MONGO_CONFIG, DEPLOY_ENV, MONGO_POOL_CONFIG, HEALTH_CHECK_INTERVAL, get_mongo_config
+)
+import atexit
 import logging
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MongoDBConnector:
+    """
+    每个进程共享一个带连接池的 MongoClient（开发环境还有一条 SSH 隧道）。
+
+    `with MongoDBConnector() as db` 只是借用共享连接，退出时不断开；
+    超过 HEALTH_CHECK_INTERVAL 未检查时先 ping，失败则重建隧道和客户端。
+    close() 才真正断开（进程退出时自动调用）。
+    """
+
+    _lock = threading.Lock()
+    _tunnel = None
+    _client = None
+    _db = None
+    _last_check = 0.0
+
     def __init__(self):
-        self.tunnel = None
-        self.client = None
-        self.db = None
         self.config = get_mongo_config()
 
+    @property
+    def tunnel(self):
+        return MongoDBConnector._tunnel
+
+    @property
+    def client(self):
+        return MongoDBConnector._client
+
+    @property
+    def db(self):
+        return MongoDBConnector._db
+
     def connect(self):
-        try:
-            if DEPLOY_ENV == 'development':
-                # 开发环境：使用SSH隧道
-                self._connect_via_ssh()
-            else:
-                # 生产环境：直接连接
-                self._connect_direct()
-
-            # 测试连接
-            self.db.command('ping')
-            logger.info(f"MongoDB connection established successfully in {DEPLOY_ENV} environment")
-            return self.db
+        cls = MongoDBConnector
+        with cls._lock:
+            try:
+                if cls._db is None:
+                    self._open()
+                elif time.monotonic() - cls._last_check > HEALTH_CHECK_INTERVAL and not self._healthy():
+                    logger.warning("MongoDB connection unhealthy, reconnecting")
+                    self._reset()
+                    self._open()
+                return cls._db
 
+            except Exception as e:
+                logger.error(f"Error connecting to database: {str(e)}")
+                self._reset()
+                raise
+
+    def _open(self):
+        if DEPLOY_ENV == 'development':
+            # 开发环境：使用SSH隧道
+            self._connect_via_ssh()
+        else:
+            # 生产环境：直接连接
+            self._connect_direct()
+
+        # 测试连接
+        MongoDBConnector._db.command('ping')
+        MongoDBConnector._last_check = time.monotonic()
+        logger.info(f"MongoDB connection established successfully in {DEPLOY_ENV} environment")
+
+    def _healthy(self):
+        """隧道仍在运行且 ping 成功"""
+        cls = MongoDBConnector
+        if cls._tunnel is not None and not cls._tunnel.is_active:
+            return False
+        try:
+            cls._db.command('ping')
         except Exception as e:
-            logger.error(f"Error connecting to database: {str(e)}")
-            raise
+            logger.warning(f"MongoDB ping failed: {str(e)}")
+            return False
+        cls._last_check = time.monotonic()
+        return True
 
     def _connect_via_ssh(self):
         """通过SSH隧道连接数据库（开发环境）"""
+        # sshtunnel 会连带导入 paramiko，只在开发环境首次连接时加载
+        from sshtunnel import SSHTunnelForwarder
+
         # 创建SSH隧道
-        self.tunnel = SSHTunnelForwarder(
+        tunnel = SSHTunnelForwarder(
             ssh_address_or_host=(SSH_CONFIG['ssh_host'], 22),
             ssh_username=SSH_CONFIG['ssh_username'],
             ssh_password=SSH_CONFIG['ssh_password'],
@@ -48,7 +102,8 @@ class MongoDBConnector:
         )
         
         # 启动SSH隧道
-        self.tunnel.start()
+        tunnel.start()
+        MongoDBConnector._tunnel = tunnel
         logger.info("SSH tunnel established successfully")
 
         # 构建MongoDB URI并连接
@@ -60,6 +115,8 @@ class MongoDBConnector:
 
     def _connect_to_mongodb(self):
         """连接到MongoDB数据库"""
+        from pymongo import MongoClient
+
         if self.config['use_auth']:
             # 使用认证连接
             mongo_uri = (
@@ -71,23 +128,44 @@ class MongoDBConnector:
             # 无认证连接
             mongo_uri = f"mongodb://{self.config['host']}:{self.config['port']}"
         
-        # 连接MongoDB
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[self.config['database']]
+        # 连接MongoDB（连接池由 MongoClient 维护，整个进程复用）
+        MongoDBConnector._client = MongoClient(mongo_uri, **MONGO_POOL_CONFIG)
+        MongoDBConnector._db = MongoDBConnector._client[self.config['database']]
+
+    @staticmethod
+    def _reset():
+        """断开共享的客户端和隧道（调用方需持有 _lock）"""
+        cls = MongoDBConnector
+        if cls._client is not None:
+            try:
+                cls._client.close()
+            except Exception as e:
+                logger.warning(f"Error closing MongoDB client: {str(e)}")
+        if cls._tunnel is not None:
+            try:
+                cls._tunnel.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping SSH tunnel: {str(e)}")
+        cls._client = cls._db = cls._tunnel = None
+        cls._last_check = 0.0
 
     def close(self):
-        """关闭数据库连接"""
-        if self.client:
-            self.client.close()
-        if self.tunnel and DEPLOY_ENV == 'development':
-            self.tunnel.close()
-        logger.info("Database connection closed")
+        """关闭共享的数据库连接"""
+        with MongoDBConnector._lock:
+            if MongoDBConnector._client is not None:
+                self._reset()
+                logger.info("Database connection closed")
 
     def __enter__(self):
         return self.connect()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+        # 共享连接不在这里关闭；查询因连接问题失败时，下次借用前强制做健康检查
+        if exc_type is not None:
+            from pymongo.errors import ConnectionFailure
+
+            if issubclass(exc_type, ConnectionFailure):
+                MongoDBConnector._last_check = 0.0
 
     def print_collection_info(self):
         # 获取 msku_info 集合
@@ -113,5 +191,7 @@ def test_connection():
     finally:
         connector.close()
 
+atexit.register(lambda: MongoDBConnector().close())
+
 if __name__ == "__main__":
     test_connection()
@@ -1,10 +1,11 @@
 from mcp.server.fastmcp import FastMCP
-from db_connector import MongoDBConnector, get_mongo_config
+from db_connector import MongoDBConnector
+from bson_json import dumps, to_jsonable
+from paging import fetch_page
+from product_lookup import MSKU_COLLECTION, ensure_indexes, find_by_field, find_many
 import logging
+import threading
 from typing import List, Dict, Any, Optional
-import json
-from bson import json_util
-import re
 
 # Initialize FastMCP application
 mcp = FastMCP("MongoDB MCP Server")
@@ -14,8 +15,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def parse_json(data):
-    """Helper to dump MongoDB documents to JSON format compatible with MCP."""
-    return json.loads(json_util.dumps(data))
+    """Helper to convert MongoDB documents to JSON format compatible with MCP (single pass)."""
+    return to_jsonable(data)
 
 @mcp.tool()
 def list_collections() -> List[str]:
@@ -26,19 +27,33 @@ def list_collections() -> List[str]:
         return db.list_collection_names()
 
 @mcp.tool()
-def query_collection(collection_name: str, query: Dict[str, Any] = {}, limit: int = 10) -> List[Dict[str, Any]]:
+def query_collection(
+    collection_name: str,
+    query: Dict[str, Any] = {},
+    limit: int = 10,
+    projection: Optional[Dict[str, int]] = None,
+    sort: Optional[Dict[str, int]] = None,
+    resume_token: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Query a specific collection with a MongoDB find query.
+    Query a specific collection with a MongoDB find query, one page at a time.
     
     Args:
         collection_name: The name of the collection to query.
         query: MongoDB query dictionary (e.g. {"status": "active"}). Defaults to empty dict (find all).
         limit: Maximum number of documents to return. Defaults to 10.
+        projection: Fields to return, e.g. {"msku": 1, "title": 1} or {"images": 0}. Defaults to whole documents.
+        sort: Sort order, e.g. {"created_at": -1}. _id is always used as the final tie-breaker.
+            Documents missing the field are paged too (they sort first ascending, last descending).
+            Array-valued fields cannot be used as sort keys.
+        resume_token: The next_token from the previous page. Pass the same collection, query and sort to continue.
+
+    Returns:
+        {"documents": [...], "count": n, "next_token": token for the next page or null,
+         "truncated": true if the page was cut short by the server-side size cap}
     """
     with MongoDBConnector() as db:
-        collection = db[collection_name]
-        cursor = collection.find(query).limit(limit)
-        return parse_json(list(cursor))
+        return fetch_page(db[collection_name], query, limit, projection, sort, resume_token)
 
 @mcp.tool()
 def get_collection_stats(collection_name: str) -> Dict[str, Any]:
@@ -62,40 +77,71 @@ def get_collection_resource(collection_name: str) -> str:
         collection = db[collection_name]
         # Limit to 50 for resource reading to prevent overwhelming output
         cursor = collection.find({}).limit(50)
-        docs = parse_json(list(cursor))
-        return json.dumps(docs, indent=2)
+        return dumps(list(cursor), indent=True)
+
+def _find_product(field: str, value: str) -> Dict[str, Any]:
+    with MongoDBConnector() as db:
+        found = find_by_field(db[MSKU_COLLECTION], field, value)
+    found["results"] = parse_json(found["results"])
+    return found
 
 @mcp.tool()
-def find_product_by_msku(msku: str) -> List[Dict[str, Any]]:
+def find_product_by_msku(msku: str) -> Dict[str, Any]:
     """
     Search for a product specifically by its MSKU (Merchant SKU).
-    Partial matches are supported (case-insensitive).
+    Tries an exact match first, then a prefix match, then a bounded case-insensitive substring match.
+
+    Returns:
+        {"match": "exact" | "prefix" | "substring" | "none", "results": [documents]}
     """
-    with MongoDBConnector() as db:
-        # Assuming 'msku_info' is the collection name based on db_config
-        # We need to check if 'msku' or similar field exists. 
-        # Based on user request, we assume there is a field for text search.
-        # We will try to search in 'msku' field if it exists, or assuming the collection has standard fields.
-        # Since I can't see the schema, I will try searching 'msku' field.
-        collection = db['msku_info']
-        # Regex for partial match, case insensitive
-        query = {"msku": {"$regex": msku, "$options": "i"}}
-        cursor = collection.find(query).limit(20)
-        return parse_json(list(cursor))
+    return _find_product("msku", msku)
 
 @mcp.tool()
-def find_product_by_sku(sku: str) -> List[Dict[str, Any]]:
+def find_product_by_sku(sku: str) -> Dict[str, Any]:
     """
     Search for a product specifically by its SKU.
-    Partial matches are supported (case-insensitive).
+    Tries an exact match first, then a prefix match, then a bounded case-insensitive substring match.
+
+    Returns:
+        {"match": "exact" | "prefix" | "substring" | "none", "results": [documents]}
+    """
+    return _find_product("sku", sku)
+
+@mcp.tool()
+def find_products_by_mskus(identifiers: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Look up many products at once by MSKU, SKU or ASIN (exact, case-insensitive) in a single query.
+    Prefer this over calling find_product_by_msku repeatedly.
+
+    Args:
+        identifiers: List of MSKUs / SKUs / ASINs.
+        fields: Optional list of fields to return (msku, sku and asin are always included).
+            Defaults to whole documents.
+
+    Returns:
+        {"results": {identifier: [documents]}, "misses": [identifiers with no match]}
     """
     with MongoDBConnector() as db:
-        collection = db['msku_info']
-        # Try searching in 'sku' field (common naming convention)
-        # If schema is different, this might need adjustment.
-        query = {"sku": {"$regex": sku, "$options": "i"}}
-        cursor = collection.find(query).limit(20)
-        return parse_json(list(cursor))
+        found = find_many(db[MSKU_COLLECTION], identifiers, fields)
+    found["results"] = {
+        identifier: parse_json(docs)
+        for identifier, docs in found["results"].items()
+    }
+    return found
+
+def ensure_lookup_indexes():
+    """
+    Create the case-insensitive lookup indexes on msku_info (idempotent).
+    Failures are logged only; lookups still work, just without index support.
+    """
+    try:
+        with MongoDBConnector() as db:
+            ensure_indexes(db[MSKU_COLLECTION])
+        logger.info(f"Lookup indexes ready on {MSKU_COLLECTION}")
+    except Exception as e:
+        logger.warning(f"Could not ensure lookup indexes on {MSKU_COLLECTION}: {e}")
 
 if __name__ == "__main__":
+    # 在后台建索引，不阻塞 MCP 握手
+    threading.Thread(target=ensure_lookup_indexes, name="mongo-indexes", daemon=True).start()
     mcp.run()
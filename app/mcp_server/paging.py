@@ -0,0 +1,243 @@
+"""
+query_collection 的投影、排序与游标分页
+
+- 排序键末尾总是补上 _id，保证顺序唯一
+- resume token 记录上一页最后一条文档的排序键值 (keyset)，下一页从它之后继续，
+  不需要 skip 从头重扫；token 绑定集合 + 查询 + 排序，换了条件不能复用
+- 单页受条数 limit 与返回字节数 max_bytes 双重限制 (至少返回一条，保证分页能前进)
+
+MongoDB 按类型括号排序 (缺失/null < 数字 < 字符串 < 对象 < 二进制 < ObjectId < 布尔 < 日期 ...)，
+而 $gt / $lt 只在同一括号内比较。所以 keyset 条件对每个排序键除了括号内的比较，
+还要用 null / $type 分支接上排在后面的其他括号，稀疏字段、混合类型字段翻页才不会丢文档。
+数组字段按元素排序，无法用 keyset 表达，不支持作为排序键。
+"""
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson_json import dumps, to_jsonable
+from db_config import QUERY_MAX_BYTES
+
+SortSpec = List[Tuple[str, int]]
+
+
+def normalize_sort(sort: Optional[Dict[str, int]]) -> SortSpec:
+    """{"field": 1 | -1} -> [(field, 1 | -1), ..., ("_id", 方向)]"""
+    spec = []
+    for field, direction in (sort or {}).items():
+        if direction not in (1, -1):
+            raise ValueError(f"Sort direction for {field} must be 1 or -1")
+        spec.append((field, direction))
+    if "_id" not in {field for field, _ in spec}:
+        spec.append(("_id", spec[-1][1] if spec else 1))
+    return spec
+
+
+def _fingerprint(collection_name: str, query: Dict[str, Any], sort: SortSpec) -> str:
+    from bson import json_util
+
+    raw = json_util.dumps([collection_name, query, sort], sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def encode_token(fingerprint: str, values: List[Any]) -> str:
+    from bson import json_util
+
+    # json_util 保留 ObjectId / datetime 等类型，解码后可以直接用于比较
+    raw = json_util.dumps({"f": fingerprint, "after": values})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str, fingerprint: str) -> List[Any]:
+    from bson import json_util
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json_util.loads(raw)
+        after = data["after"]
+        matches = data["f"] == fingerprint
+    except Exception:
+        raise ValueError("Invalid resume token") from None
+    if not matches:
+        raise ValueError("Resume token does not match this collection, query and sort")
+    return after
+
+
+# MongoDB 跨类型比较顺序，每组是一个类型括号的 $type 别名 (null 括号同时包含缺失字段)
+_TYPE_BRACKETS = (
+    ("null",),
+    ("double", "int", "long", "decimal"),
+    ("string", "symbol"),
+    ("object",),
+    ("binData",),
+    ("objectId",),
+    ("bool",),
+    ("date",),
+    ("timestamp",),
+    ("regex",),
+)
+
+
+def _bracket(value: Any) -> int:
+    """排序键值所在的类型括号下标"""
+    import datetime
+    import re
+
+    from bson import Binary, Decimal128, ObjectId, Regex, Timestamp
+
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 6
+    for index, types in (
+        (1, (int, float, Decimal128)),
+        (2, str),
+        (3, dict),
+        (4, (bytes, Binary)),
+        (5, ObjectId),
+        (7, datetime.datetime),
+        (8, Timestamp),
+        (9, (Regex, re.Pattern)),
+    ):
+        if isinstance(value, types):
+            return index
+    raise ValueError(f"Cannot page on sort value of type {type(value).__name__}")
+
+
+def _after(field: str, direction: int, value: Any) -> List[Dict[str, Any]]:
+    """排序键 field 严格排在 value 之后的条件 (各条件之间为 or)"""
+    bracket = _bracket(value)
+    conditions = []
+    if bracket:
+        # 缺失 / null 只有一个值，括号内没有"之后"
+        conditions.append({field: {"$gt" if direction == 1 else "$lt": value}})
+    if direction == 1:
+        later = _TYPE_BRACKETS[bracket + 1:]
+    else:
+        later = _TYPE_BRACKETS[:bracket]
+        if bracket:
+            # 降序时缺失 / null 排在最后；{field: None} 同时匹配 null 与缺失
+            conditions.append({field: None})
+            later = later[1:]
+    aliases = [alias for group in later for alias in group]
+    if aliases:
+        conditions.append({field: {"$type": aliases}})
+    return conditions
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """排在 values 之后的文档：(k1 在 v1 之后) or (k1 = v1 and k2 在 v2 之后) or ..."""
+    branches = []
+    for i, ((field, direction), value) in enumerate(zip(sort, values, strict=True)):
+        # {k: None} 同时匹配 null 与缺失，与排序时二者相等一致
+        equal = {f: v for (f, _), v in zip(sort[:i], values[:i], strict=True)}
+        branches.extend({**equal, **condition} for condition in _after(field, direction, value))
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _pop_path(doc: Dict[str, Any], path: str):
+    """删除 a.b.c，并清理因此变空的父级"""
+    head, _, rest = path.partition(".")
+    if not rest:
+        doc.pop(head, None)
+        return
+    child = doc.get(head)
+    if isinstance(child, dict):
+        _pop_path(child, rest)
+        if not child:
+            doc.pop(head)
+
+
+def _covers(path: str, field: str) -> bool:
+    return field == path or field.startswith(path + ".")
+
+
+def prepare_projection(
+    projection: Optional[Dict[str, int]], sort: SortSpec
+) -> Tuple[Optional[Dict[str, int]], List[str]]:
+    """
+    保证排序键会被查询出来 (生成 token 需要)。
+    返回 (实际使用的投影, 调用方没要求、返回前需要删掉的字段)
+    """
+    if not projection:
+        return None, []
+    projection = dict(projection)
+    inclusive = any(v for f, v in projection.items() if f != "_id")
+    hidden = []
+    for field, _ in sort:
+        if field == "_id" or not inclusive:
+            if any(_covers(p, field) for p, v in projection.items() if not v and p != field):
+                raise ValueError(f"Projection cannot exclude sort field {field}")
+            if projection.get(field, 1):
+                continue
+            del projection[field]
+        elif any(_covers(p, field) for p, v in projection.items() if v):
+            continue
+        else:
+            projection[field] = 1
+        hidden.append(field)
+    return projection, hidden
+
+
+def fetch_page(
+    collection,
+    query: Optional[Dict[str, Any]] = None,
+    limit: int = 10,
+    projection: Optional[Dict[str, int]] = None,
+    sort: Optional[Dict[str, int]] = None,
+    resume_token: Optional[str] = None,
+    max_bytes: int = QUERY_MAX_BYTES,
+) -> Dict[str, Any]:
+    """
+    查询一页文档，返回
+    {"documents": [...], "count": n, "next_token": 下一页的 token 或 None, "truncated": 是否因字节上限提前截断}
+    """
+    query = query or {}
+    limit = max(1, int(limit))
+    spec = normalize_sort(sort)
+    fingerprint = _fingerprint(collection.name, query, spec)
+    find_projection, hidden = prepare_projection(projection, spec)
+
+    filter_ = query
+    if resume_token:
+        after = keyset_filter(spec, decode_token(resume_token, fingerprint))
+        filter_ = {"$and": [query, after]} if query else after
+
+    # 多取一条判断是否还有下一页
+    cursor = collection.find(filter_, find_projection).sort(spec).limit(limit + 1)
+
+    documents: List[Dict[str, Any]] = []
+    size = 2  # "[]"
+    last_values = None
+    has_more = truncated = False
+    for doc in cursor:
+        if len(documents) == limit:
+            has_more = True
+            break
+        values = [_get_path(doc, field) for field, _ in spec]
+        for field in hidden:
+            _pop_path(doc, field)
+        converted = to_jsonable(doc)
+        doc_size = len(dumps(converted).encode()) + 1
+        if documents and size + doc_size > max_bytes:
+            has_more = truncated = True
+            break
+        documents.append(converted)
+        size += doc_size
+        last_values = values
+
+    return {
+        "documents": documents,
+        "count": len(documents),
+        "next_token": encode_token(fingerprint, last_values) if has_more else None,
+        "truncated": truncated,
+    }
@@ -0,0 +1,125 @@
+"""
+msku_info 的 MSKU / SKU 查找
+
+按代价从低到高依次尝试，命中即返回：
+1. exact     - 不区分大小写的精确匹配 (走 collation 索引)
+2. prefix    - 不区分大小写的前缀范围查询 [value, value + U+FFFF) (走 collation 索引)
+3. substring - 不区分大小写的子串匹配 (全表扫描，限制条数和执行时间)
+
+大小写不敏感靠 collation (strength=2)，查询与索引使用同一个 collation 才能命中索引；
+不在文档里写派生字段，新插入 / 更新的文档无需额外处理。
+查找路径只读：索引在 MCP server 启动时建立 (create_index 幂等)，也可 `make mongo-indexes` 单独执行。
+
+用户输入一律 re.escape，不会被当作正则执行。
+
+批量查找 find_many 只做精确匹配：所有标识合成一次 $in 查询，按标识归组结果。
+"""
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from db_config import LOOKUP_SCAN_MAX_TIME_MS
+
+logger = logging.getLogger(__name__)
+
+MSKU_COLLECTION = "msku_info"
+
+# 不区分大小写 (忽略大小写，区分重音)
+CASE_INSENSITIVE = {"locale": "en", "strength": 2}
+
+LOOKUP_FIELDS = ("msku", "sku")
+
+# 批量查找还可按 ASIN 匹配
+BATCH_FIELDS = ("msku", "sku", "asin")
+
+
+def normalize(value: str) -> str:
+    return str(value).strip().upper()
+
+
+def ensure_indexes(collection):
+    """为 msku / sku / asin 建不区分大小写的 collation 索引 (已存在时不做任何事)"""
+    for field in BATCH_FIELDS:
+        collection.create_index([(field, 1)], name=f"{field}_ci", collation=CASE_INSENSITIVE)
+
+
+def _exact_query(field: str, value: str) -> Dict[str, Any]:
+    return {field: value.strip()}
+
+
+def _prefix_query(field: str, value: str) -> Dict[str, Any]:
+    # 正则不受 collation 影响也用不上 collation 索引；改用范围查询，
+    # U+FFFF 在 ICU 排序中权重最大，[value, value + U+FFFF) 即以 value 开头的全部字符串
+    value = value.strip()
+    return {field: {"$gte": value, "$lt": value + "\uffff"}}
+
+
+def _substring_query(field: str, value: str) -> Dict[str, Any]:
+    return {field: {"$regex": re.escape(value.strip()), "$options": "i"}}
+
+
+def find_by_field(collection, field: str, value: str, limit: int = 20) -> Dict[str, Any]:
+    """
+    依次尝试 exact / prefix / substring，返回
+    {"match": 命中的路径或 "none", "results": 文档列表}
+    """
+    if field not in LOOKUP_FIELDS:
+        raise ValueError(f"Unsupported lookup field: {field}")
+    value = str(value)
+    if not value.strip():
+        return {"match": "none", "results": []}
+
+    for match, build in (("exact", _exact_query), ("prefix", _prefix_query)):
+        docs = list(collection.find(build(field, value), collation=CASE_INSENSITIVE).limit(limit))
+        if docs:
+            return {"match": match, "results": docs}
+
+    from pymongo.errors import ExecutionTimeout
+
+    try:
+        docs = list(
+            collection.find(_substring_query(field, value)).limit(limit).max_time_ms(LOOKUP_SCAN_MAX_TIME_MS)
+        )
+    except ExecutionTimeout:
+        logger.warning(f"Substring scan for {field}={value!r} exceeded {LOOKUP_SCAN_MAX_TIME_MS}ms")
+        return {"match": "none", "results": [], "timed_out": True}
+    return {"match": "substring" if docs else "none", "results": docs}
+
+
+def find_many(collection, identifiers: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    一次 $in 查询解析多个 MSKU / SKU / ASIN (均为精确匹配，忽略大小写)。
+    返回 {"results": {标识: [文档]}, "misses": [未命中的标识]}；
+    fields 指定时只返回这些字段 (外加用于归属的 msku / sku / asin)。
+    """
+    identifiers = list(dict.fromkeys(str(i).strip() for i in identifiers if str(i).strip()))
+    if not identifiers:
+        return {"results": {}, "misses": []}
+
+    by_norm: Dict[str, List[str]] = {}
+    for identifier in identifiers:
+        by_norm.setdefault(normalize(identifier), []).append(identifier)
+
+    query = {"$or": [{field: {"$in": identifiers}} for field in BATCH_FIELDS]}
+    projection = {field: 1 for field in (*fields, *BATCH_FIELDS)} if fields else None
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for doc in collection.find(query, projection, collation=CASE_INSENSITIVE):
+        matched = {normalize(doc[f]) for f in BATCH_FIELDS if isinstance(doc.get(f), str)}
+        for norm in matched & by_norm.keys():
+            for identifier in by_norm[norm]:
+                results.setdefault(identifier, []).append(doc)
+
+    return {
+        "results": {i: results[i] for i in identifiers if i in results},
+        "misses": [i for i in identifiers if i not in results],
+    }
+
+
+if __name__ == "__main__":
+    # 单独建索引：make mongo-indexes
+    from db_connector import MongoDBConnector
+
+    with MongoDBConnector() as db:
+        ensure_indexes(db[MSKU_COLLECTION])
+    logger.info(f"Indexes ready on {MSKU_COLLECTION}")
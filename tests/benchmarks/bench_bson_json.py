@@ -0,0 +1,94 @@
+"""
+MCP server BSON -> JSON 基准：json_util 往返 (旧实现) vs 单遍转换
+
+    make bench
+    uv run python tests/benchmarks/bench_bson_json.py --docs 10000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+
+from bson import Binary, Decimal128, ObjectId, json_util
+
+# MCP server 以脚本方式运行，模块之间是平铺导入
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "app", "mcp_server")
+)
+
+from bson_json import dumps, orjson, to_jsonable
+
+
+def synthetic_msku_info(docs: int, seed: int = 0):
+    """按 msku_info 的字段形态构造文档 (ObjectId / datetime / Decimal128 / 二进制)"""
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    records = []
+    for i in range(docs):
+        msku = f"HB-{i:05d}-{rng.choice(['US', 'CA', 'UK'])}"
+        records.append({
+            "_id": ObjectId(),
+            "msku": msku,
+            "sku": f"SKU{i:06d}",
+            "asin": f"B0{rng.randrange(16 ** 8):08X}",
+            "title": f"Product {i} " + "x" * rng.randint(20, 80),
+            "store_name": f"STORE-{i % 40:02d}",
+            "price": Decimal128(f"{rng.uniform(5, 200):.2f}"),
+            "cost": rng.uniform(1, 50),
+            "stock": rng.randint(0, 1000),
+            "active": rng.random() > 0.2,
+            "tags": [f"tag{rng.randint(0, 9)}" for _ in range(3)],
+            "dimensions": {"length": rng.uniform(1, 50), "width": rng.uniform(1, 50), "unit": "cm"},
+            "thumbnail": Binary(os.urandom(32)),
+            "created_at": start + datetime.timedelta(minutes=rng.randint(0, 500000)),
+            "updated_at": start + datetime.timedelta(seconds=rng.randint(0, 10 ** 7), milliseconds=rng.randint(0, 999)),
+        })
+    return records
+
+
+def legacy_parse_json(docs):
+    """旧实现：json_util.dumps 成字符串再 json.loads 回来"""
+    return json.loads(json_util.dumps(docs))
+
+
+def legacy_resource(docs):
+    """旧实现：往返之后再 indent=2 dumps 一次"""
+    return json.dumps(legacy_parse_json(docs), indent=2)
+
+
+def _best_of(fn, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    docs = synthetic_msku_info(args.docs)
+    expected = legacy_parse_json(docs)
+    assert to_jsonable(docs) == expected
+    assert json.loads(dumps(docs, indent=True)) == expected
+
+    print(f"encoder: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    for name, fn in [
+        ("json_util round trip", legacy_parse_json),
+        ("to_jsonable", to_jsonable),
+        ("json_util + indent", legacy_resource),
+        ("dumps(indent)", lambda d: dumps(d, indent=True)),
+    ]:
+        seconds = _best_of(fn, docs, args.repeat)
+        print(f"{name:22s} {seconds * 1000:8.1f} ms  {args.docs / seconds:12,.0f} docs/sec")
+
+
+if __name__ == "__main__":
+    main()
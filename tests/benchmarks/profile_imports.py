@@ -0,0 +1,92 @@
+"""
+导入耗时报告
+
+在全新解释器中以 -X importtime 导入目标模块，按累计耗时列出最重的模块
+以及按顶层包汇总的自身耗时，用于排查启动变慢：
+
+    make profile-imports
+    uv run python tests/benchmarks/profile_imports.py app.agent --top 30
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ImportCost(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> List[ImportCost]:
+    """解析 -X importtime 的 stderr 输出"""
+    costs = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 表头
+        costs.append(
+            ImportCost(fields[2].strip(), int(fields[0]), int(fields[1]))
+        )
+    return costs
+
+
+def profile_imports(module: str, python: str = sys.executable) -> List[ImportCost]:
+    """在子进程中冷启动导入 module，返回每个模块的导入耗时"""
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def package_totals(costs: List[ImportCost], depth: int = 1) -> Dict[str, int]:
+    """按包名前 depth 段汇总自身耗时 (微秒)"""
+    totals: Dict[str, int] = defaultdict(int)
+    for cost in costs:
+        totals[".".join(cost.module.split(".")[:depth])] += cost.self_us
+    return dict(totals)
+
+
+def format_report(costs: List[ImportCost], top: int = 25) -> str:
+    total_us = sum(c.self_us for c in costs)
+    lines = [f"total import time: {total_us / 1e6:.3f}s across {len(costs)} modules", ""]
+
+    lines.append(f"{'cumulative(ms)':>14} {'self(ms)':>9}  module")
+    for cost in sorted(costs, key=lambda c: c.cumulative_us, reverse=True)[:top]:
+        lines.append(
+            f"{cost.cumulative_us / 1000:>14.1f} {cost.self_us / 1000:>9.1f}  {cost.module}"
+        )
+
+    lines += ["", f"{'self(ms)':>14} {'share':>9}  package"]
+    totals = sorted(package_totals(costs, depth=2).items(), key=lambda kv: kv[1], reverse=True)
+    for package, self_us in totals[:top]:
+        share = self_us / total_us if total_us else 0
+        lines.append(f"{self_us / 1000:>14.1f} {share:>9.1%}  {package}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="模块导入耗时报告")
+    parser.add_argument("module", nargs="?", default="app.agent")
+    parser.add_argument("--top", type=int, default=25, help="显示的条目数")
+    args = parser.parse_args(argv)
+
+    print(format_report(profile_imports(args.module), args.top))
+
+
+if __name__ == "__main__":
+    main()
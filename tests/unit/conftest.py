@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_response_cache():
+    """每个用例使用干净的进程级响应缓存"""
+    from app.lingxing_agent.core.cache import get_response_cache
+
+    cache = get_response_cache()
+    if cache is not None:
+        cache.clear()
+    yield
+    if cache is not None:
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_snapshot_store(tmp_path, monkeypatch):
+    """利润快照写入临时目录，避免用例之间相互影响"""
+    from app.lingxing_agent.core import snapshot
+
+    monkeypatch.setattr(snapshot, "_snapshot_store", snapshot.ProfitSnapshotStore(str(tmp_path / "snapshots")))
+    yield
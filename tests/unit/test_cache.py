@@ -0,0 +1,159 @@
+"""
+Unit tests for app.lingxing_agent.core.cache
+
+Tests:
+1. ttl_for_request - settled vs unsettled vs current month vs undated requests
+2. ResponseCache - LRU eviction, expiry, disk tier, stats
+3. LingXingClient - cache hits skip the upstream call
+"""
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class TestTtlPolicy:
+    """Tests for TTL selection."""
+
+    def test_closed_month_long_ttl(self):
+        """测试：区间全部在已结束月份时长期缓存"""
+        from app.lingxing_agent.core.cache import ttl_for_request
+        from app.lingxing_agent.core.config import CACHE_CLOSED_MONTH_TTL
+
+        ttl, closed = ttl_for_request(
+            "https://x/api", {"startDate": "2025-01-01", "endDate": "2025-01-31"},
+            now=datetime(2025, 3, 5),
+        )
+        assert (ttl, closed) == (CACHE_CLOSED_MONTH_TTL, True)
+
+    def test_current_month_short_ttl(self):
+        """测试：区间包含当前月份时短 TTL"""
+        from app.lingxing_agent.core.cache import ttl_for_request
+        from app.lingxing_agent.core.config import CACHE_OPEN_MONTH_TTL
+
+        ttl, closed = ttl_for_request(
+            "https://x/api", {"start_date": "2025-02-01", "end_date": "2025-03-31"},
+            now=datetime(2025, 3, 5),
+        )
+        assert (ttl, closed) == (CACHE_OPEN_MONTH_TTL, False)
+
+    def test_unsettled_previous_month_short_ttl(self):
+        """测试：上个月仍在结算期内 (次月 3 日) 时按未结束月份处理，不写磁盘层"""
+        from app.lingxing_agent.core.cache import ttl_for_request
+        from app.lingxing_agent.core.config import CACHE_CLOSED_MONTH_TTL, CACHE_OPEN_MONTH_TTL
+
+        payload = {"startDate": "2025-02-01", "endDate": "2025-02-28"}
+        assert ttl_for_request("https://x/api", payload, now=datetime(2025, 3, 3)) == (CACHE_OPEN_MONTH_TTL, False)
+        assert ttl_for_request("https://x/api", payload, now=datetime(2025, 3, 20)) == (CACHE_CLOSED_MONTH_TTL, True)
+
+    def test_query_string_and_month_format(self):
+        """测试：GET 查询串与 YYYY-MM 格式的日期"""
+        from app.lingxing_agent.core.cache import ttl_for_request, query_months
+
+        url = "https://x/api?start_date=2024-12-01&end_date=2024-12-31&sid_list=1"
+        assert query_months(url) == [(2024, 12), (2024, 12)]
+        assert ttl_for_request("https://x/api", {"startDate": "2024-11", "endDate": "2024-11"},
+                               now=datetime(2025, 1, 1))[1] is True
+
+    def test_undated_request_default_ttl(self):
+        """测试：不带日期的查询使用默认 TTL"""
+        from app.lingxing_agent.core.cache import ttl_for_request
+        from app.lingxing_agent.core.config import CACHE_DEFAULT_TTL
+
+        assert ttl_for_request("https://x/api", {"search_value": "SKU"}) == (CACHE_DEFAULT_TTL, False)
+
+
+class TestResponseCache:
+    """Tests for the LRU/TTL cache."""
+
+    def test_lru_eviction(self):
+        """测试：超过容量时淘汰最久未使用的条目"""
+        from app.lingxing_agent.core.cache import ResponseCache
+
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        assert cache.get("a") == 1
+        cache.set("c", 3, ttl=60)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 3
+        assert stats["misses"] == 1
+
+    def test_expired_entry_is_miss(self):
+        """测试：过期条目视为未命中"""
+        from app.lingxing_agent.core.cache import ResponseCache
+
+        cache = ResponseCache()
+        cache.set("a", 1, ttl=-1)
+        cache._store("b", 2, expires_at=0)
+
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        """测试：已结束月份写入磁盘层，新实例可直接读取"""
+        from app.lingxing_agent.core.cache import DiskCache, ResponseCache
+
+        first = ResponseCache(disk=DiskCache(str(tmp_path)))
+        first.set("closed", {"rows": [1, 2]}, ttl=3600, persist=True)
+        first.set("open", {"rows": [3]}, ttl=3600, persist=False)
+
+        second = ResponseCache(disk=DiskCache(str(tmp_path)))
+        assert second.get("closed") == {"rows": [1, 2]}
+        assert second.get("open") is None
+        assert second.stats()["disk_hits"] == 1
+
+
+class TestClientCache:
+    """Tests for caching inside LingXingClient."""
+
+    def test_repeat_request_served_from_cache(self):
+        """测试：相同请求第二次命中缓存，不再请求上游"""
+        from app.lingxing_agent.core.cache import ResponseCache
+        from app.lingxing_agent.core.client import LingXingClient
+
+        session = MagicMock()
+        session.request.return_value.status_code = 200
+        session.request.return_value.json.return_value = {"data": {"list": []}}
+        cache = ResponseCache()
+        client = LingXingClient(token="t", session=session, cache=cache)
+
+        payload = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+        first = client._post("https://erp.lingxing.com/api/x", payload)
+        second = client._post("https://erp.lingxing.com/api/x", dict(reversed(payload.items())))
+
+        assert first == second
+        assert session.request.call_count == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_error_body_not_cached(self):
+        """测试：HTTP 200 的业务错误 / 限流响应不写入缓存，下次重新请求"""
+        from app.lingxing_agent.core.cache import ResponseCache
+        from app.lingxing_agent.core.client import LingXingClient
+
+        session = MagicMock()
+        session.request.return_value.status_code = 200
+        session.request.return_value.json.side_effect = [
+            {"code": 429, "msg": "请求过于频繁", "data": None},
+            {"code": 0, "msg": "系统繁忙"},
+            {"code": 0, "data": {"list": [1]}},
+        ]
+        cache = ResponseCache()
+        client = LingXingClient(token="t", session=session, cache=cache)
+
+        payload = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+        results = [client._post("https://erp.lingxing.com/api/x", payload) for _ in range(4)]
+
+        assert results[-1] == {"code": 0, "data": {"list": [1]}}
+        assert session.request.call_count == 3
+        assert cache.stats()["hits"] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,305 @@
+"""
+Unit tests for app.lingxing_agent.core.client
+
+Tests:
+1. Shared pooled HTTP session
+2. TokenManager - caching, single-flight refresh, auth-failure retry
+3. AsyncLingXingClient - async twin of the report methods
+4. Store filters - sids passed through to the report payloads
+5. Profit aggregation - columnar groupby by storeName
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+
+
+# ==================== Test pooled session ====================
+
+class TestPooledSession:
+    """Tests for the process-wide HTTP session."""
+
+    def test_clients_share_one_session(self):
+        """测试：多个客户端复用同一个 Session"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        a = LingXingClient(token="t1")
+        b = LingXingClient(token="t2")
+
+        assert a.session is b.session
+
+    def test_session_mounts_per_host_pools(self):
+        """测试：按域名挂载独立连接池"""
+        from app.lingxing_agent.core.http import get_session
+        from app.lingxing_agent.core.config import HTTP_POOL_MAXSIZE
+
+        session = get_session()
+        for host, maxsize in HTTP_POOL_MAXSIZE.items():
+            adapter = session.get_adapter(f"https://{host}/any")
+            assert adapter._pool_maxsize == maxsize
+
+    def test_post_uses_session_with_timeout(self):
+        """测试：请求走共享 Session 且带超时"""
+        from app.lingxing_agent.core.client import LingXingClient
+        from app.lingxing_agent.core.http import get_timeout
+
+        session = MagicMock()
+        session.request.return_value.status_code = 200
+        session.request.return_value.json.return_value = {"code": 0}
+
+        client = LingXingClient(token="t", session=session)
+        result = client._post("https://erp.lingxing.com/api/x", {"a": 1})
+
+        assert result == {"code": 0}
+        _, kwargs = session.request.call_args
+        assert kwargs["timeout"] == get_timeout()
+
+
+# ==================== Test TokenManager ====================
+
+class TestTokenManager:
+    """Tests for the shared token manager."""
+
+    def test_token_cached_across_calls(self):
+        """测试：TTL 内复用 token，只登录一次"""
+        from app.lingxing_agent.core.auth import TokenManager
+
+        auth = MagicMock()
+        auth.login.return_value = "tok-1"
+        manager = TokenManager(auth=auth, ttl=60)
+
+        assert manager.get_token() == "tok-1"
+        assert manager.get_token() == "tok-1"
+        assert auth.login.call_count == 1
+        assert manager.stats()["hits"] == 1
+        assert manager.stats()["refreshes"] == 1
+
+    def test_expired_token_relogin(self):
+        """测试：token 过期后重新登录"""
+        from app.lingxing_agent.core.auth import TokenManager
+
+        auth = MagicMock()
+        auth.login.side_effect = ["tok-1", "tok-2"]
+        manager = TokenManager(auth=auth, ttl=0)
+
+        assert manager.get_token() == "tok-1"
+        assert manager.get_token() == "tok-2"
+
+    def test_concurrent_refresh_single_flight(self):
+        """测试：并发刷新同一个失效 token 只登录一次"""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from app.lingxing_agent.core.auth import TokenManager
+
+        logins = []
+
+        def slow_login():
+            time.sleep(0.05)
+            logins.append(1)
+            return f"tok-{len(logins)}"
+
+        auth = MagicMock()
+        auth.login.side_effect = slow_login
+        manager = TokenManager(auth=auth, ttl=60)
+        stale = manager.get_token()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            tokens = list(executor.map(lambda _: manager.refresh(stale), range(20)))
+
+        assert set(tokens) == {"tok-2"}
+        assert len(logins) == 2
+
+    @patch('app.lingxing_agent.core.client.token_manager')
+    def test_auth_failure_refreshes_and_retries(self, mock_manager):
+        """测试：鉴权失败时刷新 token 并重试一次"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        mock_manager.get_token.return_value = "old"
+        mock_manager.refresh.return_value = "new"
+
+        expired = MagicMock(status_code=200)
+        expired.json.return_value = {"code": 401, "msg": "token expired"}
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"code": 0, "data": {}}
+        session = MagicMock()
+        session.request.side_effect = [expired, ok]
+
+        client = LingXingClient(session=session)
+        result = client._post("https://erp.lingxing.com/api/x", {})
+
+        assert result == {"code": 0, "data": {}}
+        mock_manager.refresh.assert_called_once_with("old")
+        assert client.headers["auth-token"] == "new"
+
+
+
+# ==================== Test AsyncLingXingClient ====================
+
+def _mock_async_session(handler):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestAsyncClient:
+    """Tests for AsyncLingXingClient."""
+
+    @pytest.mark.asyncio
+    async def test_async_pagination_and_aggregation(self):
+        """测试：异步利润报表分页并按店铺聚合"""
+        import json
+        import httpx
+        from app.lingxing_agent.core.async_client import AsyncLingXingClient
+
+        offsets = []
+
+        def handler(request):
+            payload = json.loads(request.content)
+            offsets.append(payload["offset"])
+            if payload["offset"] == 0:
+                records = [{"storeName": "HB-US", "grossProfit": "1.5"}] * 200
+            else:
+                records = [{"storeName": "BN-US", "grossProfit": 2}]
+            return httpx.Response(200, json={"data": {"records": records}})
+
+        client = AsyncLingXingClient(token="t", session=_mock_async_session(handler))
+        result = await client.get_profit_data("2025-01-01", "2025-01-31")
+
+        assert offsets == [0, 200]
+        by_store = {r["storeName"]: r for r in result}
+        assert by_store["HB-US"]["grossProfit"] == 300.0
+        assert by_store["BN-US"]["grossProfit"] == 2
+
+    @pytest.mark.asyncio
+    async def test_async_lookup_uses_same_payload(self):
+        """测试：异步 request_* 与同步客户端发送相同的请求"""
+        import json
+        import httpx
+        from app.lingxing_agent.core.async_client import AsyncLingXingClient
+        from app.lingxing_agent.core.client import LingXingClient
+
+        seen = {}
+
+        def handler(request):
+            seen["url"] = str(request.url)
+            seen["json"] = json.loads(request.content)
+            seen["token"] = request.headers["auth-token"]
+            return httpx.Response(200, json={"data": {"list": []}})
+
+        client = AsyncLingXingClient(token="t", session=_mock_async_session(handler))
+        result = await client.request_deliver_page("MSKU-1")
+
+        url, payload = LingXingClient(token="t")._deliver_page_request("MSKU-1")
+        assert result == {"data": {"list": []}}
+        assert seen == {"url": url, "json": payload, "token": "t"}
+
+
+# ==================== Test store filters ====================
+
+class TestStoreFilters:
+    """Tests for server-side sid filtering."""
+
+    def test_profit_and_purchase_payload_carry_sids(self):
+        """测试：sids 写入利润报表与采购计划的请求参数"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        client = LingXingClient(token="t", session=MagicMock())
+        client._post = MagicMock(return_value={"data": {"records": [], "list": []}})
+
+        client.get_profit_data("2025-01-01", "2025-01-31", sids=["505674"])
+        client.get_purchase_plan("2025-01-01", "2025-01-31", sids=["505674"])
+
+        profit_payload = client._post.call_args_list[0][0][1]
+        purchase_payload = client._post.call_args_list[1][0][1]
+        assert profit_payload["sids"] == ["505674"]
+        assert purchase_payload["sids"] == ["505674"]
+
+    def test_default_requests_all_stores(self):
+        """测试：不传 sids 时保持原来的全店铺查询"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        _, payload = LingXingClient(token="t")._profit_request("2025-01-01", "2025-01-31")
+
+        assert payload["sids"] == []
+
+    def test_single_store_analysis_requests_only_that_store(self):
+        """测试：单店分析只请求该店铺的利润与采购数据"""
+        from app.lingxing_agent.tools.metrics import LingXingMetricsService
+
+        client = MagicMock()
+        client.get_profit_data.return_value = [{"storeName": "BT-US", "totalFbaAndFbmAmount": 100}]
+        client.iter_purchase_plan.return_value = iter([])
+        client.iter_delivery_plan.return_value = iter([])
+        client.iter_fba_out.return_value = iter([])
+
+        LingXingMetricsService(client).get_store_cost_structure("BT-US", 2024, 1)
+
+        client.get_profit_data.assert_called_once_with(
+            "2024-01-01", "2024-01-31", sids=["505674"], use_cache=False
+        )
+        client.iter_purchase_plan.assert_called_once_with("2024-01-01", "2024-01-31", ["505674"])
+
+
+# ==================== Test profit aggregation ====================
+
+class TestProfitAggregation:
+    """Tests for the columnar profit-report aggregation."""
+
+    def test_numeric_strings_summed_per_store(self):
+        """测试：数字字符串与数字按店铺求和，非数值字段取首条记录"""
+        from app.lingxing_agent.core.client import BaseLingXingClient
+
+        records = [
+            {"storeName": "HB-US", "grossProfit": "1.5", "totalSalesQuantity": 2, "currencyCode": "USD"},
+            {"storeName": "BN-US", "grossProfit": "4", "totalSalesQuantity": 1, "currencyCode": "USD"},
+            {"storeName": "HB-US", "grossProfit": "2.25", "totalSalesQuantity": 3, "currencyCode": "CAD"},
+            {"storeName": "", "grossProfit": "100", "totalSalesQuantity": 9, "currencyCode": "USD"},
+        ]
+
+        result = BaseLingXingClient._aggregate_profit_records(records)
+
+        assert list(result) == ["HB-US", "BN-US"]
+        assert result["HB-US"] == {
+            "storeName": "HB-US", "grossProfit": 3.75, "totalSalesQuantity": 5, "currencyCode": "USD",
+        }
+        assert result["BN-US"]["grossProfit"] == 4.0
+
+    def test_irregular_values_fall_back(self):
+        """测试：个别记录缺字段或含非数字值时忽略该值"""
+        from app.lingxing_agent.core.client import BaseLingXingClient
+
+        records = [
+            {"storeName": "A", "grossProfit": "1"},
+            {"storeName": "A", "grossProfit": None},
+            {"storeName": "A", "grossProfit": "n/a"},
+            {"storeName": "A"},
+            {"storeName": "A", "grossProfit": 2},
+        ]
+
+        result = BaseLingXingClient._aggregate_profit_records(records)
+
+        assert result["A"]["grossProfit"] == 3.0
+
+    def test_blank_first_record_column_still_summed(self):
+        """测试：首条记录某列为空时，该列在其他店铺仍按数值求和"""
+        from app.lingxing_agent.core.client import BaseLingXingClient
+
+        records = [
+            {"storeName": "A", "grossProfit": "1", "totalAdsCost": ""},
+            {"storeName": "B", "grossProfit": "2", "totalAdsCost": "7"},
+            {"storeName": "B", "grossProfit": "3", "totalAdsCost": None, "promotionFee": 4},
+        ]
+
+        result = BaseLingXingClient._aggregate_profit_records(records)
+
+        assert result["B"]["totalAdsCost"] == 7.0
+        assert result["A"]["totalAdsCost"] == 0.0
+        assert result["B"]["grossProfit"] == 5.0
+        assert result["B"]["promotionFee"] == 4
+
+    def test_empty_response(self):
+        """测试：空响应返回空结果"""
+        from app.lingxing_agent.core.client import BaseLingXingClient
+
+        assert BaseLingXingClient._aggregate_profit_records([]) == {}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
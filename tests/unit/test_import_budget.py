@@ -0,0 +1,121 @@
+"""
+Unit tests for cold-import cost
+
+Tests:
+1. app.agent cold import stays within the time budget
+2. heavy optional dependencies are not loaded by importing app.agent / the MCP server
+3. lazily imported dependencies still load on first use
+4. -X importtime output parsing for the profile report
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 冷启动导入预算 (秒)；google.adk 本身约占 2.5s，慢机器上可通过环境变量放宽
+IMPORT_BUDGET_SECONDS = float(os.getenv("LINGXING_IMPORT_BUDGET_SECONDS", "8"))
+
+# 只在首次使用时才应被导入的模块
+AGENT_LAZY_MODULES = [
+    "pandas", "numpy", "Cryptodome", "pymongo", "bson", "sshtunnel", "paramiko",
+    "google.cloud.logging", "vertexai",
+]
+MCP_SERVER_LAZY_MODULES = ["pymongo", "bson", "sshtunnel", "paramiko"]
+
+_TIMED_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, sorted(m for m in {lazy!r} if m in sys.modules)]))
+"""
+
+
+def _cold_import(module, lazy, cwd=REPO_ROOT):
+    """在全新解释器中导入 module，返回 (耗时秒, 已被加载的重依赖)"""
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    proc = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _TIMED_IMPORT.format(module=module, lazy=lazy)],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    elapsed, loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+class TestColdImport:
+    """Tests for import-time budget of the service entry points."""
+
+    def test_agent_import_within_budget(self):
+        """测试：app.agent 冷启动导入耗时在预算内，且不加载重依赖"""
+        elapsed, loaded = _cold_import("app.agent", AGENT_LAZY_MODULES)
+
+        assert loaded == []
+        assert elapsed < IMPORT_BUDGET_SECONDS, (
+            f"import app.agent took {elapsed:.2f}s (budget {IMPORT_BUDGET_SECONDS}s), "
+            f"see `make profile-imports`"
+        )
+
+    def test_mcp_server_import_is_light(self):
+        """测试：MCP server 导入时不加载 pymongo / sshtunnel，首次查询时再连接"""
+        _, loaded = _cold_import(
+            "main", MCP_SERVER_LAZY_MODULES, cwd=os.path.join(REPO_ROOT, "app", "mcp_server")
+        )
+
+        assert loaded == []
+
+
+class TestLazyDependencies:
+    """Tests that deferred imports still resolve on first use."""
+
+    def test_encrypt_aes_loads_cryptodome_on_demand(self):
+        """测试：登录加密在调用时才导入 Cryptodome，结果与直接调用一致"""
+        import base64
+
+        from Cryptodome.Cipher import AES
+
+        from app.lingxing_agent.core.auth import LingXingAuth
+
+        key = "0123456789abcdef"
+        encrypted = LingXingAuth._encrypt_aes("secret", key)
+
+        plain = AES.new(key.encode(), AES.MODE_ECB).decrypt(base64.b64decode(encrypted))
+        assert plain[:6] == b"secret"
+
+
+class TestImportProfile:
+    """Tests for the -X importtime report parser."""
+
+    def test_parse_importtime(self):
+        """测试：解析 importtime 输出，跳过表头与无关行"""
+        sys.path.insert(0, os.path.join(REPO_ROOT, "tests", "benchmarks"))
+        try:
+            from profile_imports import package_totals, parse_importtime
+        finally:
+            sys.path.pop(0)
+
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   google.genai.types",
+            "import time:        30 |        150 | google.genai",
+            "some warning",
+        ])
+        costs = parse_importtime(output)
+
+        assert [(c.module, c.self_us, c.cumulative_us) for c in costs] == [
+            ("google.genai.types", 120, 120),
+            ("google.genai", 30, 150),
+        ]
+        assert package_totals(costs) == {"google": 150}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,279 @@
+"""
+Unit tests for lingxing_agent manager
+
+Tests:
+1. planner output normalisation (code fences / dict)
+2. QueryPlanExecutorAgent runs the plan without a model call and writes execution_results
+3. query plan optimizer: dedupe, analyze_store month grouping, performance batching, fan-out order
+4. per-tool timeouts and plan deadline with partial results
+"""
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _run_executor(query_plan):
+    """用内存 Session 单独运行 executor_agent，返回 (事件列表, 最终 state)"""
+    from google.adk.runners import Runner
+    from google.adk.sessions.in_memory_session_service import InMemorySessionService
+    from google.genai import types
+
+    from app.lingxing_agent.manager import QueryPlanExecutorAgent
+
+    async def run():
+        service = InMemorySessionService()
+        await service.create_session(
+            app_name="test", user_id="u", session_id="s", state={"query_plan": query_plan}
+        )
+        runner = Runner(
+            agent=QueryPlanExecutorAgent(name="executor_agent"),
+            app_name="test",
+            session_service=service,
+        )
+        events = [
+            event async for event in runner.run_async(
+                user_id="u",
+                session_id="s",
+                new_message=types.Content(role="user", parts=[types.Part(text="查询")]),
+            )
+        ]
+        session = await service.get_session(app_name="test", user_id="u", session_id="s")
+        return events, session.state
+
+    return asyncio.run(run())
+
+
+class TestPlanText:
+    """Tests for _plan_text."""
+
+    def test_strips_json_fence(self):
+        """测试：去掉 Planner 输出外层的 ```json 代码块"""
+        from app.lingxing_agent.manager import _plan_text
+
+        text = '```json\n{"queries": []}\n```'
+
+        assert json.loads(_plan_text(text)) == {"queries": []}
+
+    def test_plain_and_dict_plan(self):
+        """测试：纯 JSON 文本原样返回，dict 序列化为 JSON"""
+        from app.lingxing_agent.manager import _plan_text
+
+        assert _plan_text(' {"queries": []} ') == '{"queries": []}'
+        assert json.loads(_plan_text({"queries": [{"tool": "x"}]})) == {"queries": [{"tool": "x"}]}
+
+
+class TestQueryPlanExecutorAgent:
+    """Tests for the non-LLM executor step."""
+
+    def test_executes_plan_from_state(self):
+        """测试：读取 state 中的 query_plan 执行工具，结果写入 execution_results"""
+        tool = MagicMock(return_value={"gmv": 100})
+        plan = '```json\n{"task_type": "store", "queries": [{"tool": "analyze_store", "params": {"store_name": "HB-US"}}]}\n```'
+
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", {"analyze_store": tool}):
+            events, state = _run_executor(plan)
+
+        tool.assert_called_once_with(store_name="HB-US")
+        results = state["execution_results"]
+        assert results["task_type"] == "store"
+        assert results["results"][0]["result"] == {"gmv": 100}
+        # 结果同时作为消息产出，供 analyst_worker 在对话历史中读取
+        assert json.loads(events[-1].content.parts[0].text) == results
+
+    def test_empty_plan_reports_error(self):
+        """测试：没有 query_plan 时返回错误结果而不是抛异常"""
+        _, state = _run_executor("")
+
+        assert "error" in state["execution_results"]
+
+
+def _plan(*queries):
+    return json.dumps({"task_type": "t", "queries": [{"tool": t, "params": p} for t, p in queries]})
+
+
+class TestQueryPlanOptimizer:
+    """Tests for the optimizer pass in execute_query_plan."""
+
+    def test_identical_queries_run_once(self):
+        """测试：完全相同的查询只执行一次，结果按原顺序出现两次"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        stores = MagicMock(return_value=["HB-US"])
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", {"get_available_stores": stores}):
+            output = execute_query_plan(_plan(("get_available_stores", {}), ("get_available_stores", {})))
+
+        assert stores.call_count == 1
+        assert [r["result"] for r in output["results"]] == [["HB-US"], ["HB-US"]]
+
+    @patch('app.lingxing_agent.manager._analyze_stores_async_impl')
+    def test_analyze_store_grouped_by_month(self, mock_stores):
+        """测试：同月的多个 analyze_store 合并为一次 analyze_stores，其余月份单独执行"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        mock_stores.return_value = {"HB-US": {"gmv": 1}, "BN-US": {"gmv": 2}}
+        single = MagicMock(return_value={"gmv": 3})
+        plan = _plan(
+            ("analyze_store", {"store_name": "HB-US", "year": 2025, "month": 12}),
+            ("analyze_store", {"store_name": "BN-US", "year": 2025, "month": 12}),
+            ("analyze_store", {"store_name": "HB-US", "year": 2025, "month": 11}),
+        )
+
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", {"analyze_store": single}):
+            output = execute_query_plan(plan)
+
+        mock_stores.assert_called_once_with(store_names=["HB-US", "BN-US"], year=2025, month=12)
+        single.assert_called_once_with(store_name="HB-US", year=2025, month=11)
+        results = output["results"]
+        assert [r["result"] for r in results] == [{"gmv": 1}, {"gmv": 2}, {"gmv": 3}]
+        assert results[1]["params"] == {"store_name": "BN-US", "year": 2025, "month": 12}
+
+    @patch('app.lingxing_agent.manager._match_batch_stores')
+    @patch('app.lingxing_agent.manager._analyze_stores_async_impl')
+    def test_batch_store_query_shares_month_fetch(self, mock_stores, mock_match):
+        """测试：ALL-US 与单店同月查询共用一次整月拉取，批量结果保持 summary/details 格式"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        mock_match.return_value = ["HB-US", "BN-US"]
+        mock_stores.return_value = {"HB-US": {"gmv": 1}, "BN-US": {"gmv": 2}}
+        plan = _plan(
+            ("analyze_store", {"store_name": "ALL-US", "year": 2025, "month": 12}),
+            ("analyze_store", {"store_name": "HB-US", "year": 2025, "month": 12}),
+        )
+
+        output = execute_query_plan(plan)
+
+        mock_stores.assert_called_once_with(store_names=["HB-US", "BN-US"], year=2025, month=12)
+        batch, single = output["results"]
+        assert batch["result"]["details"] == [{"gmv": 1}, {"gmv": 2}]
+        assert single["result"] == {"gmv": 1}
+
+    @patch('app.lingxing_agent.manager.get_products_performance_async')
+    def test_performance_queries_batched_by_date_range(self, mock_batch):
+        """测试：同一日期范围的产品表现查询合并为一次批量查询后拆回"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        mock_batch.return_value = {"A": {"sales": 1}, "B": {"sales": 2}, "C": {"sales": 3}}
+        plan = _plan(
+            ("get_product_performance", {"msku": "A", "start_date": "2025-12-01", "end_date": "2025-12-31"}),
+            ("get_products_performance", {"mskus": ["B", "C"], "start_date": "2025-12-01", "end_date": "2025-12-31"}),
+            ("get_product_performance", {"msku": "A", "start_date": "2025-12-01", "end_date": "2025-12-31"}),
+        )
+
+        output = execute_query_plan(plan)
+
+        mock_batch.assert_called_once_with(mskus=["A", "B", "C"], start_date="2025-12-01", end_date="2025-12-31")
+        results = [r["result"] for r in output["results"]]
+        assert results == [{"sales": 1}, {"B": {"sales": 2}, "C": {"sales": 3}}, {"sales": 1}]
+        assert output["results"][1]["tool"] == "get_products_performance"
+
+    @patch('app.lingxing_agent.manager._analyze_stores_async_impl')
+    def test_merged_call_error_reported_per_query(self, mock_stores):
+        """测试：合并调用失败时，每个原查询都带上错误信息"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        mock_stores.side_effect = Exception("timeout")
+        plan = _plan(
+            ("analyze_store", {"store_name": "HB-US", "year": 2025, "month": 12}),
+            ("analyze_store", {"store_name": "BN-US", "year": 2025, "month": 12}),
+        )
+
+        output = execute_query_plan(plan)
+
+        assert [r["error"] for r in output["results"]] == ["timeout", "timeout"]
+        assert output["results"][0]["tool"] == "analyze_store"
+
+
+class TestPlanDeadline:
+    """Tests for timeouts in execute_query_plan_async."""
+
+    def test_tool_timeout_marks_only_that_query(self):
+        """测试：单个工具超时只影响该查询，其余结果照常返回"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        async def hang(**kwargs):
+            await asyncio.sleep(10)
+
+        fast = MagicMock(return_value=["HB-US"])
+        registry = {"get_available_stores": fast, "check_product_status": hang}
+        plan = _plan(("check_product_status", {"msku": "A", "store_name": "HB-US"}), ("get_available_stores", {}))
+
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", registry), \
+                patch.dict("app.lingxing_agent.manager.TOOL_TIMEOUTS", {"check_product_status": 0.05}):
+            output = execute_query_plan(plan)
+
+        slow, ok = output["results"]
+        assert slow["timed_out"] is True
+        assert slow["params"] == {"msku": "A", "store_name": "HB-US"}
+        assert ok["result"] == ["HB-US"]
+        assert output["timed_out"] == 1
+
+    def test_deadline_cancels_outstanding_calls(self):
+        """测试：总截止时间到期后取消未完成的调用，并返回已完成的部分结果"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        cancelled = []
+
+        async def hang(**kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(kwargs["msku"])
+                raise
+
+        fast = MagicMock(return_value=["HB-US"])
+        registry = {"get_available_stores": fast, "check_product_status": hang}
+        plan = _plan(("get_available_stores", {}), ("check_product_status", {"msku": "A", "store_name": "HB-US"}))
+
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", registry):
+            output = execute_query_plan(plan, deadline=0.2)
+
+        ok, slow = output["results"]
+        assert ok["result"] == ["HB-US"]
+        assert slow["timed_out"] is True and "截止时间" in slow["error"]
+        assert cancelled == ["A"]
+        assert output["elapsed"] < 5
+
+    def test_batch_status_gets_time_budget(self):
+        """测试：批量产品状态查询收到小于工具超时的时间预算，可返回部分结果而不是整体超时"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        budgets = []
+
+        async def batch_status(**kwargs):
+            budgets.append(kwargs.pop("timeout"))
+            return {"rows": [], "params": kwargs}
+
+        plan = _plan(("check_products_status", {"mskus": ["A", "B"]}))
+
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", {"check_products_status": batch_status}), \
+                patch.dict("app.lingxing_agent.manager.TOOL_TIMEOUTS", {"check_products_status": 10}):
+            output = execute_query_plan(plan, deadline=6)
+
+        assert 0 < budgets[0] <= 6 - 2
+        assert output["results"][0]["result"]["params"] == {"mskus": ["A", "B"]}
+        assert output["results"][0]["params"] == {"mskus": ["A", "B"]}
+
+    def test_cancelled_tool_does_not_lose_other_results(self):
+        """测试：工具内部抛出 CancelledError 只标记该查询，其他结果照常返回"""
+        from app.lingxing_agent.manager import execute_query_plan
+
+        async def cancelled(**kwargs):
+            raise asyncio.CancelledError()
+
+        fast = MagicMock(return_value=["HB-US"])
+        registry = {"get_available_stores": fast, "check_product_status": cancelled}
+        plan = _plan(("get_available_stores", {}), ("check_product_status", {"msku": "A", "store_name": "HB-US"}))
+
+        with patch.dict("app.lingxing_agent.manager.TOOL_REGISTRY", registry):
+            output = execute_query_plan(plan)
+
+        ok, failed = output["results"]
+        assert ok["result"] == ["HB-US"]
+        assert failed["timed_out"] is True and "error" in failed
+        assert output["timed_out"] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
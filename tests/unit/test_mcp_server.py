@@ -0,0 +1,477 @@
+"""
+Unit tests for the MongoDB MCP server
+
+Tests:
+1. MongoDBConnector shares one pooled client per process, with health checks and reconnect
+2. MSKU/SKU lookup: read-only collation queries, exact -> prefix -> substring, index bootstrap at server start
+3. batch lookup: one $in query, results keyed by identifier, misses
+4. BSON -> JSON conversion matches json_util output, with and without orjson
+5. query_collection paging: projection, sort, keyset resume token, byte cap
+"""
+import importlib.util
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+MCP_SERVER_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "app", "mcp_server"
+)
+# MCP server 以脚本方式运行，模块之间是平铺导入
+if MCP_SERVER_DIR not in sys.path:
+    sys.path.insert(0, MCP_SERVER_DIR)
+
+
+@pytest.fixture
+def connector_cls():
+    """每个用例从没有共享连接的状态开始"""
+    from db_connector import MongoDBConnector
+
+    MongoDBConnector._reset()
+    yield MongoDBConnector
+    MongoDBConnector._reset()
+
+
+class TestMongoDBConnector:
+    """Tests for the shared, pooled connection."""
+
+    @patch('pymongo.MongoClient')
+    def test_client_shared_across_calls(self, mock_client, connector_cls):
+        """测试：多次 with 借用同一个客户端，只建连和 ping 一次，退出时不关闭"""
+        from db_config import MONGO_POOL_CONFIG
+
+        for _ in range(3):
+            with connector_cls() as db:
+                db["msku_info"].find_one({})
+
+        assert mock_client.call_count == 1
+        assert mock_client.call_args[1]["maxPoolSize"] == MONGO_POOL_CONFIG["maxPoolSize"]
+        db = mock_client.return_value.__getitem__.return_value
+        assert db.command.call_count == 1
+        mock_client.return_value.close.assert_not_called()
+
+    @patch('pymongo.MongoClient')
+    def test_reconnect_when_health_check_fails(self, mock_client, connector_cls):
+        """测试：健康检查 ping 失败时关闭旧客户端并重新连接"""
+        old_client, new_client = MagicMock(), MagicMock()
+        mock_client.side_effect = [old_client, new_client]
+
+        with connector_cls():
+            pass
+        old_client.__getitem__.return_value.command.side_effect = Exception("connection reset")
+        connector_cls._last_check = 0.0
+
+        with connector_cls() as db:
+            assert db is new_client.__getitem__.return_value
+
+        old_client.close.assert_called_once()
+        assert mock_client.call_count == 2
+
+    @patch('pymongo.MongoClient')
+    def test_connection_failure_forces_health_check(self, mock_client, connector_cls):
+        """测试：查询因连接失败抛出 ConnectionFailure 后，下次借用前重新检查连接"""
+        from pymongo.errors import AutoReconnect
+
+        with pytest.raises(AutoReconnect):
+            with connector_cls():
+                raise AutoReconnect("primary stepped down")
+
+        assert connector_cls._last_check == 0.0
+        with connector_cls():
+            pass
+        db = mock_client.return_value.__getitem__.return_value
+        assert db.command.call_count == 2  # 首次连接 + 健康检查
+
+    @patch('pymongo.MongoClient')
+    def test_close_disconnects_shared_client(self, mock_client, connector_cls):
+        """测试：close() 断开共享客户端，之后再借用会重新连接"""
+        connector = connector_cls()
+        connector.connect()
+        connector.close()
+
+        mock_client.return_value.close.assert_called_once()
+        assert connector.db is None
+
+        connector.connect()
+        assert mock_client.call_count == 2
+
+
+def _collection(*batches):
+    """find() 依次返回 batches 中的结果 (limit / max_time_ms 链式调用)"""
+    collection = MagicMock()
+    collection.name = "msku_info"
+    collection.database.name = "SKU_INFO"
+    cursors = []
+    for docs in batches:
+        cursor = MagicMock()
+        cursor.limit.return_value = cursor
+        cursor.max_time_ms.return_value = cursor
+        cursor.__iter__.side_effect = lambda docs=docs: iter(docs)
+        cursors.append(cursor)
+    collection.find.side_effect = cursors
+    return collection
+
+
+@pytest.fixture
+def lookup():
+    import product_lookup
+
+    return product_lookup
+
+
+class TestProductLookup:
+    """Tests for product_lookup.find_by_field."""
+
+    def test_exact_match_uses_collation(self, lookup):
+        """测试：精确匹配用不区分大小写的 collation 查询原字段，命中后不再尝试其他路径"""
+        collection = _collection([{"msku": "ab-01"}])
+
+        found = lookup.find_by_field(collection, "msku", " AB-01")
+
+        assert found == {"match": "exact", "results": [{"msku": "ab-01"}]}
+        collection.find.assert_called_once_with({"msku": "AB-01"}, collation=lookup.CASE_INSENSITIVE)
+
+    def test_prefix_range_then_substring_escaped(self, lookup):
+        """测试：精确未命中时依次走前缀范围查询与子串，子串输入被转义"""
+        collection = _collection([], [], [{"sku": "x-AB.C(1)-y"}])
+
+        found = lookup.find_by_field(collection, "sku", "ab.c(1)")
+
+        assert found["match"] == "substring"
+        prefix_call = collection.find.call_args_list[1]
+        assert prefix_call[0][0] == {"sku": {"$gte": "ab.c(1)", "$lt": "ab.c(1)\uffff"}}
+        assert prefix_call[1]["collation"] == lookup.CASE_INSENSITIVE
+        substring_query = collection.find.call_args_list[2][0][0]
+        assert substring_query == {"sku": {"$regex": r"ab\.c\(1\)", "$options": "i"}}
+
+    def test_prefix_match_reported(self, lookup):
+        """测试：前缀命中时返回 prefix，子串扫描不执行"""
+        collection = _collection([], [{"msku": "AB-01-FBA"}])
+
+        found = lookup.find_by_field(collection, "msku", "AB-01")
+
+        assert found["match"] == "prefix"
+        assert collection.find.call_count == 2
+
+    def test_lookup_never_writes(self, lookup):
+        """测试：查找路径只读，不建索引也不更新文档"""
+        collection = _collection([], [], [])
+
+        lookup.find_by_field(collection, "msku", "A")
+        lookup.find_many(_collection([]), ["A"])
+
+        collection.create_index.assert_not_called()
+        collection.update_many.assert_not_called()
+
+    def test_bootstrap_creates_collation_indexes(self, lookup):
+        """测试：引导时只建 collation 索引，不改动文档"""
+        collection = MagicMock()
+
+        lookup.ensure_indexes(collection)
+
+        assert [c[1]["name"] for c in collection.create_index.call_args_list] == ["msku_ci", "sku_ci", "asin_ci"]
+        assert collection.create_index.call_args[1]["collation"] == lookup.CASE_INSENSITIVE
+        collection.update_many.assert_not_called()
+
+    def test_server_start_bootstraps_indexes(self, lookup):
+        """测试：MCP server 启动时建索引，数据库不可用时只记录日志"""
+        spec = importlib.util.spec_from_file_location("mcp_server_main", os.path.join(MCP_SERVER_DIR, "main.py"))
+        main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(main)
+
+        db = MagicMock()
+        with patch.object(main, "MongoDBConnector") as mock_connector:
+            mock_connector.return_value.__enter__.return_value = db
+            main.ensure_lookup_indexes()
+            assert db.__getitem__.return_value.create_index.call_count == 3
+
+            mock_connector.return_value.__enter__.side_effect = RuntimeError("no db")
+            main.ensure_lookup_indexes()
+
+
+class TestBatchLookup:
+    """Tests for product_lookup.find_many."""
+
+    def test_single_in_query_keyed_by_identifier(self, lookup):
+        """测试：MSKU/SKU/ASIN 混合输入只发一次 $in 查询，结果按输入标识归组"""
+        docs = [
+            {"msku": "AB-01", "sku": "SKU1", "asin": "B0001"},
+            {"msku": "CD-02", "sku": "SKU2", "asin": "B0002"},
+        ]
+        collection = _collection(docs)
+
+        found = lookup.find_many(collection, ["ab-01", "SKU2", "B0001", "NOPE", "ab-01"])
+
+        assert collection.find.call_count == 1
+        (query, projection), kwargs = collection.find.call_args
+        assert {"msku": {"$in": ["ab-01", "SKU2", "B0001", "NOPE"]}} in query["$or"]
+        assert projection is None
+        assert kwargs["collation"] == lookup.CASE_INSENSITIVE
+        assert found["results"] == {"ab-01": [docs[0]], "SKU2": [docs[1]], "B0001": [docs[0]]}
+        assert found["misses"] == ["NOPE"]
+
+    def test_fields_projection_keeps_identifiers(self, lookup):
+        """测试：指定 fields 时只投影这些字段，但总是带上用于归组的 msku/sku/asin"""
+        collection = _collection([{"msku": "A", "title": "t"}])
+
+        found = lookup.find_many(collection, ["A"], fields=["title"])
+
+        projection = collection.find.call_args[0][1]
+        assert projection == {"title": 1, "msku": 1, "sku": 1, "asin": 1}
+        assert found == {"results": {"A": [{"msku": "A", "title": "t"}]}, "misses": []}
+
+    def test_empty_input_skips_query(self, lookup):
+        """测试：空列表不访问数据库"""
+        collection = _collection()
+
+        assert lookup.find_many(collection, ["", "  "]) == {"results": {}, "misses": []}
+        collection.find.assert_not_called()
+
+
+def _bson_doc():
+    import datetime
+
+    from bson import Binary, Decimal128, ObjectId
+
+    return {
+        "_id": ObjectId("65a1b2c3d4e5f60718293a4b"),
+        "msku": "AB-01",
+        "price": Decimal128("19.99"),
+        "created_at": datetime.datetime(2025, 1, 2, 3, 4, 5, 678000),
+        "launched_at": datetime.datetime(1969, 12, 31),
+        "thumbnail": Binary(b"\x00\x01", 0),
+        "payload": Binary(b"abc", 5),
+        "ratio": float("nan"),
+        "tags": ["a", ("b", 1)],
+        "dims": {"length": 1.5, "updated": datetime.datetime(2025, 1, 1)},
+    }
+
+
+class TestBsonJson:
+    """Tests for bson_json."""
+
+    def test_to_jsonable_matches_json_util(self):
+        """测试：单遍转换结果与 json_util 往返完全一致"""
+        import json
+
+        from bson import json_util
+        from bson_json import to_jsonable
+
+        doc = _bson_doc()
+
+        assert to_jsonable([doc]) == json.loads(json_util.dumps([doc]))
+        assert to_jsonable(doc)["created_at"] == {"$date": "2025-01-02T03:04:05.678Z"}
+
+    def test_dumps_with_and_without_orjson(self):
+        """测试：dumps 用 orjson 与标准库 json 得到相同内容"""
+        import json
+
+        import bson_json
+        from bson import json_util
+
+        doc = _bson_doc()
+        del doc["ratio"]  # orjson 把 NaN 编成 null
+        expected = json.loads(json_util.dumps(doc))
+
+        assert json.loads(bson_json.dumps(doc, indent=True)) == expected
+        with patch.object(bson_json, "orjson", None):
+            text = bson_json.dumps(doc, indent=True)
+        assert json.loads(text) == expected
+        assert text.startswith('{\n  "_id"')
+
+    def test_unknown_type_falls_back_to_json_util(self):
+        """测试：不在快速路径中的 BSON 类型交给 json_util.default"""
+        from bson import Int64, Regex
+        from bson_json import to_jsonable
+
+        converted = to_jsonable({"n": Int64(5), "r": Regex("^a", "i")})
+
+        assert converted == {"n": 5, "r": {"$regularExpression": {"pattern": "^a", "options": "i"}}}
+
+
+_TYPE_ALIASES = {type(None): "null", bool: "bool", int: "int", float: "double", str: "string", dict: "object"}
+
+
+def _matches(doc, filter_):
+    """按 MongoDB 语义执行 keyset 条件用到的算子 (eq / $gt / $lt / $type / $or / $and)"""
+    import datetime
+
+    for key, cond in filter_.items():
+        if key == "$or":
+            ok = any(_matches(doc, f) for f in cond)
+        elif key == "$and":
+            ok = all(_matches(doc, f) for f in cond)
+        elif isinstance(cond, dict) and "$type" in cond:
+            alias = "date" if isinstance(doc.get(key), datetime.datetime) else _TYPE_ALIASES[type(doc.get(key))]
+            ok = key in doc and alias in cond["$type"]
+        elif isinstance(cond, dict):
+            (op, bound), = cond.items()
+            value = doc.get(key)
+            # 类型括号：$gt / $lt 只比较同类型的值
+            ok = type(value) is type(bound) and (value > bound if op == "$gt" else value < bound)
+        else:
+            ok = doc.get(key) == cond
+        if not ok:
+            return False
+    return True
+
+
+def _filtering_collection(docs):
+    """find(filter).sort().limit() 对已按排序给出的 docs 应用过滤条件"""
+    collection = MagicMock()
+    collection.name = "msku_info"
+
+    def find(filter_, projection=None):
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        matched = [dict(d) for d in docs if _matches(d, filter_)]
+        cursor.limit.side_effect = lambda n: iter(matched[:n])
+        return cursor
+
+    collection.find.side_effect = find
+    return collection
+
+
+def _paged_collection(docs):
+    """find().sort().limit() 按 limit 截取 docs (不做过滤，过滤条件由用例断言)"""
+    collection = MagicMock()
+    collection.name = "msku_info"
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.side_effect = lambda n: iter([dict(d) for d in docs[:n]])
+    collection.find.return_value = cursor
+    return collection, cursor
+
+
+class TestQueryPaging:
+    """Tests for paging.fetch_page."""
+
+    def test_first_page_returns_token(self):
+        """测试：多取一条判断是否还有下一页，排序末尾补 _id"""
+        from bson import ObjectId
+        from paging import fetch_page
+
+        ids = [ObjectId() for _ in range(3)]
+        collection, cursor = _paged_collection([{"_id": i, "msku": "A"} for i in ids])
+
+        page = fetch_page(collection, {"msku": "A"}, limit=2)
+
+        assert page["count"] == 2 and page["truncated"] is False
+        assert page["documents"][1] == {"_id": {"$oid": str(ids[1])}, "msku": "A"}
+        cursor.sort.assert_called_once_with([("_id", 1)])
+        cursor.limit.assert_called_once_with(3)
+        assert page["next_token"]
+
+    def test_resume_token_continues_after_last_key(self):
+        """测试：resume token 转换为复合排序键的 keyset 条件，并与原查询合并"""
+        import datetime
+
+        from bson import ObjectId
+        from paging import fetch_page
+
+        docs = [
+            {"_id": ObjectId(), "created_at": datetime.datetime(2025, 1, d)} for d in (3, 2, 1)
+        ]
+        collection, _ = _paged_collection(docs)
+        first = fetch_page(collection, {"msku": "A"}, limit=1, sort={"created_at": -1})
+
+        fetch_page(collection, {"msku": "A"}, limit=1, sort={"created_at": -1}, resume_token=first["next_token"])
+
+        # 降序时日期之后依次是更早的日期、排在日期前面的类型括号、最后是 null / 缺失
+        before_date = ["double", "int", "long", "decimal", "string", "symbol", "object", "binData", "objectId", "bool"]
+        before_oid = ["double", "int", "long", "decimal", "string", "symbol", "object", "binData"]
+        newest = datetime.datetime(2025, 1, 3)
+        filter_ = collection.find.call_args[0][0]
+        assert filter_ == {"$and": [{"msku": "A"}, {"$or": [
+            {"created_at": {"$lt": newest}},
+            {"created_at": None},
+            {"created_at": {"$type": before_date}},
+            {"created_at": newest, "_id": {"$lt": docs[0]["_id"]}},
+            {"created_at": newest, "_id": None},
+            {"created_at": newest, "_id": {"$type": before_oid}},
+        ]}]}
+
+    def test_sparse_sort_field_pages_through_every_document(self):
+        """测试：排序字段缺失 / 为 null 的文档不会在翻页时丢失，页边界落在 null 组内也一样"""
+        import datetime
+
+        from paging import fetch_page
+
+        # 按 (launch_date 降序, _id 降序) 排好：有日期的在前，null 与缺失在后
+        docs = [
+            {"_id": 6, "launch_date": datetime.datetime(2025, 1, 5)},
+            {"_id": 5, "launch_date": datetime.datetime(2025, 1, 4)},
+            {"_id": 4},
+            {"_id": 3, "launch_date": None},
+            {"_id": 2},
+            {"_id": 1, "launch_date": None},
+        ]
+        collection = _filtering_collection(docs)
+
+        for limit in (1, 2, 4):
+            seen, token = [], None
+            while True:
+                page = fetch_page(collection, limit=limit, sort={"launch_date": -1}, resume_token=token)
+                seen.extend(doc["_id"] for doc in page["documents"])
+                token = page["next_token"]
+                if not token:
+                    break
+            assert seen == [6, 5, 4, 3, 2, 1]
+
+        ascending = list(reversed(docs))
+        collection = _filtering_collection(ascending)
+        first = fetch_page(collection, limit=4, sort={"launch_date": 1})
+        rest = fetch_page(collection, limit=4, sort={"launch_date": 1}, resume_token=first["next_token"])
+        assert [d["_id"] for d in first["documents"] + rest["documents"]] == [1, 2, 3, 4, 5, 6]
+
+    def test_token_with_wrong_key_count_rejected(self):
+        """测试：token 中的排序键个数与排序不一致时报错，而不是生成截断的条件"""
+        from paging import keyset_filter
+
+        with pytest.raises(ValueError):
+            keyset_filter([("launch_date", 1), ("_id", 1)], [None])
+
+    def test_token_bound_to_query(self):
+        """测试：换了查询条件或排序后，旧 token 被拒绝"""
+        from bson import ObjectId
+        from paging import fetch_page
+
+        collection, _ = _paged_collection([{"_id": ObjectId()} for _ in range(2)])
+        token = fetch_page(collection, {"msku": "A"}, limit=1)["next_token"]
+
+        with pytest.raises(ValueError):
+            fetch_page(collection, {"msku": "B"}, limit=1, resume_token=token)
+        with pytest.raises(ValueError):
+            fetch_page(collection, {"msku": "A"}, limit=1, resume_token="not-a-token")
+
+    def test_projection_keeps_sort_keys_internal(self):
+        """测试：投影未包含排序键时仍查询出来生成 token，但不返回给调用方"""
+        from paging import fetch_page
+
+        docs = [{"_id": i, "title": f"t{i}", "dims": {"length": i}} for i in range(2)]
+        collection, _ = _paged_collection(docs)
+
+        page = fetch_page(collection, projection={"title": 1, "_id": 0}, sort={"dims.length": 1}, limit=1)
+
+        projection = collection.find.call_args[0][1]
+        assert projection == {"title": 1, "dims.length": 1}
+        assert page["documents"] == [{"title": "t0"}]
+        assert page["next_token"]
+
+    def test_byte_cap_truncates_page(self):
+        """测试：超过字节上限时提前结束本页并返回 token，但至少返回一条"""
+        from paging import fetch_page
+
+        docs = [{"_id": i, "title": "x" * 100} for i in range(5)]
+        collection, _ = _paged_collection(docs)
+
+        page = fetch_page(collection, limit=5, max_bytes=150)
+        assert page["count"] == 1 and page["truncated"] is True and page["next_token"]
+
+        page = fetch_page(collection, limit=5, max_bytes=10)
+        assert page["count"] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,168 @@
+"""
+Unit tests for app.lingxing_agent.core.pagination
+
+Tests:
+1. paginate - parallel fan-out after reading total, ordered merge, fallbacks
+2. iter_pages - streaming pages with a bounded prefetch window
+3. paginate_async - async twin
+"""
+import threading
+import time
+
+import pytest
+
+
+def _fake_post(total, length=200, with_total=True, delay=0.0):
+    """按 offset 生成记录的假接口，记录调用的 offset 与最大并发数"""
+    state = {"offsets": [], "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    def post(url, payload):
+        with lock:
+            state["offsets"].append(payload["offset"])
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        time.sleep(delay)
+        start = payload["offset"]
+        end = min(start + payload["length"], total)
+        body = {"data": {"list": [{"i": i} for i in range(start, end)]}}
+        if with_total:
+            body["data"]["total"] = total
+        with lock:
+            state["in_flight"] -= 1
+        return body
+
+    return post, state
+
+
+def _extract(data):
+    return data["data"]["list"]
+
+
+class TestPaginate:
+    """Tests for the sync pagination engine."""
+
+    def test_parallel_pages_merged_in_order(self):
+        """测试：读取 total 后并发拉取，结果按 offset 顺序合并"""
+        from app.lingxing_agent.core.pagination import paginate
+
+        post, state = _fake_post(total=1050, delay=0.02)
+        result = paginate(post, "https://erp.lingxing.com/api/x", {}, _extract)
+
+        assert [r["i"] for r in result] == list(range(1050))
+        assert sorted(state["offsets"]) == [0, 200, 400, 600, 800, 1000]
+        assert state["max_in_flight"] > 1
+
+    def test_concurrency_capped_per_host(self):
+        """测试：同一域名的并发请求数不超过上限"""
+        from app.lingxing_agent.core import pagination
+
+        pagination._host_semaphores.pop("capped.example.com", None)
+        pagination.PAGE_CONCURRENCY_PER_HOST["capped.example.com"] = 2
+        try:
+            post, state = _fake_post(total=2000, delay=0.02)
+            pagination.paginate(post, "https://capped.example.com/x", {}, _extract)
+        finally:
+            del pagination.PAGE_CONCURRENCY_PER_HOST["capped.example.com"]
+
+        assert state["max_in_flight"] <= 2
+
+    def test_without_total_falls_back_to_sequential(self):
+        """测试：响应没有 total 时逐页顺序拉取"""
+        from app.lingxing_agent.core.pagination import paginate
+
+        post, state = _fake_post(total=450, with_total=False)
+        result = paginate(post, "https://erp.lingxing.com/api/x", {}, _extract)
+
+        assert len(result) == 450
+        assert state["offsets"] == [0, 200, 400]
+
+    def test_single_short_page(self):
+        """测试：首页不足一页时只请求一次"""
+        from app.lingxing_agent.core.pagination import paginate
+
+        post, state = _fake_post(total=10)
+        result = paginate(post, "https://erp.lingxing.com/api/x", {}, _extract)
+
+        assert len(result) == 10
+        assert state["offsets"] == [0]
+
+    def test_stale_total_continues_past_last_page(self):
+        """测试：total 偏小 (拉取期间新增数据) 时继续拉到不足一页为止"""
+        from app.lingxing_agent.core.pagination import paginate
+
+        post, _state = _fake_post(total=700)
+
+        def stale_post(url, payload):
+            body = post(url, payload)
+            body["data"]["total"] = 400
+            return body
+
+        result = paginate(stale_post, "https://erp.lingxing.com/api/x", {}, _extract)
+
+        assert [r["i"] for r in result] == list(range(700))
+
+
+class TestIterPages:
+    """Tests for the streaming page iterator."""
+
+    def test_more_pages_than_prefetch_window(self):
+        """测试：页数超过预取窗口时不丢页、不乱序"""
+        from app.lingxing_agent.core.pagination import iter_pages
+
+        post, state = _fake_post(total=200 * 30 + 7)
+        pages = list(iter_pages(post, "https://erp.lingxing.com/api/x", {}, _extract))
+
+        assert len(pages) == 31
+        assert [r["i"] for page in pages for r in page] == list(range(200 * 30 + 7))
+        assert len(state["offsets"]) == 31
+
+    def test_early_stop_limits_prefetch(self):
+        """测试：提前停止迭代时只预取窗口内的页"""
+        from app.lingxing_agent.core.pagination import iter_pages, _host_limit
+
+        post, state = _fake_post(total=200 * 50, delay=0.01)
+        pages = iter_pages(post, "https://erp.lingxing.com/api/x", {}, _extract)
+        next(pages)
+        next(pages)
+        pages.close()
+        time.sleep(0.05)
+
+        assert len(state["offsets"]) <= 2 + _host_limit("erp.lingxing.com")
+
+    def test_client_iter_yields_records(self):
+        """测试：客户端 iter_* 逐条产出记录"""
+        from unittest.mock import MagicMock
+        from app.lingxing_agent.core.client import LingXingClient
+
+        post, _ = _fake_post(total=450)
+        client = LingXingClient(token="t", session=MagicMock())
+        client._post = post
+
+        records = client.iter_fba_out("2025-01-01", "2025-01-31")
+
+        assert next(records) == {"i": 0}
+        assert sum(1 for _ in records) == 449
+
+
+class TestPaginateAsync:
+    """Tests for the async pagination engine."""
+
+    @pytest.mark.asyncio
+    async def test_async_parallel_pages_merged_in_order(self):
+        """测试：异步版本并发拉取并按顺序合并"""
+        from app.lingxing_agent.core.pagination import paginate_async
+
+        post, state = _fake_post(total=830)
+
+        async def async_post(url, payload):
+            return post(url, payload)
+
+        result = await paginate_async(async_post, "https://erp.lingxing.com/api/x", {}, _extract)
+
+        assert [r["i"] for r in result] == list(range(830))
+        assert sorted(state["offsets"]) == [0, 200, 400, 600, 800]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
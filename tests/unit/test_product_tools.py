@@ -4,6 +4,9 @@ Unit tests for app.lingxing_agent.tools.product_tools
 Tests:
 1. check_product_status - various purchase/shipment scenarios
 2. get_product_performance - performance data retrieval
+3. get_products_performance - batch multi-MSKU query
+4. check_products_status - batch status table with bounded concurrency
+5. check_product_status - speculative parallel lookups
 """
 import pytest
 from unittest.mock import patch, MagicMock
@@ -125,6 +128,78 @@ class TestCheckProductStatus:
         assert result['purchase_status'] == '采购已到达'
 
 
+class TestSpeculativeLookups:
+    """Tests for the parallel lookups inside check_product_status."""
+
+    @patch('app.lingxing_agent.tools.product_tools.api_client')
+    def test_lookups_run_concurrently(self, mock_client):
+        """测试：四个查询同时发出，总耗时约为一次往返"""
+        import time
+        from app.lingxing_agent.tools.product_tools import check_product_status
+
+        def slow(value):
+            def call(*args):
+                time.sleep(0.2)
+                return value
+            return call
+
+        mock_client.request_web_purchasedate.side_effect = slow({'data': {'list': []}})
+        mock_client.request_web_processing_purchasedate.side_effect = slow({'list': []})
+        mock_client.request_oversea_plan.side_effect = slow({'data': {'plan_list': []}})
+        mock_client.request_deliver_page.side_effect = slow({'data': {'list': []}})
+
+        start = time.monotonic()
+        result = check_product_status('TEST-MSKU', 'Amazon US')
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.6
+        assert result['status'] == '采购未下单'
+        assert mock_client.request_deliver_page.call_count == 1
+
+    @patch('app.lingxing_agent.tools.product_tools.api_client')
+    def test_oversea_plan_takes_precedence(self, mock_client):
+        """测试：海外仓计划有结果时优先于发货单"""
+        from app.lingxing_agent.tools.product_tools import check_product_status
+
+        mock_client.request_web_purchasedate.return_value = {'data': {'list': []}}
+        mock_client.request_web_processing_purchasedate.return_value = {'list': []}
+        mock_client.request_oversea_plan.return_value = {
+            'data': {'plan_list': [{'gmt_create': '2024-02-01', 'plan_quantity': 7}]}
+        }
+        mock_client.request_deliver_page.return_value = {
+            'data': {'list': [{'total_quantity_shipped': 50, 'shipment_time': '2024-01-15 10:00:00',
+                               'relate_list': [{'sname': 'Amazon US'}]}]}
+        }
+
+        result = check_product_status('TEST-MSKU', 'Amazon US')
+
+        assert result['initial_stock_num'] == 7
+        assert result['initial_stock_time'] == '2024-02-01'
+
+    @patch('app.lingxing_agent.tools.product_tools.api_client')
+    def test_failed_outbound_lookup_falls_back(self, mock_client):
+        """测试：海外仓计划请求失败时使用发货单结果"""
+        from app.lingxing_agent.tools.product_tools import check_product_status
+
+        mock_client.request_web_purchasedate.return_value = {'data': {'list': []}}
+        mock_client.request_web_processing_purchasedate.side_effect = RuntimeError('unused')
+        mock_client.request_oversea_plan.side_effect = RuntimeError('boom')
+        mock_client.request_deliver_page.return_value = {
+            'data': {'list': [{'total_quantity_shipped': 3, 'shipment_time': '2024-01-15 10:00:00',
+                               'relate_list': [{'sname': 'Amazon US'}]}]}
+        }
+
+        with pytest.raises(RuntimeError):
+            # 标准采购单为空时仍需要加工采购单的结果，其异常照常抛出
+            check_product_status('TEST-MSKU', 'Amazon US')
+
+        mock_client.request_web_processing_purchasedate.side_effect = None
+        mock_client.request_web_processing_purchasedate.return_value = {'list': []}
+        result = check_product_status('TEST-MSKU', 'Amazon US')
+
+        assert result['initial_stock_num'] == 3
+
+
 # ==================== Test get_product_performance ====================
 
 class TestGetProductPerformance:
@@ -195,5 +270,146 @@ class TestGetProductPerformance:
         assert result['end_date'] == expected_end
 
 
+# ==================== Test get_products_performance ====================
+
+class TestGetProductsPerformance:
+    """Tests for the batch get_products_performance tool."""
+
+    @patch('app.lingxing_agent.tools.product_tools.api_client')
+    def test_results_keyed_by_msku(self, mock_client):
+        """测试：批量查询按 MSKU 返回，price_list 中的 seller_sku 也能命中"""
+        from app.lingxing_agent.tools.product_tools import get_products_performance
+
+        mock_client.get_products_performance.return_value = [
+            {'msku': 'A-fba', 'volume': 10},
+            {'msku': 'B-fba', 'volume': 20,
+             'price_list': [{'seller_sku': 'C-fba', 'seller_name': 'BT-CA'}]},
+        ]
+
+        result = get_products_performance(['A-fba', 'C-fba', 'X-fba'], '2024-01-01', '2024-01-31')
+
+        assert mock_client.get_products_performance.call_count == 1
+        assert result['A-fba']['volume'] == 10
+        assert result['C-fba']['volume'] == 20
+        assert result['C-fba']['store_name'] == 'BT-CA'
+        assert 'error' in result['X-fba']
+
+    def test_client_batches_mskus_and_paginates(self):
+        """测试：客户端按批次合并 MSKU 并翻页拉全"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        client = LingXingClient(token="t", session=MagicMock())
+        client.PERFORMANCE_MSKU_BATCH = 2
+        payloads = []
+
+        def fake_post(url, payload):
+            payloads.append(dict(payload))
+            if payload['offset'] == 0 and payload['search_value'] == ['A', 'B']:
+                rows = [{'msku': 'A'}] * 200
+                return {'data': {'list': rows, 'total': 201}}
+            if payload['search_value'] == ['A', 'B']:
+                return {'data': {'list': [{'msku': 'B'}], 'total': 201}}
+            return {'data': {'list': [{'msku': 'C'}], 'total': 1}}
+
+        client._post = fake_post
+        records = client.get_products_performance('2024-01-01', '2024-01-31', ['A', 'B', 'A', 'C'])
+
+        assert len(records) == 202
+        assert [p['search_value'] for p in payloads if p['offset'] == 0] == [['A', 'B'], ['C']]
+
+
+# ==================== Test check_products_status ====================
+
+class TestCheckProductsStatus:
+    """Tests for the batch check_products_status tool."""
+
+    @patch('app.lingxing_agent.tools.product_tools.check_product_status')
+    def test_table_in_input_order_with_progress(self, mock_check):
+        """测试：结果按输入顺序成表，单个 MSKU 失败不影响其他，逐个汇报进度"""
+        from app.lingxing_agent.tools.product_tools import run_products_status, STATUS_TABLE_COLUMNS
+
+        def fake_check(msku, store_name, is_processing):
+            if msku == 'BAD':
+                raise RuntimeError('timeout')
+            return {'msku': msku, 'status': '正常发货', 'purchase_status': '采购已到达',
+                    'purchase_time': 't1', 'arrival_time': 't2', 'initial_stock_num': 5,
+                    'initial_stock_time': 't3', 'is_borrowed': False}
+
+        mock_check.side_effect = fake_check
+        progress = []
+
+        table = run_products_status(['A', 'BAD', 'B', 'A'], on_progress=lambda d, t, m, r: progress.append((d, t)))
+
+        assert table['columns'] == STATUS_TABLE_COLUMNS
+        assert [row[0] for row in table['rows']] == ['A', 'BAD', 'B']
+        assert table['rows'][1][1] == '查询失败'
+        assert table['summary'] == {'正常发货': 2, '查询失败': 1}
+        assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+    @patch('app.lingxing_agent.tools.product_tools.check_product_status')
+    def test_concurrency_bounded(self, mock_check):
+        """测试：并发 MSKU 数不超过 max_workers"""
+        import threading
+        import time
+        from app.lingxing_agent.tools.product_tools import run_products_status
+
+        state = {'in_flight': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def fake_check(msku, store_name, is_processing):
+            with lock:
+                state['in_flight'] += 1
+                state['max'] = max(state['max'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return {'msku': msku, 'status': 'ok'}
+
+        mock_check.side_effect = fake_check
+        run_products_status([f'M{i}' for i in range(20)], max_workers=3)
+
+        assert 1 < state['max'] <= 3
+
+    @patch('app.lingxing_agent.tools.product_tools.api_client')
+    def test_runs_on_shared_scheduler_threads(self, mock_client):
+        """测试：批量查询只使用调度器的共享线程，MSKU 内部的四个查询在同一线程就地执行"""
+        import threading
+        from app.lingxing_agent.tools.product_tools import run_products_status
+
+        threads = set()
+
+        def record(*args):
+            threads.add(threading.current_thread().name)
+            return {}
+
+        mock_client.request_web_purchasedate.side_effect = record
+        mock_client.request_web_processing_purchasedate.side_effect = record
+        mock_client.request_oversea_plan.side_effect = record
+        mock_client.request_deliver_page.side_effect = record
+
+        table = run_products_status([f'M{i}' for i in range(6)], max_workers=3)
+
+        assert len(table['rows']) == 6
+        assert threads and all(name.startswith('lingxing-tool') for name in threads)
+
+    @patch('app.lingxing_agent.tools.product_tools.check_product_status_async')
+    def test_async_timeout_keeps_finished_rows(self, mock_check):
+        """测试：时间预算用完时已完成的行照常返回，未完成的 MSKU 标记为查询超时"""
+        import asyncio
+        from app.lingxing_agent.tools.product_tools import run_products_status_async
+
+        async def fake_check(msku, store_name, is_processing):
+            if msku == 'SLOW':
+                await asyncio.sleep(10)
+            return {'msku': msku, 'status': '正常发货'}
+
+        mock_check.side_effect = fake_check
+
+        table = asyncio.run(run_products_status_async(['A', 'SLOW', 'B'], timeout=0.1))
+
+        assert [row[:2] for row in table['rows']] == [['A', '正常发货'], ['SLOW', '查询超时'], ['B', '正常发货']]
+        assert table['summary'] == {'正常发货': 2, '查询超时': 1}
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
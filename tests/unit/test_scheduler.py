@@ -0,0 +1,221 @@
+"""
+Unit tests for the global tool scheduler
+
+Tests:
+1. global and per-host concurrency caps (threads)
+2. interactive requests are granted before batch sweeps
+3. fair sharing between chat sessions
+4. cancelled waiters give their place back
+5. shared executor: context propagation and inline nested submission
+6. clients take a scheduler slot per HTTP request
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _scheduler(**kwargs):
+    from app.lingxing_agent.core.scheduler import Scheduler
+
+    kwargs.setdefault("host_limits", {})
+    kwargs.setdefault("default_host_limit", 10)
+    return Scheduler(**kwargs)
+
+
+def _run_threads(scheduler, urls, hold=0.05):
+    """每个线程持有名额 hold 秒，返回各域名观察到的最大并发"""
+    lock = threading.Lock()
+    running, peak = {}, {}
+
+    def work(url):
+        with scheduler.slot(url):
+            with lock:
+                running[url] = running.get(url, 0) + 1
+                running["*"] = running.get("*", 0) + 1
+                for key in (url, "*"):
+                    peak[key] = max(peak.get(key, 0), running[key])
+            time.sleep(hold)
+            with lock:
+                running[url] -= 1
+                running["*"] -= 1
+
+    threads = [threading.Thread(target=work, args=(u,)) for u in urls]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return peak
+
+
+class TestConcurrencyCaps:
+    """Tests for global / per-host limits."""
+
+    def test_global_cap(self):
+        """测试：任意时刻在途请求数不超过全局上限"""
+        scheduler = _scheduler(max_concurrency=2)
+
+        peak = _run_threads(scheduler, ["https://a.com/x"] * 4 + ["https://b.com/x"] * 4)
+
+        assert peak["*"] <= 2
+        assert scheduler.stats()["in_flight"] == 0
+
+    def test_per_host_cap(self):
+        """测试：单个域名受自身上限约束，不影响其他域名"""
+        scheduler = _scheduler(max_concurrency=10, host_limits={"a.com": 1})
+
+        peak = _run_threads(scheduler, ["https://a.com/x"] * 3 + ["https://b.com/x"] * 3)
+
+        assert peak["https://a.com/x"] == 1
+        assert peak["https://b.com/x"] > 1
+
+
+class TestFairness:
+    """Tests for priority and per-session fair sharing."""
+
+    def test_interactive_before_batch(self):
+        """测试：名额释放时，后到的交互式请求先于排队中的批量请求"""
+        from app.lingxing_agent.core.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, scheduling
+
+        scheduler = _scheduler(max_concurrency=1)
+        order = []
+
+        async def request(name, priority):
+            with scheduling(priority=priority):
+                async with scheduler.aslot("https://a.com/x"):
+                    order.append(name)
+
+        async def run():
+            async with scheduler.aslot("https://a.com/x"):
+                batch = asyncio.create_task(request("batch", PRIORITY_BATCH))
+                await asyncio.sleep(0)
+                interactive = asyncio.create_task(request("interactive", PRIORITY_INTERACTIVE))
+                await asyncio.sleep(0)
+                assert scheduler.stats()["queued"] == 2
+            await asyncio.gather(batch, interactive)
+
+        asyncio.run(run())
+
+        assert order == ["interactive", "batch"]
+
+    def test_session_with_fewer_requests_goes_first(self):
+        """测试：同优先级下，在途请求少的会话先拿到名额"""
+        from app.lingxing_agent.core.scheduler import scheduling
+
+        scheduler = _scheduler(max_concurrency=2)
+        order = []
+
+        async def request(session, name, hold=None):
+            with scheduling(session=session):
+                async with scheduler.aslot("https://a.com/x"):
+                    order.append(name)
+                    if hold is not None:
+                        await hold.wait()
+
+        async def run():
+            release_a, release_c = asyncio.Event(), asyncio.Event()
+            holders = [
+                asyncio.create_task(request("A", "a1", release_a)),
+                asyncio.create_task(request("C", "c1", release_c)),
+            ]
+            await asyncio.sleep(0)
+            waiters = [
+                asyncio.create_task(request("A", "a2")),
+                asyncio.create_task(request("B", "b1")),
+            ]
+            await asyncio.sleep(0)
+            # C 让出名额时 A 仍有 1 个在途请求，B 为 0
+            release_c.set()
+            await asyncio.sleep(0.01)
+            release_a.set()
+            await asyncio.gather(*holders, *waiters)
+
+        asyncio.run(run())
+
+        assert order[2:] == ["b1", "a2"]
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """测试：排队中的协程被取消后移出队列，不占用名额"""
+        scheduler = _scheduler(max_concurrency=1)
+
+        async def waiter():
+            async with scheduler.aslot("https://a.com/x"):
+                pass
+
+        async def run():
+            async with scheduler.aslot("https://a.com/x"):
+                task = asyncio.create_task(waiter())
+                await asyncio.sleep(0)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                assert scheduler.stats()["queued"] == 0
+            async with scheduler.aslot("https://a.com/x"):
+                pass
+
+        asyncio.run(run())
+
+        stats = scheduler.stats()
+        assert stats["in_flight"] == 0 and stats["queued"] == 0
+        assert stats["wait"][0]["granted"] == 2
+
+
+class TestSharedExecutor:
+    """Tests for Scheduler.submit."""
+
+    def test_submit_carries_session_and_priority(self):
+        """测试：提交到共享线程池的任务保留会话与优先级"""
+        from app.lingxing_agent.core.scheduler import (
+            PRIORITY_BATCH,
+            current_priority,
+            current_session,
+            scheduling,
+        )
+
+        scheduler = _scheduler(workers=2)
+        with scheduling(session="s1", priority=PRIORITY_BATCH):
+            future = scheduler.submit(lambda: (current_session(), current_priority()))
+
+        assert future.result(timeout=5) == ("s1", PRIORITY_BATCH)
+
+    def test_nested_submit_runs_inline(self):
+        """测试：池内线程再次提交时直接执行，单线程池也不会死锁"""
+        scheduler = _scheduler(workers=1)
+
+        def outer():
+            inner = [scheduler.submit(lambda i=i: i * 2) for i in range(3)]
+            return [f.result() for f in inner]
+
+        assert scheduler.submit(outer).result(timeout=5) == [0, 2, 4]
+
+
+class TestClientIntegration:
+    """Tests that HTTP requests go through the scheduler."""
+
+    def test_sync_client_uses_slot(self):
+        """测试：同步客户端每次请求都在调度器名额内发送"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        scheduler = _scheduler(max_concurrency=1)
+        session = MagicMock()
+
+        def request(*args, **kwargs):
+            assert scheduler.stats()["in_flight"] == 1
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"code": 0}
+            return response
+
+        session.request.side_effect = request
+        client = LingXingClient(token="tok", session=session, cache=None)
+
+        with patch('app.lingxing_agent.core.client.get_scheduler', return_value=scheduler):
+            client._post("https://erp.lingxing.com/api/x", {})
+
+        assert session.request.call_count == 1
+        assert scheduler.stats()["in_flight"] == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
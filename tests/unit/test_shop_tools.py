@@ -3,6 +3,7 @@ Unit tests for app.lingxing_agent.tools.metrics
 
 Tests:
 1. analyze_store - store cost structure and metrics
+2. MonthDataContext - batch analysis shares one fetch per dataset
 """
 import pytest
 from unittest.mock import patch, MagicMock
@@ -46,9 +47,9 @@ class TestAnalyzeStore:
         }]
         
         # Mock other data (simplified)
-        mock_instance.get_purchase_plan.return_value = []
-        mock_instance.get_delivery_plan.return_value = []
-        mock_instance.get_fba_out.return_value = []
+        mock_instance.iter_purchase_plan.return_value = iter([])
+        mock_instance.iter_delivery_plan.return_value = iter([])
+        mock_instance.iter_fba_out.return_value = iter([])
         mock_instance.get_fba_inventory.return_value = {'data': {'summaryInfo': {'inventoryTurnoverDays': 45}}}
         mock_instance.get_local_inventory.return_value = {'data': {'total_info': {'rotation_day': 30}}}
         
@@ -97,9 +98,9 @@ class TestAnalyzeStore:
             'fbaDeliveryFee': 8000, 'fbaTransactionFeeRefunds': 0, 'totalAdsCost': 2000,
             'promotionFee': 200, 'platformFee': 4000,
         }]
-        mock_instance.get_purchase_plan.return_value = []
-        mock_instance.get_delivery_plan.return_value = []
-        mock_instance.get_fba_out.return_value = []
+        mock_instance.iter_purchase_plan.return_value = iter([])
+        mock_instance.iter_delivery_plan.return_value = iter([])
+        mock_instance.iter_fba_out.return_value = iter([])
         mock_instance.get_fba_inventory.return_value = {'data': {}}
         mock_instance.get_local_inventory.return_value = {'data': {}}
         
@@ -131,5 +132,60 @@ class TestAnalyzeStore:
         assert True  # Just verifying no exception
 
 
+class TestMonthDataContext:
+    """Tests for the shared month-scoped data context."""
+
+    @patch('app.lingxing_agent.tools.metrics.LingXingClient')
+    def test_batch_fetches_each_dataset_once(self, MockClient):
+        """测试：批量分析时每个全公司数据集只拉取一次"""
+        from app.lingxing_agent.tools.metrics import analyze_stores
+
+        mock_instance = MagicMock()
+        MockClient.return_value = mock_instance
+        mock_instance.get_profit_data.return_value = [
+            {'storeName': 'BT-US', 'totalFbaAndFbmAmount': 100, 'grossProfit': 10},
+            {'storeName': 'BT-CA', 'totalFbaAndFbmAmount': 200, 'grossProfit': 50},
+        ]
+        mock_instance.iter_purchase_plan.return_value = iter([
+            {'items': [{'seller_name': 'BT-US', 'quantity_plan': 3},
+                       {'seller_name': 'BT-CA', 'quantity_plan': 4}]},
+        ])
+        mock_instance.iter_delivery_plan.return_value = iter([
+            {'list': [{'sname': 'BT-CA', 'shipment_plan_quantity': '7'}]},
+        ])
+        mock_instance.iter_fba_out.return_value = iter([
+            {'type_name': 'FBA出库', 'store_name': 'BT-US', 'good_lock_num': -5},
+        ])
+        mock_instance.get_fba_inventory.return_value = None
+        mock_instance.get_local_inventory.return_value = None
+
+        result = analyze_stores(['BT-US', 'BT-CA', 'AC-US'], 2024, 1)
+
+        assert mock_instance.get_profit_data.call_count == 1
+        assert mock_instance.iter_purchase_plan.call_count == 1
+        assert mock_instance.iter_delivery_plan.call_count == 1
+        assert mock_instance.iter_fba_out.call_count == 1
+        assert result['BT-US']['gross_profit_rate'] == '10.00%'
+        assert result['BT-US']['purchase_plan_qty'] == 3
+        assert result['BT-US']['fba_actual_out_qty'] == 5
+        assert result['BT-CA']['delivery_plan_qty'] == 7
+        assert 'error' in result['AC-US']
+
+    @patch('app.lingxing_agent.tools.shop_tools._analyze_stores_impl')
+    def test_batch_tool_uses_shared_context(self, mock_analyze_stores):
+        """测试：analyze_store("ALL-US") 走共享上下文并跳过出错店铺"""
+        from app.lingxing_agent.tools.shop_tools import analyze_store
+
+        mock_analyze_stores.side_effect = lambda names, y, m: {
+            name: {'store_name': name} if name == 'BT-US' else {'error': 'no data'}
+            for name in names
+        }
+
+        result = analyze_store('ALL-US', 2024, 1)
+
+        assert mock_analyze_stores.call_count == 1
+        assert result['details'] == [{'store_name': 'BT-US'}]
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,182 @@
+"""
+Unit tests for app.lingxing_agent.core.singleflight
+
+Tests:
+1. SingleFlight - concurrent identical calls share one execution
+2. AsyncSingleFlight - async twin
+3. LingXingClient - identical in-flight requests are coalesced
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class TestSingleFlight:
+    """Tests for the thread-based single-flight group."""
+
+    def test_concurrent_calls_share_result(self):
+        """测试：并发相同 key 只执行一次，结果共享"""
+        from app.lingxing_agent.core.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        calls = []
+        gate = threading.Event()
+
+        def work():
+            calls.append(1)
+            gate.wait(1)
+            return {"rows": 42}
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            futures = [executor.submit(flight.do, "k", work) for _ in range(20)]
+            time.sleep(0.05)
+            gate.set()
+            results = [f.result() for f in futures]
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert flight.stats() == {"executed": 1, "coalesced": 19, "in_flight": 0}
+
+    def test_error_propagates_to_waiters(self):
+        """测试：上游异常同时抛给所有等待方，且不缓存"""
+        from app.lingxing_agent.core.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        gate = threading.Event()
+
+        def fail():
+            gate.wait(1)
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, "k", fail) for _ in range(5)]
+            time.sleep(0.05)
+            gate.set()
+            errors = [f.exception() for f in futures]
+
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        assert flight.do("k", lambda: "ok") == "ok"
+
+    def test_request_key_canonicalizes_payload(self):
+        """测试：payload 键顺序不同也视为同一请求"""
+        from app.lingxing_agent.core.singleflight import request_key
+
+        a = request_key("POST", "https://x/api", "t", {"a": 1, "b": [1, 2]})
+        b = request_key("POST", "https://x/api", "t", {"b": [1, 2], "a": 1})
+        c = request_key("POST", "https://x/api", "t", {"a": 2, "b": [1, 2]})
+
+        assert a == b
+        assert a != c
+
+
+class TestAsyncSingleFlight:
+    """Tests for the asyncio single-flight group."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_coroutines_share_result(self):
+        """测试：并发协程只执行一次"""
+        from app.lingxing_agent.core.singleflight import AsyncSingleFlight
+
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "done"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+
+        assert results == ["done"] * 10
+        assert len(calls) == 1
+        assert flight.stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        """测试：发起方被取消 (如计划截止) 时，跟随方仍拿到上游结果"""
+        from app.lingxing_agent.core.singleflight import AsyncSingleFlight
+
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(asyncio.wait_for(flight.do("k", work), 0.01))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        assert await follower == "done"
+        assert len(calls) == 1
+        assert flight.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_upstream_cancelled_when_all_waiters_cancel(self):
+        """测试：所有等待方都取消后才取消上游调用，之后的相同请求重新执行"""
+        from app.lingxing_agent.core.singleflight import AsyncSingleFlight
+
+        flight = AsyncSingleFlight()
+        cancelled = []
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert cancelled == [1]
+        assert flight.stats()["in_flight"] == 0
+
+
+class TestClientCoalescing:
+    """Tests for request coalescing inside LingXingClient."""
+
+    def test_identical_posts_share_one_upstream_call(self):
+        """测试：多个客户端同时发出相同请求只打一次上游"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        gate = threading.Event()
+
+        def slow_request(*args, **kwargs):
+            gate.wait(1)
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"code": 0}
+            return response
+
+        session = MagicMock()
+        session.request.side_effect = slow_request
+        clients = [LingXingClient(token="t", session=session) for _ in range(10)]
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [
+                executor.submit(c._post, "https://erp.lingxing.com/api/same", {"x": 1})
+                for c in clients
+            ]
+            time.sleep(0.05)
+            gate.set()
+            results = [f.result() for f in futures]
+
+        assert results == [{"code": 0}] * 10
+        assert session.request.call_count == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,180 @@
+"""
+Unit tests for app.lingxing_agent.core.snapshot
+
+Tests:
+1. ProfitSnapshotStore - save / read per-month store aggregates
+2. backfill - loads closed months only, skips existing ones, bypasses the response cache
+3. LingXingMetricsService - closed months are served from the snapshot
+4. settlement lag - a month is closed only N days after month end; earlier rows are refetched
+"""
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class TestProfitSnapshotStore:
+    """Tests for the SQLite snapshot store."""
+
+    def test_save_and_get_month(self, tmp_path):
+        """测试：整月写入后可按月读回，未写入的月份返回 None"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        store.save_month(2024, 1, [{"storeName": "BT-US", "grossProfit": 10.5}])
+
+        assert store.get_month(2024, 1) == [{"storeName": "BT-US", "grossProfit": 10.5}]
+        assert store.get_month(2024, 2) is None
+        assert store.months() == [(2024, 1)]
+
+    def test_empty_month_is_recorded(self, tmp_path):
+        """测试：没有店铺数据的月份也记为已快照，避免重复请求"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        store.save_month(2024, 3, [])
+
+        assert store.get_month(2024, 3) == []
+
+    def test_save_month_replaces_previous(self, tmp_path):
+        """测试：重复写入同一月份时整体替换"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        store.save_month(2024, 1, [{"storeName": "A"}, {"storeName": "B"}])
+        store.save_month(2024, 1, [{"storeName": "C"}])
+
+        assert store.get_month(2024, 1) == [{"storeName": "C"}]
+
+
+class TestBackfill:
+    """Tests for the backfill command."""
+
+    def test_backfill_closed_months_only(self, tmp_path):
+        """测试：只回填当前月之前的月份，已有快照的月份跳过"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore, backfill
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        store.save_month(2025, 12, [{"storeName": "A"}])
+        client = MagicMock()
+        client.get_profit_data.return_value = [{"storeName": "A"}]
+
+        loaded = backfill(client, store, years=1, now=datetime(2026, 2, 15))
+
+        assert loaded[0] == (2025, 2)
+        assert loaded[-1] == (2026, 1)
+        assert (2025, 12) not in loaded
+        assert len(loaded) == 11
+        client.get_profit_data.assert_any_call("2026-01-01", "2026-01-31", use_cache=False)
+
+    def test_backfill_bypasses_response_cache(self, tmp_path):
+        """测试：回填不读响应缓存，结算期内缓存的旧报表不会被写进快照"""
+        from app.lingxing_agent.core.cache import ResponseCache, cache_key
+        from app.lingxing_agent.core.client import LingXingClient
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore, backfill
+
+        session = MagicMock()
+        session.request.return_value.status_code = 200
+        session.request.return_value.json.return_value = {
+            "code": 0, "data": {"records": [{"storeName": "A", "grossProfit": 20}]}
+        }
+        cache = ResponseCache()
+        client = LingXingClient(token="t", session=session, cache=cache)
+        url, payload = client._profit_request("2026-01-01", "2026-01-31")
+        stale = {"code": 0, "data": {"records": [{"storeName": "A", "grossProfit": 5}]}}
+        cache.set(cache_key("POST", url, payload), stale, ttl=3600)
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        backfill(client, store, years=1, now=datetime(2026, 2, 15))
+
+        assert store.get_store(2026, 1, "A")["grossProfit"] == 20
+
+
+class TestSettlementLag:
+    """Tests for the post-month-end settlement window."""
+
+    def test_month_closed_after_lag(self):
+        """测试：月末之后超过结算天数才视为已结算"""
+        from app.lingxing_agent.core.snapshot import is_closed_month
+
+        assert not is_closed_month(2026, 1, datetime(2026, 2, 2), lag_days=10)
+        assert not is_closed_month(2026, 1, datetime(2026, 2, 10, 23), lag_days=10)
+        assert is_closed_month(2026, 1, datetime(2026, 2, 11), lag_days=10)
+        assert is_closed_month(2025, 12, datetime(2026, 1, 1), lag_days=0)
+
+    def test_rows_written_before_settlement_ignored(self, tmp_path):
+        """测试：结算日之前写入的整月 / 单店快照读取时视为不存在"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore, settled_at
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        store.save_month(2024, 1, [{"storeName": "A"}])
+        store.save_store(2024, 2, {"storeName": "B"})
+        early = {1: settled_at(2024, 1).timestamp() - 1, 2: settled_at(2024, 2).timestamp() - 1}
+        for month, ts in early.items():
+            store._conn.execute("UPDATE profit_months SET fetched_at = ? WHERE month = ?", (ts, month))
+            store._conn.execute("UPDATE profit_stores SET fetched_at = ? WHERE month = ?", (ts, month))
+
+        assert store.get_month(2024, 1) is None
+        assert not store.has_month(2024, 1)
+        assert store.get_store(2024, 1, "A") is None
+        assert store.get_store(2024, 2, "B") is None
+
+    def test_backfill_skips_unsettled_month(self, tmp_path):
+        """测试：上个月尚在结算期内时不回填"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore, backfill
+
+        store = ProfitSnapshotStore(str(tmp_path))
+        client = MagicMock()
+        client.get_profit_data.return_value = []
+
+        loaded = backfill(client, store, years=1, now=datetime(2026, 2, 2))
+
+        assert (2026, 1) not in loaded
+        assert loaded[-1] == (2025, 12)
+
+
+class TestMetricsSnapshot:
+    """Tests for snapshot reads in LingXingMetricsService."""
+
+    def test_closed_month_served_from_snapshot(self, tmp_path):
+        """测试：已结算月份第二次查询不再请求利润报表"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore
+        from app.lingxing_agent.tools.metrics import LingXingMetricsService
+
+        client = MagicMock()
+        client.get_profit_data.return_value = [
+            {"storeName": "BT-US", "totalFbaAndFbmAmount": 100, "grossProfit": 20}
+        ]
+        client.iter_purchase_plan.side_effect = lambda *a: iter([])
+        client.iter_delivery_plan.side_effect = lambda *a: iter([])
+        client.iter_fba_out.side_effect = lambda *a: iter([])
+        client.get_fba_inventory.return_value = None
+        client.get_local_inventory.return_value = None
+
+        service = LingXingMetricsService(client, ProfitSnapshotStore(str(tmp_path)))
+        first = service.get_store_cost_structure("BT-US", 2024, 1)
+        second = service.get_store_cost_structure("BT-US", 2024, 1)
+
+        assert first == second
+        assert first["gross_profit_rate"] == "20.00%"
+        assert client.get_profit_data.call_count == 1
+        assert client.get_profit_data.call_args.kwargs["use_cache"] is False
+
+    def test_open_month_not_snapshotted(self, tmp_path):
+        """测试：当前月份不写入快照"""
+        from app.lingxing_agent.core.snapshot import ProfitSnapshotStore
+        from app.lingxing_agent.tools.metrics import LingXingMetricsService
+
+        now = datetime.now()
+        store = ProfitSnapshotStore(str(tmp_path))
+        client = MagicMock()
+        client.get_profit_data.return_value = []
+
+        service = LingXingMetricsService(client, store)
+        service._load_profit_data(now.year, now.month, "x", "y")
+
+        assert store.months() == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,74 @@
+"""
+Unit tests for import-time side effects
+
+Tests:
+1. importing app.agent does no network I/O, no auth lookup and spawns no subprocess
+2. LingXingClient defers login to the first request
+"""
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 在全新解释器中拦截网络、google.auth 与子进程，再导入 app.agent
+_GUARDED_IMPORT = """
+import socket, subprocess
+
+def _blocked(*args, **kwargs):
+    raise AssertionError("I/O during import")
+
+socket.getaddrinfo = _blocked
+socket.socket.connect = _blocked
+subprocess.Popen.__init__ = _blocked
+
+import google.auth
+google.auth.default = _blocked
+
+import app.agent
+print("imported")
+"""
+
+
+class TestImportSideEffects:
+    """Tests that module import stays side-effect free."""
+
+    def test_import_agent_does_no_io(self):
+        """测试：导入 app.agent 不做网络 I/O、不探测凭据、不启动 MCP 子进程"""
+        env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+        proc = subprocess.run(
+            [sys.executable, "-c", _GUARDED_IMPORT],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        assert "imported" in proc.stdout
+
+    @patch('app.lingxing_agent.core.client.token_manager')
+    def test_client_logs_in_on_first_request(self, mock_manager):
+        """测试：客户端构造时不登录，首次请求时才获取 token"""
+        from app.lingxing_agent.core.client import LingXingClient
+
+        mock_manager.get_token.return_value = "tok"
+        session = MagicMock()
+        session.request.return_value.status_code = 200
+        session.request.return_value.json.return_value = {"code": 0}
+
+        client = LingXingClient(session=session)
+        assert mock_manager.get_token.call_count == 0
+
+        client._post("https://erp.lingxing.com/api/x", {})
+
+        assert mock_manager.get_token.call_count == 1
+        assert session.request.call_args[1]["headers"]["auth-token"] == "tok"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])